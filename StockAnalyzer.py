@@ -3,9 +3,13 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+from indicators import add_indicators
+from indicator_state import IndicatorStateStore, get_default_state_store
 
 class StockAnalyzer:
-    def __init__(self, ticker, start_date=None, end_date=None):
+    INDICATORS = ['EMA20', 'EMA50', 'EMA100', 'EMA200', 'MACD', 'Signal_Line', 'MACD_Histogram', 'RSI']
+    
+    def __init__(self, ticker, start_date=None, end_date=None, state_store: IndicatorStateStore = None):
         """
         Initialize StockAnalyzer with ticker and date range
         
@@ -13,6 +17,7 @@ class StockAnalyzer:
         ticker (str): Stock ticker symbol
         start_date (str): Start date in 'YYYY-MM-DD' format (default: 1 year ago)
         end_date (str): End date in 'YYYY-MM-DD' format (default: today)
+        state_store (IndicatorStateStore): Where indicator states are saved (default: beside the price store)
         """
         self.ticker = ticker
         self.end_date = end_date if end_date else datetime.now().strftime('%Y-%m-%d')
@@ -20,6 +25,8 @@ class StockAnalyzer:
             datetime.strptime(self.end_date, '%Y-%m-%d') - timedelta(days=365)
         ).strftime('%Y-%m-%d')
         self.data = self._get_stock_data()
+        self.indicator_state = None
+        self.state_store = state_store or get_default_state_store()
         
     def _get_stock_data(self):
         """Fetch stock data from Yahoo Finance"""
@@ -29,25 +36,8 @@ class StockAnalyzer:
     
     def calculate_technical_indicators(self):
         """Calculate technical indicators"""
-        # Calculate EMAs
-        self.data['EMA20'] = self.data['Close'].ewm(span=20, adjust=False).mean()
-        self.data['EMA50'] = self.data['Close'].ewm(span=50, adjust=False).mean()
-        self.data['EMA100'] = self.data['Close'].ewm(span=100, adjust=False).mean()
-        self.data['EMA200'] = self.data['Close'].ewm(span=200, adjust=False).mean()
-        
-        # Calculate MACD
-        exp1 = self.data['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = self.data['Close'].ewm(span=26, adjust=False).mean()
-        self.data['MACD'] = exp1 - exp2
-        self.data['Signal_Line'] = self.data['MACD'].ewm(span=9, adjust=False).mean()
-        self.data['MACD_Histogram'] = self.data['MACD'] - self.data['Signal_Line']
-        
-        # Calculate RSI
-        delta = self.data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        self.data['RSI'] = 100 - (100 / (1 + rs))
+        # Calculate EMAs, MACD and RSI
+        add_indicators(self.data, self.INDICATORS)
         
         # Calculate Accumulation/Distribution
         clv = ((self.data['Close'] - self.data['Low']) - 
@@ -55,6 +45,22 @@ class StockAnalyzer:
         self.data['ADL'] = clv * self.data['Volume']
         self.data['ADL'] = self.data['ADL'].cumsum()
         
+        # Keep the indicators' running state so new bars can be added one at a time;
+        # today's bar is still forming and stays out of it. A state saved by an
+        # earlier run that ends on the same session is reloaded instead
+        self.indicator_state = self.state_store.seeded(self.ticker, self.INDICATORS + ['ADL'], self.data)
+        return self.data
+    
+    def update(self):
+        """Append bars published since the last finished session, advancing the indicators bar by bar"""
+        if self.indicator_state is None:
+            self.calculate_technical_indicators()
+        last_date = self.indicator_state.last_date or self.data.index[-1]
+        stock = yf.Ticker(self.ticker)
+        bars = stock.history(start=last_date.strftime('%Y-%m-%d'))
+        # A partial bar for today is replaced by its final values on a later update
+        self.data = self.indicator_state.append(self.data, bars)
+        self.state_store.put(self.ticker, self.indicator_state)
         return self.data
     
     def plot_technical_analysis(self, save_path=None):
@@ -1,9 +1,10 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 from pathlib import Path
+from price_store import get_default_store
+from correlation import correlation_row, rolling_peer_correlation
 
 class ZMTechAnalysis:
     def __init__(self, data_dir=None):
@@ -31,9 +32,20 @@ class ZMTechAnalysis:
     def analyze_stocks(self, ticker1, ticker2, periods=10):  # This is the correct method name
         """Perform comprehensive stock analysis"""
         try:
-            # Get stock data
-            stock1 = yf.download(ticker1, start='2022-01-01')
-            stock2 = yf.download(ticker2, start='2022-01-01')
+            # Get stock data for both tickers in one grouped request
+            store = get_default_store()
+            frames = store.get_history_many([ticker1, ticker2], '2022-01-01', datetime.now())
+            stock1 = frames[ticker1.upper()]
+            stock2 = frames[ticker2.upper()]
+            # Whichever the grouped request did not fill is loaded on its own
+            if stock1 is None:
+                stock1 = store.get_history(ticker1, '2022-01-01', datetime.now())
+            if stock2 is None:
+                stock2 = store.get_history(ticker2, '2022-01-01', datetime.now())
+            if stock1 is None or stock2 is None:
+                raise ValueError(f"No price data found for {ticker1} or {ticker2}")
+            closes = {ticker1: stock1['Close'], ticker2: stock2['Close']}
+            full_period = correlation_row(closes, ticker1)[ticker2]
             
             # Basic analysis
             analysis = {
@@ -50,7 +62,10 @@ class ZMTechAnalysis:
                     }
                 },
                 'correlation': {
-                    'correlation': stock1['Close'].corr(stock2['Close'])
+                    # Daily-return correlation over the whole period and trailing 20- and 60-day windows
+                    'correlation': float('nan') if full_period is None else full_period,
+                    'rolling_20': rolling_peer_correlation(closes, ticker1, 20)[ticker2],
+                    'rolling_60': rolling_peer_correlation(closes, ticker1, 60)[ticker2]
                 },
                 'charts': self.generate_charts(stock1, stock2)
             }
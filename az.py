@@ -1,20 +1,12 @@
-import yfinance as yf
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
-import pytz
 from pathlib import Path
-import os
-import numpy as np
+from price_store import get_default_store
+from indicators import add_indicators, add_panel_indicators, rsi
 
 def calculate_rsi(data, periods=14):
     """Calculate RSI for a given price series"""
-    delta = data.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=periods).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=periods).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    return pd.Series(rsi(data.to_numpy(), periods), index=data.index)
 
 def get_eps_data(ticker_obj):
     """Get EPS data for the specified period"""
@@ -22,6 +14,9 @@ def get_eps_data(ticker_obj):
         # Get earnings data directly without date filtering
         earnings = ticker_obj.earnings_dates
         if earnings is not None and not earnings.empty:
+            # Match the timezone-naive index used by the price store
+            if earnings.index.tz is not None:
+                earnings.index = earnings.index.tz_localize(None)
             # Sort by date descending and get last 10 quarters
             earnings = earnings.sort_index(ascending=False).head(10)
             return earnings
@@ -29,8 +24,99 @@ def get_eps_data(ticker_obj):
         print(f"Error fetching EPS data: {str(e)}")
     return None
 
+def calculate_price_changes(df, earnings_dates, company_name, days_before=5, days_after=5):
+    """Price move, MA200 and RSI around each earnings date, one row per event"""
+    results = []
+    
+    for earning_date in earnings_dates.index:
+        try:
+            start_idx = earning_date - timedelta(days=days_before)
+            end_idx = earning_date + timedelta(days=days_after)
+            
+            period_prices = df[start_idx:end_idx]
+            
+            if len(period_prices) < 2:
+                continue
+                
+            pre_earnings_price = period_prices['Close'].iloc[0]
+            post_earnings_price = period_prices['Close'].iloc[-1]
+            pct_change = ((post_earnings_price - pre_earnings_price) / pre_earnings_price) * 100
+            
+            ma200 = period_prices['MA200'].iloc[0]
+            rsi = period_prices['RSI'].iloc[0]
+            
+            # Get EPS data with safe fallbacks
+            result_dict = {
+                'date': earning_date,
+                'pre_price': pre_earnings_price,
+                'post_price': post_earnings_price,
+                'pct_change': pct_change,
+                'company': company_name,
+                'volume': period_prices['Volume'].mean(),
+                'MA200': ma200,
+                'RSI': rsi,
+                'Above_MA200': pre_earnings_price > ma200,
+                'RSI_Level': 'Overbought' if rsi > 70 else 'Oversold' if rsi < 30 else 'Neutral'
+            }
+            
+            # Try to add EPS data if available
+            try:
+                result_dict.update({
+                    'EPS_Actual': earnings_dates.loc[earning_date, 'EPS Actual'],
+                    'EPS_Estimate': earnings_dates.loc[earning_date, 'EPS Estimate'],
+                    'EPS_Surprise': earnings_dates.loc[earning_date, 'Surprise(%)']
+                })
+            except:
+                result_dict.update({
+                    'EPS_Actual': None,
+                    'EPS_Estimate': None,
+                    'EPS_Surprise': None
+                })
+            
+            results.append(result_dict)
+            
+        except Exception as e:
+            print(f"Error processing earnings date {earning_date}: {str(e)}")
+            continue
+        
+    return pd.DataFrame(results)
+
+def summarize_reactions(results):
+    """Summary statistics of one company's earnings events, keyed by metric name"""
+    has_eps = 'EPS_Surprise' in results.columns and not results['EPS_Surprise'].isna().all()
+    return pd.Series({
+        'Average Change %': results['pct_change'].mean(),
+        'Number of Earnings Events': len(results),
+        'Positive Events': len(results[results['pct_change'] > 0]),
+        'Negative Events': len(results[results['pct_change'] < 0]),
+        'Average Volume': results['volume'].mean(),
+        'Average RSI': results['RSI'].mean(),
+        'Events Above MA200 (%)': (results['Above_MA200'].sum() / len(results)) * 100,
+        'RSI > 70 Events': len(results[results['RSI'] > 70]),
+        'RSI < 30 Events': len(results[results['RSI'] < 30]),
+        'Average EPS Surprise %': results['EPS_Surprise'].mean() if has_eps else None,
+        'Positive EPS Surprises': len(results[results['EPS_Surprise'] > 0]) if has_eps else None,
+        'Negative EPS Surprises': len(results[results['EPS_Surprise'] < 0]) if has_eps else None,
+    }, dtype=object)
+
+def ticker_earnings_reactions(ticker, days_before=5, days_after=5, store=None):
+    """Event study rows for one ticker's last 10 quarters, without any files or plots"""
+    import yfinance as yf
+    eps = get_eps_data(yf.Ticker(ticker))
+    if eps is None or eps.empty:
+        return None
+    start_date = eps.index.min() - timedelta(days=365)  # Extra year for MA calculation
+    end_date = eps.index.max() + timedelta(days=days_after)
+    df = (store or get_default_store()).get_history(ticker, start_date, end_date)
+    if df is None or df.empty:
+        return None
+    add_indicators(df, ['MA200', 'RSI'])
+    return calculate_price_changes(df, eps, ticker, days_before, days_after)
+
 def analyze_earnings_impact(ticker1, ticker2, days_before=5, days_after=5, output_dir="earnings_analysis"):
     """Analyze and compare stock performance around earnings dates"""
+    import yfinance as yf
+    from matplotlib.figure import Figure
     # Create output directory
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -53,13 +139,23 @@ def analyze_earnings_impact(ticker1, ticker2, days_before=5, days_after=5, outpu
         end_date = max(eps1.index.max(), eps2.index.max()) + timedelta(days=days_after)
         
         # Get historical price data
-        df1 = stock1.history(start=start_date, end=end_date)
-        df2 = stock2.history(start=start_date, end=end_date)
+        store = get_default_store()
+        frames = store.get_history_many([ticker1, ticker2], start_date, end_date)
+        df1 = frames[ticker1.upper()]
+        df2 = frames[ticker2.upper()]
+        # Whichever the grouped request did not fill is loaded on its own
+        if df1 is None:
+            df1 = store.get_history(ticker1, start_date, end_date)
+        if df2 is None:
+            df2 = store.get_history(ticker2, start_date, end_date)
+        
+        if df1 is None or df2 is None or df1.empty or df2.empty:
+            print(f"No price data found for {ticker1} or {ticker2}")
+            return None
         
         # Calculate technical indicators
-        for df in [df1, df2]:
-            df['MA200'] = df['Close'].rolling(window=200).mean()
-            df['RSI'] = calculate_rsi(df['Close'])
+        frames = add_panel_indicators({ticker1: df1, ticker2: df2}, ['MA200', 'RSI'])
+        df1, df2 = frames[ticker1], frames[ticker2]
         
         # Export raw technical data
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -68,74 +164,14 @@ def analyze_earnings_impact(ticker1, ticker2, days_before=5, days_after=5, outpu
         
         df1.to_csv(tech_data1)
         df2.to_csv(tech_data2)
-        
-        if df1.empty or df2.empty:
-            print(f"No price data found for {ticker1} or {ticker2}")
-            return None
             
     except Exception as e:
         print(f"Error fetching data: {str(e)}")
         return None
 
-    def calculate_price_changes(df, earnings_dates, company_name):
-        results = []
-        
-        for earning_date in earnings_dates.index:
-            try:
-                start_idx = earning_date - timedelta(days=days_before)
-                end_idx = earning_date + timedelta(days=days_after)
-                
-                period_prices = df[start_idx:end_idx]
-                
-                if len(period_prices) < 2:
-                    continue
-                    
-                pre_earnings_price = period_prices['Close'].iloc[0]
-                post_earnings_price = period_prices['Close'].iloc[-1]
-                pct_change = ((post_earnings_price - pre_earnings_price) / pre_earnings_price) * 100
-                
-                ma200 = period_prices['MA200'].iloc[0]
-                rsi = period_prices['RSI'].iloc[0]
-                
-                # Get EPS data with safe fallbacks
-                result_dict = {
-                    'date': earning_date,
-                    'pre_price': pre_earnings_price,
-                    'post_price': post_earnings_price,
-                    'pct_change': pct_change,
-                    'company': company_name,
-                    'volume': period_prices['Volume'].mean(),
-                    'MA200': ma200,
-                    'RSI': rsi,
-                    'Above_MA200': pre_earnings_price > ma200,
-                    'RSI_Level': 'Overbought' if rsi > 70 else 'Oversold' if rsi < 30 else 'Neutral'
-                }
-                
-                # Try to add EPS data if available
-                try:
-                    result_dict.update({
-                        'EPS_Actual': earnings_dates.loc[earning_date, 'EPS Actual'],
-                        'EPS_Estimate': earnings_dates.loc[earning_date, 'EPS Estimate'],
-                        'EPS_Surprise': earnings_dates.loc[earning_date, 'Surprise(%)']
-                    })
-                except:
-                    result_dict.update({
-                        'EPS_Actual': None,
-                        'EPS_Estimate': None,
-                        'EPS_Surprise': None
-                    })
-                
-                results.append(result_dict)
-                
-            except Exception as e:
-                print(f"Error processing earnings date {earning_date}: {str(e)}")
-                continue
-            
-        return pd.DataFrame(results)
-    
     # Calculate results for both companies
-    results1 = calculate_price_changes(df1, eps1, ticker1)
-    results2 = calculate_price_changes(df2, eps2, ticker2)
+    results1 = calculate_price_changes(df1, eps1, ticker1, days_before, days_after)
+    results2 = calculate_price_changes(df2, eps2, ticker2, days_before, days_after)
     
     if results1 is None or results2 is None or len(results1) == 0 or len(results2) == 0:
         print("Not enough data points to analyze")
@@ -145,74 +181,19 @@ def analyze_earnings_impact(ticker1, ticker2, days_before=5, days_after=5, outpu
     all_results = pd.concat([results1, results2])
     
     # Create summary statistics
-    summary_data = {
-        'Metric': [
-            'Average Change %',
-            'Number of Earnings Events',
-            'Positive Events',
-            'Negative Events',
-            'Average Volume',
-            'Average RSI',
-            'Events Above MA200 (%)',
-            'RSI > 70 Events',
-            'RSI < 30 Events'
-        ],
-        ticker1: [
-            results1['pct_change'].mean(),
-            len(results1),
-            len(results1[results1['pct_change'] > 0]),
-            len(results1[results1['pct_change'] < 0]),
-            results1['volume'].mean(),
-            results1['RSI'].mean(),
-            (results1['Above_MA200'].sum() / len(results1)) * 100,
-            len(results1[results1['RSI'] > 70]),
-            len(results1[results1['RSI'] < 30])
-        ],
-        ticker2: [
-            results2['pct_change'].mean(),
-            len(results2),
-            len(results2[results2['pct_change'] > 0]),
-            len(results2[results2['pct_change'] < 0]),
-            results2['volume'].mean(),
-            results2['RSI'].mean(),
-            (results2['Above_MA200'].sum() / len(results2)) * 100,
-            len(results2[results2['RSI'] > 70]),
-            len(results2[results2['RSI'] < 30])
-        ]
-    }
-
-    # Add EPS metrics if available
-    if 'EPS_Surprise' in results1.columns and 'EPS_Surprise' in results2.columns:
-        eps_metrics = {
-            'Metric': [
-                'Average EPS Surprise %',
-                'Positive EPS Surprises',
-                'Negative EPS Surprises'
-            ],
-            ticker1: [
-                results1['EPS_Surprise'].mean() if not results1['EPS_Surprise'].isna().all() else None,
-                len(results1[results1['EPS_Surprise'] > 0]) if not results1['EPS_Surprise'].isna().all() else None,
-                len(results1[results1['EPS_Surprise'] < 0]) if not results1['EPS_Surprise'].isna().all() else None
-            ],
-            ticker2: [
-                results2['EPS_Surprise'].mean() if not results2['EPS_Surprise'].isna().all() else None,
-                len(results2[results2['EPS_Surprise'] > 0]) if not results2['EPS_Surprise'].isna().all() else None,
-                len(results2[results2['EPS_Surprise'] < 0]) if not results2['EPS_Surprise'].isna().all() else None
-            ]
-        }
-        
-        # Append EPS metrics to summary data
-        for key in summary_data:
-            summary_data[key].extend(eps_metrics[key])
-    
-    summary_df = pd.DataFrame(summary_data)
+    summary1 = summarize_reactions(results1)
+    summary2 = summarize_reactions(results2)
+    summary_df = pd.DataFrame({'Metric': list(summary1.index), ticker1: list(summary1), ticker2: list(summary2)})
     
     # Create visualization
     if 'EPS_Surprise' in results1.columns and 'EPS_Surprise' in results2.columns and \
        not (results1['EPS_Surprise'].isna().all() and results2['EPS_Surprise'].isna().all()):
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(20, 15))
+        # A standalone Figure rather than pyplot, so this can run off the Tk thread
+        fig = Figure(figsize=(20, 15))
+        ((ax1, ax2), (ax3, ax4)) = fig.subplots(2, 2)
     else:
-        fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(15, 15))
+        fig = Figure(figsize=(15, 15))
+        (ax1, ax2, ax3) = fig.subplots(3, 1)
     
     # Plot 1: Price Changes
     companies = [ticker1, ticker2]
@@ -285,12 +266,11 @@ def analyze_earnings_impact(ticker1, ticker2, days_before=5, days_after=5, outpu
                     va='bottom' if value > 0 else 'top'
                 )
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Save outputs
     plot_filename = output_dir / f'technical_analysis_{ticker1}_{ticker2}.png'
-    plt.savefig(plot_filename, bbox_inches='tight', dpi=300)
-    plt.close()
+    fig.savefig(plot_filename, bbox_inches='tight', dpi=300)
     
     # Save detailed results and summary
     detailed_csv = output_dir / f'detailed_results_{ticker1}_{ticker2}_{timestamp}.csv'
@@ -1,11 +1,43 @@
 import unittest
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from unittest.mock import patch
 import yfinance as yf
+import tempfile
+import price_store
+import earnings_calendar
+import iv_table
+from price_store import PriceStore
+from earnings_calendar import EarningsCalendar
+from iv_table import IVTable, measure_iv
+from iv_surface import SurfaceCache, build_surface
+from option_cache import OptionChainCache
+from event_window import event_windows
+from indicators import add_indicators, add_panel_indicators, compute_indicators
+from indicator_state import IndicatorState, IndicatorStateStore
+from correlation import rolling_correlation, split_correlation
+from virtual_table import TableModel, scroll_offset
+from implied_vol import OptionChain, add_greeks, bs_price, implied_volatility, solve_options, years_to_expiry
 from earnings_sector_compare import StockAnalyzer  # Assuming your class is in this file
 
 
+def setUpModule():
+    # Keep the on-disk price store out of the working tree
+    global store_dir
+    store_dir = tempfile.TemporaryDirectory()
+    price_store._default_store = PriceStore(store_dir.name)
+    earnings_calendar._default_calendar = EarningsCalendar(store_dir.name)
+    iv_table._default_iv_table = IVTable(store_dir.name)
+
+
+def tearDownModule():
+    price_store._default_store = None
+    earnings_calendar._default_calendar = None
+    iv_table._default_iv_table = None
+    store_dir.cleanup()
+
+
 class TestStockAnalyzer(unittest.TestCase):
 
     @patch('yfinance.Ticker')
@@ -27,6 +59,34 @@ class TestStockAnalyzer(unittest.TestCase):
         dates = analyzer.get_earnings_dates('MSFT')
         self.assertEqual(len(dates), 0)
 
+    @patch('yfinance.Ticker')
+    def test_get_earnings_dates_cached(self, mock_ticker):
+        upcoming = pd.Timestamp.today().normalize() + timedelta(days=30)
+        mock_ticker.return_value.earnings_dates = pd.DataFrame(index=[upcoming, datetime(2024, 1, 1)], data={'earnings': [1, 2]})
+        analyzer = StockAnalyzer(calendar=EarningsCalendar(store_dir.name))
+        first = analyzer.get_earnings_dates('NVDA')
+        second = analyzer.get_earnings_dates('NVDA')
+        self.assertEqual(first, second)
+        self.assertEqual(first[0], upcoming)
+        # Dates are served from the cache until the upcoming report has passed
+        self.assertEqual(mock_ticker.call_count, 1)
+
+    @patch('yfinance.Ticker')
+    def test_next_earnings_date_is_never_guessed(self, mock_ticker):
+        mock_ticker.return_value.earnings_dates = pd.DataFrame(index=[datetime(2024, 1, 1)], data={'earnings': [1]})
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(EarningsCalendar(tmp).next_earnings_date('INTC'))
+
+    @patch('yfinance.Ticker')
+    def test_missing_dates_are_cached(self, mock_ticker):
+        for name in ('earnings_dates', 'quarterly_earnings', 'quarterly_financials', 'earnings_history', 'calendar'):
+            setattr(mock_ticker.return_value, name, pd.DataFrame())
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(EarningsCalendar(tmp).get_dates('XYZ'), [])
+            # A fresh calendar on the same directory remembers that nothing was found
+            self.assertEqual(EarningsCalendar(tmp).get_dates('XYZ'), [])
+        self.assertEqual(mock_ticker.call_count, 1)
+
     @patch('yfinance.Ticker')
     def test_get_earnings_dates_error(self, mock_ticker):
         mock_ticker.side_effect = Exception("Mock yfinance error")
@@ -55,6 +115,63 @@ class TestStockAnalyzer(unittest.TestCase):
         data = analyzer.get_stock_data('MSFT', start_date, end_date)
         self.assertIsNone(data)
 
+    @patch('yfinance.Ticker.history')
+    def test_get_stock_data_reads_from_store(self, mock_history):
+        mock_data = pd.DataFrame({'Close': [10.0, 12.0, 15.0]}, index=pd.to_datetime(['2024-02-01', '2024-02-02', '2024-02-05']))
+        mock_history.return_value = mock_data
+        with tempfile.TemporaryDirectory() as tmp:
+            start_date = datetime(2024, 2, 1)
+            end_date = datetime(2024, 2, 5)
+            StockAnalyzer(store=PriceStore(tmp)).get_stock_data('NVDA', start_date, end_date)
+            # A fresh store on the same directory should not hit the network
+            data = StockAnalyzer(store=PriceStore(tmp)).get_stock_data('NVDA', start_date, end_date)
+        self.assertEqual(mock_history.call_count, 1)
+        self.assertEqual(len(data), 3)
+
+    @patch('yfinance.Ticker.history')
+    def test_get_stock_data_lazy_columns(self, mock_history):
+        mock_history.return_value = pd.DataFrame({'Close': [10.0, 12.0, 15.0, 14.0]}, index=pd.to_datetime(['2024-03-01', '2024-03-04', '2024-03-05', '2024-03-06']))
+        analyzer = StockAnalyzer()
+        with patch.object(IVTable, 'current') as mock_iv:
+            data = analyzer.get_stock_data('AMD', datetime(2024, 3, 1), datetime(2024, 3, 6), columns=['Daily_Return'])
+            self.assertIn('Daily_Return', data.columns)
+            self.assertNotIn('MA50', data.columns)
+            # Options are only requested once IV is asked for
+            mock_iv.assert_not_called()
+        data = analyzer.add_columns('AMD', data, ['MA50'])
+        self.assertIn('MA50', data.columns)
+
+    def test_iv_recorded_per_date(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            table = IVTable(tmp)
+            table.record('amd', datetime(2024, 3, 4), 0.45)
+            # A fresh table on the same directory reads the stored value back
+            values = IVTable(tmp).for_index('AMD', pd.to_datetime(['2024-03-01', '2024-03-04']))
+        self.assertTrue(pd.isna(values.iloc[0]))
+        self.assertEqual(values.iloc[1], 0.45)
+
+    def test_iv_snapshots_append_and_reload(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            table = IVTable(tmp)
+            table.append('amd', datetime(2024, 3, 4), {'atm_iv': 0.40, 'iv_30d': 0.38, 'skew_25d': 0.05})
+            table.append('AMD', datetime(2024, 3, 5), {'atm_iv': 0.42})
+            # A later snapshot of the same day replaces the earlier one
+            table.append('AMD', datetime(2024, 3, 4), {'atm_iv': 0.41, 'iv_30d': 0.39})
+            frame = IVTable(tmp).frame('AMD')
+        self.assertEqual(list(frame.index), list(pd.to_datetime(['2024-03-04', '2024-03-05'])))
+        self.assertEqual(frame.loc['2024-03-04', 'atm_iv'], 0.41)
+        self.assertEqual(frame.loc['2024-03-04', 'iv_30d'], 0.39)
+        self.assertTrue(pd.isna(frame.loc['2024-03-04', 'skew_25d']))
+
+    @patch('yfinance.Ticker')
+    def test_historical_iv_is_a_lookup(self, mock_ticker):
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = StockAnalyzer(iv_table=IVTable(tmp))
+            analyzer.iv_table.record('AMD', datetime(2024, 3, 4), 0.45)
+            self.assertEqual(analyzer.get_historical_iv('AMD', pd.Timestamp('2024-03-04 15:30', tz='America/New_York')), 0.45)
+            self.assertIsNone(analyzer.get_historical_iv('AMD', datetime(2024, 3, 1)))
+        mock_ticker.assert_not_called()
+
     @patch('yfinance.Ticker.history')
     def test_get_stock_data_error(self, mock_history):
         mock_history.side_effect = Exception("Mock yfinance error")
@@ -78,6 +195,37 @@ class TestStockAnalyzer(unittest.TestCase):
         correlation = analyzer.calculate_correlation(pd.Series([1]), pd.Series([2]))
         self.assertIsNone(correlation)
 
+    def test_peer_correlations_match_pairwise(self):
+        dates = pd.bdate_range('2024-01-01', periods=30)
+        closes = {
+            'MAIN': pd.Series(np.exp(np.sin(np.arange(30))), index=dates),
+            'PEER': pd.Series(np.exp(np.cos(np.arange(25))), index=dates[5:]).drop(dates[12]),
+            'FLAT': pd.Series(5.0, index=dates),
+        }
+        analyzer = StockAnalyzer()
+        correlations = analyzer.peer_correlations('MAIN', closes)
+        expected = pd.concat([closes['MAIN'].pct_change().dropna(), closes['PEER'].pct_change().dropna()], axis=1, sort=True).dropna().corr().iloc[0, 1]
+        self.assertAlmostEqual(correlations['PEER'], expected, places=12)
+        self.assertIsNone(correlations['FLAT'])
+        matrix = analyzer.correlation_matrix(closes)
+        self.assertAlmostEqual(matrix.loc['PEER', 'MAIN'], matrix.loc['MAIN', 'PEER'], places=12)
+
+    def test_correlations_use_padded_history(self):
+        rng = np.random.default_rng(1)
+        index = pd.bdate_range('2023-01-02', '2024-03-29')
+        base = np.cumsum(rng.normal(size=len(index)))
+        prices = {'AAA': 100 + base, 'BBB': 100 + base + np.cumsum(rng.normal(size=len(index)) * 0.5)}
+        fetcher = lambda ticker, start, end: pd.DataFrame({'Close': prices[ticker]}, index=index).loc[start:end]
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = StockAnalyzer(store=PriceStore(tmp, fetcher))
+            windows = {t: analyzer.get_stock_data(t, datetime(2024, 3, 11), datetime(2024, 3, 21), columns=[])
+                       for t in prices}
+            closes = {t: analyzer.get_history(t, window)['Close'] for t, window in windows.items()}
+        self.assertGreater(len(closes['AAA']), 200)
+        self.assertEqual(closes['AAA'].index[-1], windows['AAA'].index[-1])
+        rolling = analyzer.rolling_correlations('AAA', closes, 60).reindex(windows['AAA'].index)
+        self.assertFalse(rolling['BBB'].isna().any())
+
     def test_get_correlation_category(self):
         analyzer = StockAnalyzer()
         self.assertEqual(analyzer.get_correlation_category(0.8), "High (80.00%)")
@@ -86,5 +234,318 @@ class TestStockAnalyzer(unittest.TestCase):
         self.assertEqual(analyzer.get_correlation_category(None), "N/A")
 
 
+class TestPriceStore(unittest.TestCase):
+
+    @staticmethod
+    def bars(start, end):
+        index = pd.bdate_range(start, end)
+        return pd.DataFrame({'Close': np.arange(len(index), dtype=float) + 10.0}, index=index)
+
+    def test_many_fetches_only_missing_ranges(self):
+        calls = []
+
+        def fetcher(ticker, start, end):
+            calls.append((ticker, start, end))
+            return self.bars(start, end)
+
+        def batch_fetcher(tickers, start, end):
+            calls.append((tuple(tickers), start, end))
+            return {ticker: self.bars(start, end) for ticker in tickers}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PriceStore(tmp, fetcher, batch_fetcher)
+            for ticker in ('AAA', 'BBB'):
+                store.get_history(ticker, '2024-01-01', '2024-01-31')
+            store.get_history('EEE', '2024-01-01', '2024-02-15')
+            calls.clear()
+            frames = store.get_history_many(['AAA', 'BBB', 'CCC', 'DDD', 'EEE'], '2024-01-01', '2024-02-29')
+        # Stored tickers only fetch from their last bar on, new ones the whole range
+        self.assertEqual(calls, [
+            (('AAA', 'BBB'), pd.Timestamp('2024-01-31'), pd.Timestamp('2024-02-29')),
+            (('CCC', 'DDD'), pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-29')),
+        ])
+        # A ticker alone in its range is left to the caller
+        self.assertIsNone(frames.pop('EEE'))
+        for frame in frames.values():
+            self.assertEqual(len(frame), len(pd.bdate_range('2024-01-01', '2024-02-29')))
+
+
+class TestEventWindows(unittest.TestCase):
+
+    def test_offsets_count_trading_days(self):
+        # 2024-01-15 is a market holiday
+        index = pd.bdate_range('2024-01-02', '2024-01-31').drop(pd.Timestamp('2024-01-15'))
+        close = pd.Series(range(len(index)), index=index, dtype=float)
+        windows = event_windows(close, [datetime(2024, 1, 16), datetime(2024, 1, 13)], offsets=[-1, 0, 1])
+        self.assertEqual(windows.loc[datetime(2024, 1, 16)].tolist(), [close['2024-01-12'], close['2024-01-16'], close['2024-01-17']])
+        # A weekend date anchors on the next session
+        self.assertEqual(windows.loc[datetime(2024, 1, 13), 0], close['2024-01-16'])
+
+    def test_out_of_range_offsets_are_nan(self):
+        index = pd.bdate_range('2024-01-02', '2024-01-05')
+        close = pd.Series([1.0, 2.0, 3.0, 4.0], index=index)
+        windows = event_windows(close, [datetime(2024, 1, 2)], offsets=[-1, 0, 5])
+        self.assertTrue(pd.isna(windows.iloc[0, 0]))
+        self.assertEqual(windows.iloc[0, 1], 1.0)
+        self.assertTrue(pd.isna(windows.iloc[0, 2]))
+
+
+class TestIndicators(unittest.TestCase):
+
+    def test_matches_pandas(self):
+        close = pd.Series([10, 12, 15, 14, 13, 16, 18, 17, 19, 21, 20, 22, 25, 24, 23, 26, 28, 27], dtype=float)
+        result = compute_indicators(close, ['RSI', 'MA5', 'EMA9', 'Daily_Return'])
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+        loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
+        expected = {
+            'RSI': 100 - (100 / (1 + gain / loss)),
+            'MA5': close.rolling(window=5).mean(),
+            'EMA9': close.ewm(span=9, adjust=False).mean(),
+            'Daily_Return': close.pct_change(),
+        }
+        for name, series in expected.items():
+            pd.testing.assert_series_equal(pd.Series(result[name]), series, check_names=False)
+
+    def test_panel_matches_single_ticker(self):
+        dates = pd.bdate_range('2024-01-01', periods=40)
+        first = pd.DataFrame({'Close': np.linspace(10, 30, 40)}, index=dates)
+        # Starts later and skips a session the other ticker traded
+        second = pd.DataFrame({'Close': np.sin(np.arange(30)) + 50}, index=dates[10:]).drop(dates[20])
+        names = ['MA5', 'EMA9', 'RSI']
+        frames = add_panel_indicators({'A': first, 'B': second}, names)
+        pd.testing.assert_frame_equal(frames['A'], add_indicators(first.copy(), names))
+        # Windows span only the ticker's own sessions, including after the skipped one
+        pd.testing.assert_frame_equal(frames['B'], add_indicators(second.copy(), names))
+        self.assertTrue(frames['B']['MA5'].iloc[:4].isna().all())
+        after_gap = second.index > dates[20]
+        self.assertAlmostEqual(frames['B']['MA5'][after_gap].iloc[0], second['Close'][second.index <= dates[21]].iloc[-5:].mean())
+
+    def test_streaming_state_matches_batch(self):
+        dates = pd.bdate_range('2024-01-01', periods=60)
+        data = pd.DataFrame({'Close': np.cos(np.arange(60) / 3) * 5 + 50}, index=dates)
+        names = ['MA10', 'EMA12', 'RSI', 'MACD', 'Historical_Vol']
+        expected = add_indicators(data.copy(), names)
+        state = IndicatorState(names).seed(data.iloc[:40])
+        # The state survives a save and load between the two halves
+        state = IndicatorState.from_arrays(state.to_arrays())
+        rows = state.advance(data)
+        self.assertEqual(list(rows.index), list(dates[40:]))
+        pd.testing.assert_frame_equal(rows, expected[names].iloc[40:])
+
+    def test_state_saved_beside_prices(self):
+        dates = pd.bdate_range('2024-01-01', periods=60)
+        data = pd.DataFrame({'Close': np.cos(np.arange(60) / 3) * 5 + 50}, index=dates)
+        names = ['MA10', 'EMA12', 'RSI']
+        with tempfile.TemporaryDirectory() as tmp:
+            store = IndicatorStateStore(tmp)
+            state = store.seeded('AMD', names, data.iloc[:40])
+            # A later run over the same sessions reloads the saved state instead of seeding
+            with patch.object(IndicatorState, 'seed') as seed:
+                reloaded = store.seeded('AMD', names, data.iloc[:40])
+            seed.assert_not_called()
+            self.assertEqual(reloaded.last_date, state.last_date)
+            self.assertIsNone(store.get('AMD', ['MA10']))
+            pd.testing.assert_frame_equal(reloaded.advance(data), state.advance(data))
+
+    def test_forming_bar_is_replaced(self):
+        today = pd.Timestamp.today().normalize()
+        dates = pd.bdate_range(end=today - timedelta(days=1), periods=39).append(pd.DatetimeIndex([today]))
+        data = pd.DataFrame({'Close': np.cos(np.arange(40) / 3) * 5 + 50}, index=dates)
+        names = ['MA10', 'EMA12', 'RSI']
+        state = IndicatorState(names).seed(data.iloc[:30])
+        partial = data.iloc[30:].copy()
+        partial.iloc[-1, 0] = 10.0
+        shown = state.append(data.iloc[:30], partial)
+        # Today's partial close is shown but not taken into the state
+        self.assertEqual(shown['Close'].iloc[-1], 10.0)
+        self.assertEqual(state.last_date, dates[-2])
+        final = state.append(shown, data.iloc[-2:])
+        pd.testing.assert_frame_equal(final[names].iloc[30:], add_indicators(data.copy(), names)[names].iloc[30:])
+
+
+class TestCorrelation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = rng.normal(size=120)
+        self.y = 0.5 * self.x + rng.normal(size=120)
+        self.x[30] = np.nan
+
+    def test_rolling_matches_pandas(self):
+        expected = pd.Series(self.x).rolling(20).corr(pd.Series(self.y))
+        np.testing.assert_allclose(rolling_correlation(self.x, self.y, 20), expected, atol=1e-12)
+
+    def test_split_around_event(self):
+        pre, post = split_correlation(self.x, self.y, [60], days=40)
+        frame = pd.DataFrame({'x': self.x, 'y': self.y})
+        self.assertAlmostEqual(pre[0], frame.iloc[20:60].corr().iloc[0, 1], places=12)
+        self.assertAlmostEqual(post[0], frame.iloc[60:100].corr().iloc[0, 1], places=12)
+        pre, post = split_correlation(self.x, self.y, [60])
+        self.assertAlmostEqual(pre[0], frame.iloc[:60].corr().iloc[0, 1], places=12)
+        self.assertAlmostEqual(post[0], frame.iloc[60:].corr().iloc[0, 1], places=12)
+
+
+class TestImpliedVolatility(unittest.TestCase):
+
+    def test_recovers_volatility(self):
+        strikes = np.array([60.0, 90.0, 100.0, 110.0, 160.0])
+        sigmas = np.array([0.2, 0.35, 0.5, 0.8, 1.5])
+        is_call = np.array([True, False, True, False, True])
+        prices = bs_price(100.0, strikes, 0.5, 0.04, sigmas, is_call)
+        np.testing.assert_allclose(implied_volatility(prices, 100.0, strikes, 0.5, 0.04, is_call), sigmas, rtol=1e-6)
+        # Below intrinsic value and above the stock price there is no solution
+        self.assertTrue(np.isnan(implied_volatility([1.0, 150.0], 100.0, 60.0, 0.5)).all())
+
+    def test_solve_from_quotes_replaces_stale_vendor_iv(self):
+        as_of = pd.Timestamp('2024-06-03 12:00', tz='America/New_York')
+        mid = bs_price(100.0, 100.0, (pd.Timestamp('2024-06-21 16:00', tz='America/New_York') - as_of) / pd.Timedelta(days=365), 0.04, 0.3, True)
+        calls = pd.DataFrame({'strike': [100.0], 'bid': [mid - 0.05], 'ask': [mid + 0.05], 'lastPrice': [1.0], 'impliedVolatility': [0.0]})
+        solved = solve_options(calls, 100.0, '2024-06-21', True, 0.04, as_of)
+        self.assertAlmostEqual(solved['impliedVolatility'].iloc[0], 0.3, places=6)
+        self.assertEqual(calls['impliedVolatility'].iloc[0], 0.0)
+
+    def test_greeks_match_finite_differences(self):
+        as_of = pd.Timestamp('2024-06-03 16:00', tz='America/New_York')
+        puts = pd.DataFrame({'strike': [90.0, 100.0, 110.0], 'impliedVolatility': [0.4, 0.3, 0.25]})
+        greeks = add_greeks(puts, 100.0, '2024-09-03', False, 0.04, as_of)
+        years = 92 / 365
+        sigma = puts['impliedVolatility'].to_numpy()
+        price = lambda spot, t=years, vol=sigma: bs_price(spot, puts['strike'].to_numpy(), t, 0.04, vol, False)
+        np.testing.assert_allclose(greeks['delta'], (price(100.01) - price(99.99)) / 0.02, atol=1e-6)
+        np.testing.assert_allclose(greeks['gamma'], (price(100.01) - 2 * price(100.0) + price(99.99)) / 1e-4, atol=1e-4)
+        np.testing.assert_allclose(greeks['vega'], (price(100.0, vol=sigma + 1e-4) - price(100.0, vol=sigma - 1e-4)) / 2e-4 / 100, atol=1e-6)
+        np.testing.assert_allclose(greeks['theta'], -(price(100.0, years + 1e-4) - price(100.0, years - 1e-4)) / 2e-4 / 365, atol=1e-6)
+
+
+class FakeSnapshot:
+    """Chains priced at a flat volatility, standing in for TickerSnapshot"""
+
+    def __init__(self, expirations, sigma=0.3, spot=100.0):
+        self.expirations = expirations
+        self.current_price = spot
+        self.sigma = sigma
+
+    def solved_chain(self, expiration):
+        strikes = np.arange(70.0, 131.0, 5.0)
+        years = years_to_expiry(expiration)
+        sides = [pd.DataFrame({'strike': strikes, 'impliedVolatility': self.sigma,
+                               'lastPrice': bs_price(self.current_price, strikes, years, 0.04, self.sigma, is_call)})
+                 for is_call in (True, False)]
+        return OptionChain(*sides)
+
+
+class TestIVSnapshot(unittest.TestCase):
+
+    def test_flat_surface(self):
+        today = pd.Timestamp.today().normalize()
+        expirations = [(today + timedelta(days=d)).strftime('%Y-%m-%d') for d in (20, 45, 100, 200)]
+        values = measure_iv(FakeSnapshot(expirations))
+        for field in ('atm_iv', 'iv_30d', 'iv_60d', 'iv_90d', 'iv_180d'):
+            self.assertAlmostEqual(values[field], 0.3, places=9)
+        self.assertAlmostEqual(values['skew_25d'], 0.0, places=9)
+
+    def test_no_options(self):
+        self.assertTrue(np.isnan(measure_iv(FakeSnapshot([]))['atm_iv']))
+
+    def test_current_reads_one_chain(self):
+        today = pd.Timestamp.today().normalize()
+        snapshot = FakeSnapshot([(today + timedelta(days=d)).strftime('%Y-%m-%d') for d in (20, 45, 100, 200)])
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(FakeSnapshot, 'solved_chain', autospec=True, side_effect=FakeSnapshot.solved_chain) as chains:
+            table = IVTable(tmp)
+            self.assertAlmostEqual(table.current('AMD', snapshot), 0.3, places=9)
+            self.assertEqual(chains.call_count, 1)
+            self.assertAlmostEqual(table.get('AMD', iv_table.session_date()), 0.3, places=9)
+
+    def test_no_options_remembered_for_the_session(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            table = IVTable(tmp)
+            self.assertIsNone(table.current('XYZ', FakeSnapshot([])))
+            with patch('iv_table.TickerSnapshot') as fetch:
+                self.assertIsNone(table.current('XYZ'))
+            fetch.assert_not_called()
+
+
+class TestIVSurface(unittest.TestCase):
+
+    def setUp(self):
+        today = pd.Timestamp.today().normalize()
+        self.expirations = [(today + timedelta(days=d)).strftime('%Y-%m-%d') for d in (10, 20, 45, 100)]
+        self.earnings = today + timedelta(days=15)
+
+    def test_event_move_from_term_structure(self):
+        # The expiration after earnings carries extra variance for the event
+        snapshot = FakeSnapshot(self.expirations)
+        snapshot.solved_chain = lambda expiration, chain=snapshot.solved_chain: (
+            FakeSnapshot([], sigma=0.5).solved_chain(expiration) if expiration == self.expirations[1]
+            else chain(expiration))
+        surface = build_surface(snapshot)
+        years = surface.years
+        self.assertAlmostEqual(surface.iv(100.0, years[2]), 0.3, places=9)
+        self.assertEqual(surface.expiration_after(self.earnings), self.expirations[1])
+        self.assertAlmostEqual(surface.expected_move(self.earnings), 100.0 * 0.5 * np.sqrt(years[1]), places=9)
+        self.assertAlmostEqual(surface.event_move(self.earnings),
+                               np.sqrt(0.25 * years[1] - 0.09 * years[0]), places=9)
+
+    def test_built_once_per_session(self):
+        cache = SurfaceCache()
+        snapshot = FakeSnapshot(self.expirations)
+        with patch('iv_surface.build_surface', wraps=build_surface) as build:
+            first = cache.get('TEST', snapshot)
+            self.assertIs(cache.get('TEST', snapshot), first)
+            self.assertIs(cache.cached('test'), first)
+        self.assertEqual(build.call_count, 1)
+
+    def test_failed_build_is_not_kept(self):
+        cache = SurfaceCache()
+        self.assertIsNone(cache.get('TEST', FakeSnapshot([])))
+        self.assertIsNone(cache.cached('TEST'))
+        self.assertIsNotNone(cache.get('TEST', FakeSnapshot(self.expirations)))
+
+    def test_surfaces_are_bounded(self):
+        cache = SurfaceCache(max_entries=2)
+        snapshot = FakeSnapshot(self.expirations)
+        for ticker in ('AAA', 'BBB', 'AAA', 'CCC'):
+            cache.get(ticker, snapshot)
+        # BBB was the least recently used
+        self.assertEqual(list(cache._surfaces), ['AAA', 'CCC'])
+
+
+class TestOptionChainCache(unittest.TestCase):
+
+    def test_expirations_are_bounded(self):
+        cache = OptionChainCache(max_entries=2)
+        stock = type('Stock', (), {'options': ('2099-01-15',)})()
+        for ticker in ('AAA', 'BBB', 'AAA', 'CCC'):
+            cache.get_expirations(ticker, stock)
+        # BBB was the least recently used
+        self.assertEqual(list(cache._expirations), ['AAA', 'CCC'])
+
+
+class TestVirtualTable(unittest.TestCase):
+
+    def test_rows_formatted_on_demand(self):
+        calls = {'n': 0}
+
+        def price(value):
+            calls['n'] += 1
+            return f"${value:.2f}"
+
+        model = TableModel(pd.DataFrame({'strike': np.arange(10000.0), 'iv': np.nan}),
+                           formats={'strike': price}, tags=['itm'] * 10000)
+        self.assertEqual(len(model), 10000)
+        self.assertEqual(calls['n'], 0)
+        self.assertEqual(model.row(42), ['$42.00', 'N/A'])
+        self.assertEqual(model.tags(42), ('itm',))
+        self.assertEqual(calls['n'], 1)
+
+    def test_scroll_offset_stays_in_range(self):
+        self.assertEqual(scroll_offset(0, 1000, 20, 'moveto', '0.5'), 500)
+        self.assertEqual(scroll_offset(975, 1000, 20, 'scroll', '1', 'pages'), 980)
+        self.assertEqual(scroll_offset(3, 1000, 20, 'scroll', '-5', 'units'), 0)
+        self.assertEqual(scroll_offset(0, 5, 20, 'moveto', '1'), 0)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
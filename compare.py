@@ -7,17 +7,12 @@ from tkinter import ttk, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from typing import Dict, Optional
+from earnings_calendar import get_default_calendar
 
 class StockAnalyzer:
     def get_earnings_dates(self, ticker: str) -> list:
-        try:
-            stock = yf.Ticker(ticker)
-            calendar = stock.calendar
-            if calendar is not None and not calendar.empty:
-                return [calendar.index[0]]  # Return the next earnings date
-            return []
-        except Exception:
-            return []
+        next_date = get_default_calendar().next_earnings_date(ticker)
+        return [next_date] if next_date is not None else []  # Return the next earnings date
 
     def analyze_earnings_impact(self, ticker: str, er_date: datetime, window_days: int) -> Optional[Dict]:
         try:
@@ -0,0 +1,155 @@
+from typing import Dict, Hashable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicators import _window_sums
+
+
+def _center(values: np.ndarray) -> np.ndarray:
+    """Values less each column's mean, which keeps running sums small; NaN stays NaN"""
+    valid = ~np.isnan(values)
+    means = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    return values - means
+
+
+def _corr_from_sums(n, sx, sy, sxx, syy, sxy):
+    """Pearson correlation from running sums, NaN where a side has no variance"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sxy - sx * sy / n
+        vx = sxx - sx * sx / n
+        vy = syy - sy * sy / n
+        corr = covariance / np.sqrt(vx * vy)
+    # A variance that only survives as rounding noise counts as none
+    flat = (vx <= 1e-14 * sxx) | (vy <= 1e-14 * syy)
+    return np.where(flat, np.nan, np.clip(corr, -1.0, 1.0))
+
+
+def return_panel(closes: Dict[Hashable, pd.Series]) -> pd.DataFrame:
+    """Daily returns of each series on its own bars, lined up once on the union of dates (dates x tickers)"""
+    returns = {ticker: close.pct_change().dropna() for ticker, close in closes.items()
+               if close is not None and len(close) >= 2}
+    if not returns:
+        return pd.DataFrame(columns=list(closes), dtype=float)
+    return pd.concat(returns, axis=1, sort=True).reindex(columns=list(closes)).astype(float)
+
+
+def correlation_matrix(closes: Dict[Hashable, pd.Series], min_periods: int = 2) -> pd.DataFrame:
+    """Correlation of every pair of return series, in a few matrix products.
+
+    Each pair uses only the dates both series have a return for, the same
+    result as ``concat([r1, r2], axis=1).dropna().corr()`` for every pair,
+    without re-aligning the data once per pair. Pairs with fewer than
+    ``min_periods`` shared returns, or with a constant series, are NaN.
+    """
+    panel = return_panel(closes)
+    values = panel.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    mask = valid.astype(float)
+    x = np.where(valid, _center(values), 0.0)
+
+    # For columns i and j over the rows both are valid: counts, sums of x_i, sums of x_i^2, sums of x_i*x_j
+    counts = mask.T @ mask
+    sums = x.T @ mask
+    squares = (x * x).T @ mask
+    corr = _corr_from_sums(counts, sums, sums.T, squares, squares.T, x.T @ x)
+    corr[counts < min_periods] = np.nan
+    return pd.DataFrame(corr, index=panel.columns, columns=panel.columns)
+
+
+def correlation_row(closes: Dict[Hashable, pd.Series], main: Hashable,
+                    min_periods: int = 2) -> Dict[Hashable, Optional[float]]:
+    """Correlation of every other series with ``main``, None where it is undefined"""
+    if main not in closes:
+        return {ticker: None for ticker in closes if ticker != main}
+    row = correlation_matrix(closes, min_periods).loc[main]
+    return {ticker: None if pd.isna(value) else float(value)
+            for ticker, value in row.items() if ticker != main}
+
+
+def _pair(x, y):
+    """Broadcast two return arrays and blank every row where either one is missing"""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if y.ndim == 1 and x.ndim == 2:
+        y = y[:, None]
+    x, y = np.broadcast_arrays(x, y)
+    missing = np.isnan(x) | np.isnan(y)
+    return np.where(missing, np.nan, x), np.where(missing, np.nan, y)
+
+
+def rolling_correlation(x, y, window: int) -> np.ndarray:
+    """Correlation over each trailing ``window`` rows (like rolling(window).corr()).
+
+    ``x`` may be a dates x tickers matrix and ``y`` a single column, giving
+    every ticker's rolling correlation with ``y`` in one pass. The window
+    sums come from running totals, so each step costs O(1) whatever the
+    window length; a window missing any value is NaN.
+    """
+    x, y = _pair(x, y)
+    out = np.full(x.shape, np.nan)
+    if window < 2 or len(x) < window:
+        return out
+    x, y = _center(x), _center(y)
+    sx, gaps = _window_sums(x, window)
+    sy, _ = _window_sums(y, window)
+    sxx, _ = _window_sums(x * x, window)
+    syy, _ = _window_sums(y * y, window)
+    sxy, _ = _window_sums(x * y, window)
+    corr = _corr_from_sums(window, sx, sy, sxx, syy, sxy)
+    if gaps is not None:
+        corr[gaps] = np.nan
+    out[window - 1:] = corr
+    return out
+
+
+def split_correlation(x, y, splits: Iterable[int], days: Optional[int] = None, min_periods: int = 2):
+    """Correlation before and from each split row, as two arrays (one row per split).
+
+    The rows before a split and the rows from it on are read off cumulative
+    sums, so each split costs O(1). ``days`` limits both sides to that many
+    rows next to the split; rows missing either value are left out.
+    """
+    x, y = _pair(x, y)
+    valid = ~np.isnan(x)
+    x, y = np.where(valid, _center(x), 0.0), np.where(valid, _center(y), 0.0)
+
+    zero = np.zeros((1,) + x.shape[1:])
+    sums = [np.concatenate([zero, np.cumsum(v, axis=0)]) for v in (valid.astype(float), x, y, x * x, y * y, x * y)]
+    splits = np.clip(np.asarray(list(splits), dtype=int), 0, len(x))
+    start = np.zeros_like(splits) if days is None else np.maximum(splits - days, 0)
+    stop = np.full_like(splits, len(x)) if days is None else np.minimum(splits + days, len(x))
+
+    def between(lo, hi):
+        parts = [total[hi] - total[lo] for total in sums]
+        corr = _corr_from_sums(*parts)
+        return np.where(parts[0] >= min_periods, corr, np.nan)
+
+    return between(start, splits), between(splits, stop)
+
+
+def rolling_peer_correlation(closes: Dict[Hashable, pd.Series], main: Hashable,
+                             window: int) -> pd.DataFrame:
+    """Rolling correlation of each other ticker's returns with ``main``'s (dates x peers)"""
+    panel = return_panel(closes)
+    peers = [ticker for ticker in panel.columns if ticker != main]
+    if main not in panel.columns or not peers:
+        return pd.DataFrame(index=panel.index, columns=peers, dtype=float)
+    values = rolling_correlation(panel[peers].to_numpy(), panel[[main]].to_numpy(), window)
+    return pd.DataFrame(values, index=panel.index, columns=peers)
+
+
+def event_correlation(closes: Dict[Hashable, pd.Series], main: Hashable, event_date,
+                      days: Optional[int] = None) -> pd.DataFrame:
+    """Correlation of each other ticker with ``main`` before and after an event (peers x Pre/Post).
+
+    Returns dated before ``event_date`` fall in the pre-event side, the rest
+    in the post-event side; ``days`` limits each side to that many sessions.
+    """
+    panel = return_panel(closes)
+    peers = [ticker for ticker in panel.columns if ticker != main]
+    if main not in panel.columns or not peers:
+        return pd.DataFrame(index=peers, columns=['Pre', 'Post'], dtype=float)
+    index = panel.index.tz_localize(None) if getattr(panel.index, 'tz', None) is not None else panel.index
+    split = index.searchsorted(pd.Timestamp(event_date).tz_localize(None))
+    pre, post = split_correlation(panel[peers].to_numpy(), panel[[main]].to_numpy(), [split], days)
+    return pd.DataFrame({'Pre': pre[0], 'Post': post[0]}, index=peers)
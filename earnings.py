@@ -1,57 +1,35 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime, timedelta
-from docx import Document
-from docx.shared import Inches
-import os
-from typing import List, Dict, Optional
+from datetime import datetime
+from typing import List, Optional
 import warnings
+from price_store import PriceStore, get_default_store
+from earnings_calendar import EarningsCalendar, get_default_calendar
+from option_cache import get_default_chain_cache
+from task_runner import TaskRunner
+from event_window import event_windows
+from virtual_table import VirtualTable
+from indicators import sma
 warnings.filterwarnings('ignore')
 
 class UnifiedAnalyzer:
-    def __init__(self):
-        pass
+    def __init__(self, store: Optional[PriceStore] = None, calendar: Optional[EarningsCalendar] = None):
+        self.store = store or get_default_store()
+        self.calendar = calendar or get_default_calendar()
         
     def get_earnings_dates(self, ticker: str) -> List[datetime]:
-        stock = yf.Ticker(ticker)
-        try:
-            # First try: Get earnings from quarterly earnings data
-            earnings = stock.quarterly_earnings
-            if earnings is not None and not earnings.empty:
-                return sorted(earnings.index, reverse=True)[:12]
-            
-            # Second try: Get earnings from earnings calendar
-            calendar = stock.earnings_dates
-            if calendar is not None and not calendar.empty:
-                return sorted(calendar.index, reverse=True)[:12]
-            
-            # Third try: Get earnings from quarterly financials
-            financials = stock.quarterly_financials
-            if financials is not None and not financials.empty:
-                return sorted(financials.columns, reverse=True)[:12]
-            
-            # Fourth try: Get earnings history
-            history = stock.earnings_history
-            if history is not None and not history.empty:
-                return sorted(history.index, reverse=True)[:12]
-            
+        dates = self.calendar.get_earnings_dates(ticker, limit=12)
+        if not dates:
             print(f"No earnings data found for {ticker}")
-            return []
-            
-        except Exception as e:
-            print(f"Error getting earnings dates for {ticker}: {e}")
-            return []
+        return dates
         
     def get_stock_data(self, ticker: str, start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
-        stock = yf.Ticker(ticker)
         try:
             # Get 3 years of data to ensure we have enough history
-            return stock.history(period="3y")
+            today = pd.Timestamp.today().normalize()
+            return self.store.get_history(ticker, today - pd.DateOffset(years=3), today)
         except Exception as e:
             print(f"Error getting stock data: {e}")
             return None
@@ -72,6 +50,18 @@ class UnifiedAnalyzerGUI:
         # Create and setup tabs
         self.setup_tabs()
         
+        # Status bar for background work
+        status_frame = ttk.Frame(self.main_container)
+        status_frame.pack(fill='x')
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(status_frame, textvariable=self.status_var).pack(side='left', padx=5)
+        ttk.Button(status_frame, text="Cancel", 
+                  command=self.cancel_task).pack(side='right', padx=5)
+        
+        # Fetches run off the Tk thread, one analysis at a time
+        self.runner = TaskRunner(self.root)
+        self.task = None
+        
     def setup_tabs(self):
         # Create notebook
         self.notebook = ttk.Notebook(self.main_container)
@@ -147,39 +137,70 @@ class UnifiedAnalyzerGUI:
         self.price_results = ttk.LabelFrame(self.price_tab, text="Results", padding="5")
         self.price_results.pack(fill='both', expand=True, padx=5, pady=5)
 
+    def start_task(self, job, *args, on_done):
+        """Run job(task, *args) in the background, replacing any analysis still running"""
+        if self.task is not None:
+            self.task.cancel()
+        self.status_var.set("Loading...")
+        self.task = self.runner.submit(job, *args,
+                                       on_done=lambda result: self.finish_task(on_done, result),
+                                       on_error=self.show_task_error,
+                                       on_progress=lambda message, fraction: self.status_var.set(message))
+
+    def finish_task(self, on_done, result):
+        self.status_var.set("Ready")
+        on_done(result)
+
+    def show_task_error(self, e):
+        self.status_var.set("Error")
+        messagebox.showerror("Error", str(e))
+
+    def cancel_task(self):
+        if self.task is not None and not self.task.done:
+            self.task.cancel()
+            self.status_var.set("Cancelled")
+
     def run_earnings_analysis(self):
         ticker = self.earnings_ticker.get().strip().upper()
         if not ticker:
             messagebox.showerror("Error", "Please enter a ticker symbol")
             return
             
+        # Clear previous results
+        for widget in self.earnings_results.winfo_children():
+            widget.destroy()
+        self.start_task(self.load_earnings_data, ticker,
+                        on_done=lambda loaded: self.show_earnings_analysis(*loaded))
+
+    def load_earnings_data(self, task, ticker: str):
+        """Background job: earnings dates and the full price history"""
+        # Get earnings dates
+        dates = self.analyzer.get_earnings_dates(ticker)
+        if not dates:
+            return dates, None
+        
+        # Get historical data
+        task.report(f"Loading price history for {ticker}...")
+        return dates, self.analyzer.store.get_full_history(ticker)  # Get maximum available history
+
+    def show_earnings_analysis(self, dates: List[datetime], data: Optional[pd.DataFrame]):
         try:
-            # Clear previous results
-            for widget in self.earnings_results.winfo_children():
-                widget.destroy()
-                
-            # Get earnings dates
-            dates = self.analyzer.get_earnings_dates(ticker)
             if not dates:
                 messagebox.showwarning("Warning", "No earnings dates found")
                 return
                 
-            # Get historical data
-            stock = yf.Ticker(ticker)
-            data = stock.history(period="max")  # Get maximum available history
-            
-            if data.empty:
+            if data is None or data.empty:
                 messagebox.showerror("Error", "Could not retrieve stock data")
                 return
                 
-            # Create treeview with more detailed price columns
-            tree = ttk.Treeview(self.earnings_results, columns=(
+            # Create table with more detailed price columns
+            table = VirtualTable(self.earnings_results, columns=(
                 "Date", "Pre-5d", "Pre-3d", "Pre-1d", 
                 "Post-1d", "Post-3d", "Post-5d", "Change"
             ))
+            tree = table.tree
             
-            # Configure column headings and hide default first column
-            tree["show"] = "headings"
+            # Configure column headings
             tree.heading("Date", text="ER Date")
             tree.heading("Pre-5d", text="5d Before")
             tree.heading("Pre-3d", text="3d Before")
@@ -193,47 +214,27 @@ class UnifiedAnalyzerGUI:
             for col in tree["columns"]:
                 tree.column(col, width=100)
             
-            tree.pack(fill='both', expand=True)
+            table.pack(fill='both', expand=True)
             
-            # Add scrollbar
-            scrollbar = ttk.Scrollbar(self.earnings_results, orient="vertical", command=tree.yview)
-            scrollbar.pack(side='right', fill='y')
-            tree.configure(yscrollcommand=scrollbar.set)
+            # Closes 5 trading days before and after every earnings date in one pass;
+            # offset 0 is the first session on or after the report
+            windows = event_windows(data['Close'], dates, offsets=[-5, -3, -1, 1, 3, 5])
             
-            # Process each earnings date
-            for date in dates:
-                try:
-                    # Get 5 days before and after earnings
-                    start_date = date - timedelta(days=7)
-                    end_date = date + timedelta(days=7)
-                    
-                    mask = (data.index >= start_date) & (data.index <= end_date)
-                    period_data = data[mask]
-                    
-                    if len(period_data) >= 6:
-                        pre_5d = period_data['Close'].iloc[0]
-                        pre_3d = period_data['Close'].iloc[1]
-                        pre_1d = period_data['Close'].iloc[2]
-                        post_1d = period_data['Close'].iloc[3]
-                        post_3d = period_data['Close'].iloc[4]
-                        post_5d = period_data['Close'].iloc[5]
-                        
-                        change = ((post_5d - pre_5d) / pre_5d) * 100
-                        
-                        tree.insert("", "end", values=(
-                            date.strftime("%Y-%m-%d"),
-                            f"${pre_5d:.2f}",
-                            f"${pre_3d:.2f}",
-                            f"${pre_1d:.2f}",
-                            f"${post_1d:.2f}",
-                            f"${post_3d:.2f}",
-                            f"${post_5d:.2f}",
-                            f"{change:.2f}%"
-                        ))
-                        
-                except Exception as e:
-                    print(f"Error processing date {date}: {e}")
-                    continue
+            # Dates missing any of the closes are left out; rows are formatted as they scroll into view
+            complete = ~np.isnan(windows.to_numpy()).any(axis=1)
+            windows = windows[complete]
+            results = pd.DataFrame({
+                "Date": [date.strftime("%Y-%m-%d") for date, keep in zip(dates, complete) if keep],
+                "Pre-5d": windows[-5].to_numpy(), "Pre-3d": windows[-3].to_numpy(), "Pre-1d": windows[-1].to_numpy(),
+                "Post-1d": windows[1].to_numpy(), "Post-3d": windows[3].to_numpy(), "Post-5d": windows[5].to_numpy(),
+            })
+            results["Change"] = (results["Post-5d"] - results["Pre-5d"]) / results["Pre-5d"] * 100
+            price = "${:.2f}"
+            table.set_data(results, formats={
+                "Pre-5d": price, "Pre-3d": price, "Pre-1d": price,
+                "Post-1d": price, "Post-3d": price, "Post-5d": price,
+                "Change": "{:.2f}%"
+            })
                     
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -244,14 +245,26 @@ class UnifiedAnalyzerGUI:
             messagebox.showerror("Error", "Please enter a ticker symbol")
             return
             
+        # Clear previous results
+        for widget in self.options_results.winfo_children():
+            widget.destroy()
+        self.start_task(self.load_options_data, ticker,
+                        on_done=lambda loaded: self.show_options_analysis(*loaded))
+
+    def load_options_data(self, task, ticker: str):
+        """Background job: expirations and the nearest option chain"""
+        import yfinance as yf
+        stock = yf.Ticker(ticker)
+        chain_cache = get_default_chain_cache()
+        options = chain_cache.get_expirations(ticker, stock)
+        if not options:
+            return options, None
+        
+        # Get first expiration date's options
+        return options, chain_cache.get_chain(ticker, options[0], stock)
+
+    def show_options_analysis(self, options, chain):
         try:
-            # Clear previous results
-            for widget in self.options_results.winfo_children():
-                widget.destroy()
-                
-            stock = yf.Ticker(ticker)
-            options = stock.options
-            
             if not options:
                 messagebox.showwarning("Warning", "No options data available")
                 return
@@ -273,9 +286,6 @@ class UnifiedAnalyzerGUI:
             
             tree.pack(fill='both', expand=True)
             
-            # Get first expiration date's options
-            chain = stock.option_chain(options[0])
-            
             # Display first 10 strikes
             for i in range(min(10, len(chain.calls))):
                 call = chain.calls.iloc[i]
@@ -297,20 +307,25 @@ class UnifiedAnalyzerGUI:
             messagebox.showerror("Error", "Please enter a ticker symbol")
             return
             
+        # Clear previous results
+        for widget in self.price_results.winfo_children():
+            widget.destroy()
+        self.start_task(self.load_price_history, ticker,
+                        on_done=self.show_price_analysis)
+
+    def load_price_history(self, task, ticker: str) -> pd.DataFrame:
+        """Background job: the last year of prices"""
+        import yfinance as yf
+        return yf.Ticker(ticker).history(period="1y")
+
+    def show_price_analysis(self, hist: pd.DataFrame):
         try:
-            # Clear previous results
-            for widget in self.price_results.winfo_children():
-                widget.destroy()
-                
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="1y")
-            
             # Calculate key levels
             current_price = hist['Close'].iloc[-1]
             high_52w = hist['High'].max()
             low_52w = hist['Low'].min()
-            ma_50 = hist['Close'].rolling(window=50).mean().iloc[-1]
-            ma_200 = hist['Close'].rolling(window=200).mean().iloc[-1]
+            ma_50 = sma(hist['Close'].to_numpy(), 50)[-1]
+            ma_200 = sma(hist['Close'].to_numpy(), 200)[-1]
             
             # Create result frame
             result_frame = ttk.Frame(self.price_results)
@@ -328,6 +343,7 @@ class UnifiedAnalyzerGUI:
 
     def run(self):
         self.root.mainloop()
+        self.runner.shutdown()
 
 if __name__ == "__main__":
     app = UnifiedAnalyzerGUI()
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+DEFAULT_CALENDAR_DIR = Path('zmtech_finance/data/earnings')
+# Companies report quarterly; when the source lists no upcoming date the
+# ticker is looked up again one quarter after its latest report
+REPORT_CADENCE = timedelta(days=91)
+# How long a ticker no source has dates for is left before asking again
+MISSING_TTL = timedelta(days=7)
+
+
+def _as_dates(values) -> List[pd.Timestamp]:
+    """Turn index or column labels into timezone-naive report dates"""
+    dates = pd.to_datetime(pd.Index(list(values)), errors='coerce')
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return sorted(set(dates.dropna().normalize()))
+
+
+def _frame_dates(frame, axis: str = 'index') -> List[pd.Timestamp]:
+    if not isinstance(frame, pd.DataFrame) or frame.empty:
+        return []
+    return _as_dates(frame.columns if axis == 'columns' else frame.index)
+
+
+def _from_earnings_dates(stock) -> List[pd.Timestamp]:
+    return _frame_dates(stock.earnings_dates)
+
+
+def _from_quarterly_earnings(stock) -> List[pd.Timestamp]:
+    return _frame_dates(stock.quarterly_earnings)
+
+
+def _from_quarterly_financials(stock) -> List[pd.Timestamp]:
+    return _frame_dates(stock.quarterly_financials, axis='columns')
+
+
+def _from_earnings_history(stock) -> List[pd.Timestamp]:
+    return _frame_dates(stock.earnings_history)
+
+
+def _from_calendar(stock) -> List[pd.Timestamp]:
+    calendar = stock.calendar
+    if isinstance(calendar, dict):
+        dates = calendar.get('Earnings Date') or []
+        return _as_dates(dates if isinstance(dates, (list, tuple)) else [dates])
+    return _frame_dates(calendar)
+
+
+# Tried in this order for a ticker with no remembered source
+SOURCES: Dict[str, Callable] = {
+    'earnings_dates': _from_earnings_dates,
+    'quarterly_earnings': _from_quarterly_earnings,
+    'quarterly_financials': _from_quarterly_financials,
+    'earnings_history': _from_earnings_history,
+    'calendar': _from_calendar,
+}
+
+
+class EarningsCalendar:
+    """Per-ticker earnings dates cached on disk between sessions.
+
+    Each ticker's dates are kept with the source that produced them and are
+    only looked up again once the next listed report date has passed (one
+    quarter after the latest report when none is listed). A refresh tries
+    the remembered source first and falls back to the others only if it
+    comes back empty; a ticker no source has dates for is remembered as
+    such for ``MISSING_TTL``.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir or os.environ.get('ZMTECH_EARNINGS_CACHE', DEFAULT_CALENDAR_DIR))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str) -> Path:
+        return self.cache_dir / f"{ticker.replace('/', '_')}.json"
+
+    def _read(self, ticker: str) -> Optional[Dict]:
+        if ticker in self._entries:
+            return self._entries[ticker]
+        path = self._path(ticker)
+        if not path.exists():
+            return None
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except Exception as e:
+            print(f"Error reading cached earnings dates for {ticker}: {e}")
+            return None
+        self._entries[ticker] = entry
+        return entry
+
+    def _write(self, ticker: str, entry: Dict):
+        path = self._path(ticker)
+        tmp_path = path.with_name(path.stem + '.tmp.json')
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_path, path)
+        self._entries[ticker] = entry
+
+    def _is_fresh(self, entry: Dict, today: pd.Timestamp) -> bool:
+        return today <= pd.Timestamp(entry['recheck_after'])
+
+    def _recheck_after(self, dates: List[pd.Timestamp], today: pd.Timestamp) -> pd.Timestamp:
+        """First listed report after today, otherwise one quarter after the latest"""
+        upcoming = [d for d in dates if d > today]
+        if upcoming:
+            return upcoming[0]
+        return max(dates[-1] + REPORT_CADENCE, today)
+
+    def _resolve(self, ticker: str, preferred: Optional[str]):
+        """Query the sources, remembered one first, and return (source, dates)"""
+        import yfinance as yf
+        stock = yf.Ticker(ticker)
+        order = [preferred] if preferred in SOURCES else []
+        order += [name for name in SOURCES if name != preferred]
+        for name in order:
+            try:
+                dates = SOURCES[name](stock)
+            except Exception as e:
+                print(f"Earnings source {name} failed for {ticker}: {e}")
+                continue
+            if dates:
+                return name, dates
+        return None, []
+
+    def get_dates(self, ticker: str) -> List[pd.Timestamp]:
+        """All known report dates for a ticker, oldest first"""
+        ticker = ticker.upper()
+        today = pd.Timestamp.today().normalize()
+        with self._lock:
+            entry = self._read(ticker)
+        if entry is not None and self._is_fresh(entry, today):
+            return [pd.Timestamp(d) for d in entry['dates']]
+
+        source, dates = self._resolve(ticker, entry['source'] if entry else None)
+        if dates:
+            recheck_after = self._recheck_after(dates, today)
+        else:
+            # Keep serving stale dates rather than nothing, and leave the
+            # sources alone for a while either way
+            source = entry['source'] if entry else None
+            dates = [pd.Timestamp(d) for d in entry['dates']] if entry else []
+            recheck_after = today + MISSING_TTL
+
+        with self._lock:
+            self._write(ticker, {
+                'source': source,
+                'fetched_at': datetime.now().isoformat(timespec='seconds'),
+                'recheck_after': recheck_after.strftime('%Y-%m-%d'),
+                'dates': [d.strftime('%Y-%m-%d') for d in dates],
+            })
+        return dates
+
+    def get_earnings_dates(self, ticker: str, limit: int = 8) -> List[datetime]:
+        """Most recent report dates first, upcoming ones included"""
+        try:
+            return sorted(self.get_dates(ticker), reverse=True)[:limit]
+        except Exception as e:
+            print(f"Error fetching earnings dates for {ticker}: {e}")
+            return []
+
+    def next_earnings_date(self, ticker: str) -> Optional[datetime]:
+        """Next report date a source lists for a ticker, or None if none is listed"""
+        try:
+            today = pd.Timestamp.today().normalize()
+            upcoming = [d for d in self.get_dates(ticker) if d >= today]
+            return upcoming[0] if upcoming else None
+        except Exception as e:
+            print(f"Error fetching next earnings date for {ticker}: {e}")
+            return None
+
+
+_default_calendar = None
+_default_calendar_lock = threading.Lock()
+
+
+def get_default_calendar() -> EarningsCalendar:
+    """Return the process-wide earnings calendar shared by all analyzers"""
+    global _default_calendar
+    with _default_calendar_lock:
+        if _default_calendar is None:
+            _default_calendar = EarningsCalendar()
+        return _default_calendar
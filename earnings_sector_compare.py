@@ -1,100 +1,163 @@
-import yfinance as yf
 import pandas as pd
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
-from typing import List, Dict, Optional
-from docx import Document
-from docx.shared import Inches
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, List, Dict, Optional
+from price_store import PriceStore, RangeCache, get_default_store
+from earnings_calendar import EarningsCalendar, get_default_calendar
+from iv_table import IVTable, get_default_iv_table, session_date
+from iv_surface import IVSurface, SurfaceCache, get_default_surface_cache
+from ticker_snapshot import TickerSnapshot
+from task_runner import Task, TaskRunner
+from virtual_table import VirtualTable
+from indicators import add_indicators, add_panel_indicators
+from implied_vol import add_chain_greeks
+from correlation import correlation_matrix, correlation_row, event_correlation, rolling_peer_correlation
 
 class StockAnalyzer:
-    def __init__(self):
-        self.cache = {}
+    # Extra history loaded before a window for accurate MA calculations
+    HISTORY_PADDING = timedelta(days=400)
+    # Derived columns get_stock_data adds by default; indicators are computed the
+    # first time they are asked for and kept with the ticker's cached history.
+    # 'IV' comes from the per-date IV table and may read the live chain, so it
+    # is only added when asked for
+    INDICATORS = ['Daily_Return', 'RSI', 'MA50', 'MA200']
+    COLUMNS = INDICATORS
+    
+    def __init__(self, store: Optional[PriceStore] = None, calendar: Optional[EarningsCalendar] = None,
+                 iv_table: Optional[IVTable] = None, surface_cache: Optional[SurfaceCache] = None):
+        self.cache = RangeCache()
+        self._columns_lock = threading.Lock()
+        self.store = store or get_default_store()
+        self.calendar = calendar or get_default_calendar()
+        self.iv_table = iv_table or get_default_iv_table()
+        self.surface_cache = surface_cache or get_default_surface_cache()
 
     def get_earnings_dates(self, ticker: str) -> List[datetime]:
         """Fetch historical earnings dates for a ticker"""
-        try:
-            stock = yf.Ticker(ticker)
-            earnings_history = stock.earnings_dates
-            
-            if earnings_history is None or earnings_history.empty:
-                return []
-                
-            # Ensure consistent timezone handling
-            dates = earnings_history.index
-            if dates.tz is not None:
-                dates = dates.tz_localize(None)  # Remove timezone info
-            
-            return sorted(dates, reverse=True)[:8]
+        return self.calendar.get_earnings_dates(ticker, limit=8)
             
-        except Exception as e:
-            print(f"Error fetching earnings dates for {ticker}: {e}")
-            return []
-            
-    def get_stock_data(self, ticker: str, start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
-        """Get stock price data with caching"""
+    def get_stock_data(self, ticker: str, start_date: datetime, end_date: datetime,
+                       columns: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+        """Get stock price data with caching, plus the derived ``columns`` (all of COLUMNS by default)"""
         try:
             # Ensure dates are timezone-naive
             start_date = pd.to_datetime(start_date).tz_localize(None)
             # Get more historical data for accurate MA calculations
-            extended_start = start_date - timedelta(days=400)  # Get extra days for MA calculation
+            extended_start = start_date - self.HISTORY_PADDING  # Get extra days for MA calculation
             end_date = pd.to_datetime(end_date).tz_localize(None)
             
-            cache_key = f"{ticker}_{start_date}_{end_date}"
-            if cache_key in self.cache:
-                return self.cache[cache_key]
-                
-            stock = yf.Ticker(ticker)
-            data = stock.history(start=extended_start, end=end_date)
+            # Serve any window that falls inside an already computed range
+            data = self.cache.get(ticker, extended_start, end_date)
+            if data is None:
+                load_start, load_end = self.cache.span(ticker, extended_start, end_date)
+                data = self.store.get_history(ticker, load_start, load_end)
+                if data is None or data.empty:
+                    return None
+                self.cache.put(ticker, load_start, load_end, data)
             
-            if not data.empty:
-                # Ensure index is timezone-naive
-                if data.index.tz is not None:
-                    data.index = data.index.tz_localize(None)
-                
-                # Calculate returns
-                data['Daily_Return'] = data['Close'].pct_change()
-                data['Cumulative_Return'] = (1 + data['Daily_Return']).cumprod() - 1
-                
-                # Calculate RSI (14-day)
-                delta = data['Close'].diff()
-                gain = delta.where(delta > 0, 0)
-                loss = -delta.where(delta < 0, 0)
-                avg_gain = gain.rolling(window=14).mean()
-                avg_loss = loss.rolling(window=14).mean()
-                rs = avg_gain / avg_loss
-                data['RSI'] = 100 - (100 / (1 + rs))
-                
-                # Calculate Moving Averages
-                data['MA50'] = data['Close'].rolling(window=50).mean()
-                data['MA200'] = data['Close'].rolling(window=200).mean()
-                
-                # Get IV (if available)
-                try:
-                    options = stock.options
-                    if options:
-                        nearest_option = stock.option_chain(options[0])
-                        data['IV'] = nearest_option.calls['impliedVolatility'].mean()
-                    else:
-                        data['IV'] = None
-                except:
-                    data['IV'] = None
-                
-                # Trim the data back to the requested date range
-                data = data[data.index >= start_date]
-                
-                self.cache[cache_key] = data
-                return data
-                
-            return None
+            # Trim the data back to the requested date range
+            window = data[(data.index >= start_date) & (data.index <= end_date)].copy()
+            if not window.empty:
+                # Returns accumulate from the first bar of the extended range
+                first_close = data.loc[data.index >= extended_start, 'Close'].iloc[0]
+                window['Cumulative_Return'] = window['Close'] / first_close - 1
+            return self.add_columns(ticker, window, self.COLUMNS if columns is None else columns)
             
         except Exception as e:
             print(f"Error fetching data for {ticker}: {e}")
             return None
 
+    def get_history(self, ticker: str, window: pd.DataFrame) -> pd.DataFrame:
+        """Bars held for a window from get_stock_data, from the start of its padding to the window's end"""
+        data = self.cache.get(ticker, window.index[0], window.index[-1])
+        if data is None:
+            return window
+        return data[data.index <= window.index[-1]]
+
+    def add_columns(self, ticker: str, window: Optional[pd.DataFrame], columns: Iterable[str]) -> Optional[pd.DataFrame]:
+        """Add derived columns to a window from get_stock_data, computing each once per ticker.
+
+        Indicators are computed over the whole cached history so the padding
+        before the window feeds the moving averages. ``IV`` holds the values
+        recorded in the IV table for each date (NaN where none was), after
+        recording the current session's if the window reaches it.
+        """
+        if window is None or window.empty:
+            return window
+        missing = [c for c in dict.fromkeys(columns) if c not in window.columns]
+        if not missing:
+            return window
+        data = self.cache.get(ticker, window.index[0], window.index[-1])
+        if data is None:
+            return window
+        
+        indicators = [c for c in missing if c != 'IV']
+        with self._columns_lock:
+            indicators_to_compute = [c for c in indicators if c not in data.columns]
+            if indicators_to_compute:
+                add_indicators(data, indicators_to_compute)
+        for column in indicators:
+            window[column] = data[column].reindex(window.index)
+        if 'IV' in missing:
+            if window.index[-1].normalize() >= session_date():
+                self.iv_table.current(ticker)
+            window['IV'] = self.iv_table.for_index(ticker, window.index)
+        return window
+
+    def get_stock_data_many(self, tickers: List[str], start_date: datetime, end_date: datetime,
+                            max_workers: int = 8,
+                            progress: Optional[Callable[[str, int, int], None]] = None,
+                            columns: Optional[Iterable[str]] = None) -> Dict[str, Optional[pd.DataFrame]]:
+        """Get stock price data for several tickers in parallel, keyed in input order.
+
+        ``progress(ticker, done, total)`` is called as each ticker finishes; an
+        exception raised from it stops the remaining loads.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        columns = list(self.COLUMNS if columns is None else columns)
+        indicators = [c for c in columns if c != 'IV']
+            
+        # Tickers without a computed range are loaded with one grouped download
+        # and get their indicators in a single panel pass over all of them
+        extended_start = pd.to_datetime(start_date).tz_localize(None) - self.HISTORY_PADDING
+        end = pd.to_datetime(end_date).tz_localize(None)
+        missing = [t for t in tickers if self.cache.get(t, extended_start, end) is None]
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers))))
+        try:
+            if missing:
+                spans = [self.cache.span(t, extended_start, end) for t in missing]
+                load_start = min(span[0] for span in spans)
+                load_end = max(span[1] for span in spans)
+                # Tickers the grouped download did not fill are loaded one by one in the pool below
+                histories = self.store.get_history_many(missing, load_start, load_end)
+                loaded = {t: histories.get(t.upper()) for t in missing}
+                loaded = {t: data for t, data in loaded.items() if data is not None and not data.empty}
+                if indicators:
+                    loaded = add_panel_indicators(loaded, indicators)
+                for t, data in loaded.items():
+                    self.cache.put(t, load_start, load_end, data)
+            
+            if 'IV' in columns and end.normalize() >= session_date():
+                # The session's IV is recorded per ticker, in parallel, before the windows read it
+                list(executor.map(self.iv_table.current, tickers))
+            
+            futures = {executor.submit(self.get_stock_data, t, start_date, end_date, columns): t for t in tickers}
+            frames = {}
+            for future in as_completed(futures):
+                frames[futures[future]] = future.result()
+                if progress is not None:
+                    progress(futures[future], len(frames), len(tickers))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return {t: frames[t] for t in tickers}
+
     def check_ma_signals(self, data: pd.DataFrame) -> Dict[str, str]:
         """Check moving average signals"""
         latest = data.iloc[-1]
@@ -112,26 +175,21 @@ class StockAnalyzer:
             
         return signals
 
-    def get_current_price(self, ticker: str) -> float:
+    def get_current_price(self, ticker: str, snapshot: Optional[TickerSnapshot] = None) -> float:
         """Get real-time current price for a ticker"""
-        try:
-            stock = yf.Ticker(ticker)
-            current = stock.history(period='1d')
-            if not current.empty:
-                return current['Close'].iloc[-1]
-            return None
-        except Exception as e:
-            print(f"Error fetching current price for {ticker}: {e}")
-            return None
+        snapshot = snapshot or TickerSnapshot(ticker)
+        return snapshot.current_price
 
-    def get_current_iv(self, ticker: str) -> float:
+    def get_current_iv(self, ticker: str, snapshot: Optional[TickerSnapshot] = None) -> float:
         """Get current IV from the nearest expiration options"""
         try:
-            stock = yf.Ticker(ticker)
-            options = stock.options
+            snapshot = snapshot or TickerSnapshot(ticker)
+            options = snapshot.expirations
             if options:
-                nearest_option = stock.option_chain(options[0])
-                # Average IV from both calls and puts
+                nearest_option = snapshot.solved_chain(options[0])
+                if nearest_option is None:
+                    return None
+                # Average IV from both calls and puts, solved from their mid prices
                 call_iv = nearest_option.calls['impliedVolatility'].mean()
                 put_iv = nearest_option.puts['impliedVolatility'].mean()
                 return (call_iv + put_iv) / 2
@@ -142,29 +200,44 @@ class StockAnalyzer:
 
     def calculate_correlation(self, data1: pd.Series, data2: pd.Series) -> float:
         """Calculate correlation between two price series"""
+        return self.peer_correlations(0, {0: data1, 1: data2}).get(1)
+
+    def correlation_matrix(self, closes: Dict[str, pd.Series]) -> Optional[pd.DataFrame]:
+        """Correlation of daily returns between every pair of tickers, aligned once"""
         try:
-            if data1 is None or data2 is None or len(data1) < 2 or len(data2) < 2:
-                return None
-                
-            # Convert to returns for better correlation analysis
-            returns1 = data1.pct_change().dropna()
-            returns2 = data2.pct_change().dropna()
-            
-            # Align the data and calculate correlation
-            aligned_returns = pd.concat([returns1, returns2], axis=1).dropna()
-            if len(aligned_returns) < 2:  # Need at least 2 points for correlation
-                return None
-                
-            correlation = aligned_returns.corr().iloc[0, 1]
-            return correlation if not pd.isna(correlation) else None
-            
+            return correlation_matrix(closes)
         except Exception as e:
-            print(f"Error calculating correlation: {e}")
+            print(f"Error calculating correlation matrix: {e}")
+            return None
+
+    def peer_correlations(self, main_ticker, closes: Dict[str, pd.Series]) -> Dict[str, Optional[float]]:
+        """Correlation of each peer with the main ticker, from one correlation matrix"""
+        try:
+            return correlation_row(closes, main_ticker)
+        except Exception as e:
+            print(f"Error calculating correlation matrix: {e}")
+            return {}
+
+    def rolling_correlations(self, main_ticker, closes: Dict[str, pd.Series], window: int = 60) -> Optional[pd.DataFrame]:
+        """Rolling ``window``-day correlation of each peer with the main ticker (dates x peers)"""
+        try:
+            return rolling_peer_correlation(closes, main_ticker, window)
+        except Exception as e:
+            print(f"Error calculating rolling correlation: {e}")
+            return None
+
+    def event_correlations(self, main_ticker, closes: Dict[str, pd.Series], er_date: datetime,
+                           days: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """Correlation of each peer with the main ticker before and after earnings (peers x Pre/Post)"""
+        try:
+            return event_correlation(closes, main_ticker, er_date, days)
+        except Exception as e:
+            print(f"Error calculating earnings correlation: {e}")
             return None
 
     def get_correlation_category(self, corr: float) -> str:
         """Categorize correlation strength"""
-        if corr is None:
+        if corr is None or pd.isna(corr):
             return "N/A"
         abs_corr = abs(corr)
         if abs_corr >= 0.7:
@@ -174,62 +247,73 @@ class StockAnalyzer:
         else:
             return f"Low ({corr:.2%})"
 
-    def get_historical_iv(self, ticker: str, date: datetime) -> float:
-        """Get historical IV for a specific date"""
+    def get_historical_iv(self, ticker: str, date: datetime, snapshot: Optional[TickerSnapshot] = None) -> float:
+        """ATM IV recorded for a ticker on a date, or None if no snapshot was taken that day"""
         try:
-            stock = yf.Ticker(ticker)
-            # Get options expiring after the target date
-            all_options = stock.options
-            if not all_options:
-                return None
-                
-            # Convert date to datetime and ensure it's timezone-naive
-            target_date = pd.to_datetime(date).tz_localize(None)
-            
-            # Find the nearest expiration after the target date
-            valid_dates = [pd.to_datetime(d).tz_localize(None) for d in all_options]
-            future_dates = [d for d in valid_dates if d > target_date]
-            if not future_dates:
-                return None
-                
-            nearest_expiry = min(future_dates)
-            
-            # Get the option chain for that expiration
-            option_chain = stock.option_chain(nearest_expiry.strftime('%Y-%m-%d'))
-            if option_chain is None:
-                return None
-                
-            # Get ATM options for more accurate IV
-            current_price = self.get_current_price(ticker)
-            if current_price is None:
-                return None
-                
-            # Filter for near-the-money options
-            calls = option_chain.calls
-            puts = option_chain.puts
-            
-            # Get options closest to current price
-            calls = calls[abs(calls['strike'] - current_price) < current_price * 0.1]  # Within 10% of current price
-            puts = puts[abs(puts['strike'] - current_price) < current_price * 0.1]
-            
-            if calls.empty and puts.empty:
-                return None
-                
-            # Calculate weighted average IV
-            call_iv = calls['impliedVolatility'].mean() if not calls.empty else 0
-            put_iv = puts['impliedVolatility'].mean() if not puts.empty else 0
-            
-            count = (0 if calls.empty else 1) + (0 if puts.empty else 1)
-            if count == 0:
-                return None
-                
-            return (call_iv + put_iv) / count
-            
+            value = self.iv_table.get(ticker, date)
+            day = pd.Timestamp(date).tz_localize(None).normalize()
+            if value is None and day == session_date():
+                # The current session's value can still be measured from the live chains
+                value = self.iv_table.current(ticker, snapshot)
+            return value
         except Exception as e:
             print(f"Error fetching historical IV for {ticker} at {date}: {e}")
             return None
 
+    def get_iv_surface(self, ticker: str, snapshot: Optional[TickerSnapshot] = None) -> Optional[IVSurface]:
+        """IV surface of a ticker for the current session, built once and shared by every view"""
+        return self.surface_cache.get(ticker, snapshot)
+
+    def get_implied_moves(self, ticker: str, er_date: datetime):
+        """Move priced through an upcoming earnings date and by the earnings alone, as fractions of spot.
+
+        Read from the surface already built this session (see get_iv_surface),
+        so (None, None) until a background load has built it.
+        """
+        try:
+            if pd.Timestamp(er_date).tz_localize(None).normalize() < pd.Timestamp.today().normalize():
+                return None, None
+            surface = self.surface_cache.cached(ticker)
+            if surface is None:
+                return None, None
+            move = surface.expected_move(er_date)
+            return (move / surface.spot if move is not None else None), surface.event_move(er_date)
+        except Exception as e:
+            print(f"Error reading implied move for {ticker}: {e}")
+            return None, None
+
 class ERAnalysisApp:
+    # Derived data columns each summary column is computed from
+    SUMMARY_NEEDS = {
+        'Pre-ER Return': ['Daily_Return'],
+        'Post-ER Return': ['Daily_Return'],
+        'Current RSI': ['RSI'],
+        'Price vs MA200': ['MA200'],
+        'Price vs MA50': ['MA50'],
+        'MA Cross': ['MA50', 'MA200'],
+        'Pre-ER IV': ['IV'],
+        'Post-ER IV': ['IV'],
+        'IV Change': ['IV'],
+    }
+    # Summary columns that need the live quote or option chains
+    LIVE_COLUMNS = {'Current Price', 'Current IV', 'Implied Move', 'ER Event Move'}
+    # Summary columns read from the IV surface of every expiration
+    SURFACE_COLUMNS = {'Implied Move', 'ER Event Move'}
+    CHART_NEEDS = ['RSI', 'MA50', 'MA200']
+    # Option chain table columns and how each value is shown
+    OPTION_COLUMNS = ['strike', 'lastPrice', 'bid', 'ask', 'volume', 'openInterest', 'impliedVolatility',
+                      'delta', 'gamma', 'vega', 'theta', 'inTheMoney']
+    OPTION_FORMATS = {
+        'strike': '{:.2f}', 'lastPrice': '{:.2f}', 'bid': '{:.2f}', 'ask': '{:.2f}',
+        'volume': lambda v: str(int(v)), 'openInterest': lambda v: str(int(v)),
+        'impliedVolatility': lambda v: f"{v * 100:.1f}%",
+        'delta': '{:.3f}', 'gamma': '{:.4f}', 'vega': '{:.3f}', 'theta': '{:.3f}',
+        'inTheMoney': lambda v: "ITM" if v else "OTM",
+    }
+    EXPORT_NEEDS = ['Daily_Return', 'RSI', 'MA50', 'MA200', 'IV']
+    # Sessions on each side of earnings the pre/post-earnings correlations use
+    EVENT_CORR_DAYS = 20
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Earnings Analysis")
@@ -270,7 +354,11 @@ class ERAnalysisApp:
             'Price vs MA200': True,
             'Price vs MA50': True,
             'MA Cross': True,
-            'Correlation': True
+            'Correlation': True,
+            'Pre-ER Corr': True,
+            'Post-ER Corr': True,
+            'Implied Move': True,
+            'ER Event Move': True
         }
         
         # Create column toggles
@@ -296,7 +384,12 @@ class ERAnalysisApp:
         self.peers_entry = ttk.Entry(self.input_frame)
         self.peers_entry.grid(row=3, column=1)
         
-        ttk.Button(self.input_frame, text="Analyze", command=self.run_analysis).grid(row=4, column=0, columnspan=2)
+        ttk.Button(self.input_frame, text="Analyze", command=self.run_analysis).grid(row=4, column=0)
+        ttk.Button(self.input_frame, text="Cancel", command=self.cancel_analysis).grid(row=4, column=1)
+        
+        # Progress of the running analysis
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(self.input_frame, textvariable=self.status_var).grid(row=5, column=0, columnspan=2, sticky="w")
         
         # Add export buttons
         ttk.Button(self.export_frame, text="Export Chart", command=self.export_chart).grid(row=0, column=0, padx=5)
@@ -305,6 +398,17 @@ class ERAnalysisApp:
         # Store results for export
         self.current_results = None
         self.current_er_date = None
+        
+        # Live quote/options data per ticker, shared by all columns of a run
+        self.snapshots: Dict[str, TickerSnapshot] = {}
+        
+        # Maximum number of tickers downloaded at the same time
+        self.fetch_workers = 8
+        
+        # Network work runs in the background so the window stays responsive
+        self.runner = TaskRunner(self.root)
+        self.task: Optional[Task] = None
+        self.export_task: Optional[Task] = None
 
     def create_column_controls(self):
         """Create checkboxes for column visibility control"""
@@ -337,30 +441,115 @@ class ERAnalysisApp:
         self.all_columns[column] = var.get()
         self.refresh_display()
 
+    def summary_needs(self) -> List[str]:
+        """Derived data columns the visible summary columns are computed from"""
+        needs = [need for column, shown in self.all_columns.items() if shown
+                 for need in self.SUMMARY_NEEDS.get(column, [])]
+        return list(dict.fromkeys(needs))
+
+    def needs_live_data(self) -> bool:
+        return any(self.all_columns[column] for column in self.LIVE_COLUMNS)
+
+    def needs_surface(self, er_date: datetime) -> bool:
+        """Whether the summary shows implied moves, which only exist for upcoming earnings"""
+        upcoming = pd.Timestamp(er_date).normalize() >= pd.Timestamp.today().normalize()
+        return upcoming and any(self.all_columns[column] for column in self.SURFACE_COLUMNS)
+
+    @staticmethod
+    def closes(results: Dict[str, pd.DataFrame]) -> Dict[str, pd.Series]:
+        return {ticker: data['Close'] for ticker, data in results.items() if data is not None and not data.empty}
+
+    def history_closes(self, results: Dict[str, pd.DataFrame]) -> Dict[str, pd.Series]:
+        """Closes over the padded history of each window, for correlations that need more bars than it holds"""
+        return {ticker: self.analyzer.get_history(ticker, data)['Close']
+                for ticker, data in results.items() if data is not None and not data.empty}
+
+    def peer_correlations(self, results: Dict[str, pd.DataFrame]) -> Dict[str, Optional[float]]:
+        """Correlation of each ticker with the first (main) ticker of the results"""
+        return self.analyzer.peer_correlations(next(iter(results)), self.closes(results))
+
+    def event_correlations(self, results: Dict[str, pd.DataFrame], er_date: datetime) -> pd.DataFrame:
+        """Pre- and post-earnings correlation of each ticker with the main ticker, over EVENT_CORR_DAYS sessions a side"""
+        split = self.analyzer.event_correlations(next(iter(results)), self.history_closes(results), er_date,
+                                                 self.EVENT_CORR_DAYS)
+        return split if split is not None else pd.DataFrame(columns=['Pre', 'Post'], dtype=float)
+
     def refresh_display(self):
         """Refresh the display with current column settings"""
         if hasattr(self, 'current_results') and self.current_results:
-            self.display_summary(self.current_results, self.current_er_date)
+            results, er_date = self.current_results, self.current_er_date
+            self.display_summary(results, er_date)
+            # Columns shown after the analysis ran get their IVs, quotes and surfaces in the background
+            tickers = [ticker for ticker, data in results.items() if data is not None and not data.empty]
+            iv = [ticker for ticker in tickers
+                  if 'IV' in self.summary_needs() and 'IV' not in results[ticker].columns]
+            live = [ticker for ticker in tickers if self.needs_live_data() and ticker not in self.snapshots]
+            surfaces = [ticker for ticker in tickers if self.needs_surface(er_date)
+                        and self.analyzer.surface_cache.cached(ticker) is None]
+            if (iv or live or surfaces) and (self.task is None or self.task.done):
+                self.task = self.runner.submit(self.load_display, results, iv, live, surfaces,
+                                               on_done=lambda loaded: self.show_display(results, er_date, *loaded),
+                                               on_error=self.show_analysis_error,
+                                               on_progress=lambda message, fraction: self.status_var.set(message))
+
+    def load_display(self, task: Task, results: Dict[str, pd.DataFrame], iv: List[str], live: List[str],
+                     surfaces: List[str]):
+        """Background job: IV columns, live snapshots and IV surfaces of the tickers missing them"""
+        columns = {}
+        for ticker in iv:
+            task.report(f"Reading IV for {ticker}")
+            columns[ticker] = self.analyzer.add_columns(ticker, results[ticker].copy(), ['IV'])['IV']
+        snapshots = {}
+        for ticker in live:
+            task.report(f"Fetching options for {ticker}")
+            snapshots[ticker] = TickerSnapshot(ticker)
+            snapshots[ticker].prefetch()
+        for ticker in surfaces:
+            task.report(f"Building IV surface for {ticker}")
+            self.analyzer.get_iv_surface(ticker, snapshots.get(ticker) or self.snapshots.get(ticker))
+        return columns, snapshots
+
+    def show_display(self, results: Dict[str, pd.DataFrame], er_date: datetime,
+                     columns: Dict[str, pd.Series], snapshots: Dict[str, TickerSnapshot]):
+        """Redraw the summary with what load_display fetched, unless another analysis replaced it"""
+        self.status_var.set("Analysis complete")
+        if results is not self.current_results:
+            return
+        for ticker, values in columns.items():
+            results[ticker]['IV'] = values
+        self.snapshots.update(snapshots)
+        self.display_summary(results, er_date)
 
     def populate_earnings_dates(self, event=None):
         """Populate earnings dates when ticker is entered"""
         ticker = self.ticker_entry.get().strip().upper()
         if ticker:
-            try:
-                dates = self.analyzer.get_earnings_dates(ticker)
-                if dates:
-                    # Format dates for display
-                    date_strings = [d.strftime('%Y-%m-%d') for d in dates]
-                    self.er_date_combo['values'] = date_strings
-                    self.er_date_combo.set(date_strings[0] if date_strings else '')
-                else:
-                    messagebox.showwarning("Warning", f"No earnings dates found for {ticker}")
-                    self.er_date_combo['values'] = []
-                    self.er_date_combo.set('')
-            except Exception as e:
-                messagebox.showerror("Error", f"Error fetching earnings dates: {str(e)}")
-                self.er_date_combo['values'] = []
-                self.er_date_combo.set('')
+            self.runner.submit(lambda task: self.analyzer.get_earnings_dates(ticker),
+                               on_done=lambda dates: self.show_earnings_dates(ticker, dates),
+                               on_error=self.show_earnings_dates_error)
+
+    def show_earnings_dates(self, ticker: str, dates: List[datetime]):
+        """Fill the earnings date selector with dates loaded in the background"""
+        if dates:
+            # Format dates for display
+            date_strings = [d.strftime('%Y-%m-%d') for d in dates]
+            self.er_date_combo['values'] = date_strings
+            self.er_date_combo.set(date_strings[0] if date_strings else '')
+        else:
+            messagebox.showwarning("Warning", f"No earnings dates found for {ticker}")
+            self.er_date_combo['values'] = []
+            self.er_date_combo.set('')
+
+    def show_earnings_dates_error(self, e: Exception):
+        messagebox.showerror("Error", f"Error fetching earnings dates: {str(e)}")
+        self.er_date_combo['values'] = []
+        self.er_date_combo.set('')
+
+    def cancel_analysis(self):
+        """Stop the running analysis; its partial results are discarded"""
+        if self.task is not None and not self.task.done:
+            self.task.cancel()
+            self.status_var.set("Analysis cancelled")
 
     def run_analysis(self):
         """Execute the analysis"""
@@ -379,28 +568,69 @@ class ERAnalysisApp:
             start_date = er_date - timedelta(days=days)
             end_date = er_date + timedelta(days=days)
             
-            # Get data
-            results = {}
-            results[main_ticker] = self.analyzer.get_stock_data(main_ticker, start_date, end_date)
-            
-            for peer in peers:
-                if peer:
-                    results[peer] = self.analyzer.get_stock_data(peer, start_date, end_date)
+            # Get data for the main ticker and all peers in the background
+            tickers = [main_ticker] + [peer for peer in peers if peer]
+            if self.task is not None:
+                self.task.cancel()
+            self.status_var.set(f"Loading {len(tickers)} tickers...")
+            self.task = self.runner.submit(self.load_results, tickers, start_date, end_date, er_date,
+                                           self.summary_needs() + self.CHART_NEEDS, self.needs_live_data(),
+                                           self.needs_surface(er_date),
+                                           on_done=lambda loaded: self.show_results(*loaded, er_date),
+                                           on_error=self.show_analysis_error,
+                                           on_progress=lambda message, fraction: self.status_var.set(message))
             
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    def load_results(self, task: Task, tickers: List[str], start_date: datetime, end_date: datetime,
+                     er_date: datetime, columns: List[str], live: bool = True, surfaces: bool = False):
+        """Background job: price history with ``columns``, plus live quote/options data if shown"""
+        results = self.analyzer.get_stock_data_many(
+            tickers, start_date, end_date, max_workers=self.fetch_workers,
+            progress=lambda ticker, done, total: task.report(f"Loaded {ticker} ({done}/{total})", done / total),
+            columns=columns)
+        
+        snapshots = {}
+        if not live:
+            return results, snapshots
+        for ticker, data in results.items():
+            if data is None or data.empty:
+                continue
+            task.report(f"Fetching options for {ticker}")
+            snapshots[ticker] = TickerSnapshot(ticker)
+            snapshots[ticker].prefetch()
+            if surfaces:
+                # Every expiration is loaded here so the earnings views read the surface from memory
+                task.report(f"Building IV surface for {ticker}")
+                self.analyzer.get_iv_surface(ticker, snapshots[ticker])
+        return results, snapshots
+
+    def show_results(self, results: Dict[str, pd.DataFrame], snapshots: Dict[str, TickerSnapshot],
+                     er_date: datetime):
+        """Display and export a finished analysis on the Tk thread"""
+        try:
             # Store results for export
             self.current_results = results
             self.current_er_date = er_date
+            self.snapshots = snapshots
                     
             # Display results
             self.display_summary(results, er_date)
             self.display_charts(results, er_date)
+            self.display_term_structure(results, er_date)
             
             # Automatically export results
             self.export_chart()
             self.export_data()
+            self.status_var.set("Analysis complete")
             
         except Exception as e:
-            messagebox.showerror("Error", str(e))
+            self.show_analysis_error(e)
+
+    def show_analysis_error(self, e: Exception):
+        self.status_var.set("Error in analysis")
+        messagebox.showerror("Error", str(e))
             
     def display_summary(self, results: Dict[str, pd.DataFrame], er_date: datetime):
         """Display summary statistics"""
@@ -409,53 +639,78 @@ class ERAnalysisApp:
             
         # Get visible columns
         visible_columns = [col for col, shown in self.all_columns.items() if shown]
+        shown = set(visible_columns)
+        needs = self.summary_needs()
         
-        # Create treeview with visible columns
-        tree = ttk.Treeview(self.summary_frame, columns=visible_columns, show='headings')
+        # Create table with visible columns; rows are collected first and shown in one pass
+        table = VirtualTable(self.summary_frame, columns=visible_columns)
+        rows = []
         
         for col in visible_columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=100)
+            table.tree.column(col, width=100)
             
-        # Get main ticker data for correlation comparison
+        # Correlations of every peer with the main ticker come from one matrix
         main_ticker = list(results.keys())[0]
-        main_data = results[main_ticker]['Close'] if results[main_ticker] is not None else None
+        correlations = self.peer_correlations(results) if 'Correlation' in shown else {}
+        if shown & {'Pre-ER Corr', 'Post-ER Corr'}:
+            event_corr = self.event_correlations(results, er_date)
+        else:
+            event_corr = pd.DataFrame(columns=['Pre', 'Post'], dtype=float)
             
         for ticker, data in results.items():
             if data is not None and not data.empty:
+                # Indicators a newly shown column depends on are computed now; IV may need the
+                # live chain, so refresh_display loads it in the background
+                data = self.analyzer.add_columns(ticker, data, [need for need in needs if need != 'IV'])
+                
+                # Live data comes from the snapshot loaded in the background, shared across columns
+                snapshot = self.snapshots.get(ticker) if shown & self.LIVE_COLUMNS else None
+                
                 # Get current values
-                current_price = self.analyzer.get_current_price(ticker)
-                current_iv = self.analyzer.get_current_iv(ticker)
+                current_price = self.analyzer.get_current_price(ticker, snapshot) if snapshot is not None and 'Current Price' in shown else None
+                current_iv = self.analyzer.get_current_iv(ticker, snapshot) if snapshot is not None and 'Current IV' in shown else None
+                if shown & self.SURFACE_COLUMNS:
+                    implied_move, event_move = self.analyzer.get_implied_moves(ticker, er_date)
+                else:
+                    implied_move, event_move = None, None
+                
+                # Live values do not need the earnings window, so upcoming earnings still show them
+                live_values = {
+                    'Ticker': ticker,
+                    'Current Price': f"${current_price:.2f}" if current_price is not None else "N/A",
+                    'Current IV': f"{current_iv:.1%}" if current_iv is not None else "N/A",
+                    'Implied Move': f"+/-{implied_move:.1%}" if implied_move is not None else "N/A",
+                    'ER Event Move': f"+/-{event_move:.1%}" if event_move is not None else "N/A"
+                }
                 
                 er_date_naive = pd.to_datetime(er_date).tz_localize(None)
                 er_idx = data.index.searchsorted(er_date_naive)
                 
                 # Calculate correlation
-                correlation = None
-                if ticker != main_ticker:
-                    correlation = self.analyzer.calculate_correlation(main_data, data['Close'])
+                correlation = correlations.get(ticker)
                 corr_category = self.analyzer.get_correlation_category(correlation) if ticker != main_ticker else "MAIN"
+                pre_corr, post_corr = event_corr.loc[ticker] if ticker in event_corr.index else (None, None)
+                pre_corr_category = self.analyzer.get_correlation_category(pre_corr) if ticker != main_ticker else "MAIN"
+                post_corr_category = self.analyzer.get_correlation_category(post_corr) if ticker != main_ticker else "MAIN"
                 
                 if er_idx > 0 and er_idx < len(data):
-                    # Get pre and post earnings dates
-                    pre_er_date = data.index[er_idx - 1]
-                    post_er_date = data.index[er_idx]
-                    
                     # Get prices
                     pre_price = data['Close'].iloc[er_idx - 1]
                     post_price = data['Open'].iloc[er_idx]
                     price_change = ((post_price / pre_price) - 1) * 100
                     
-                    # Get IVs
-                    pre_iv = self.analyzer.get_historical_iv(ticker, pre_er_date)
-                    post_iv = self.analyzer.get_historical_iv(ticker, post_er_date)
+                    # IVs recorded by the daily snapshots on the days either side of the report
+                    pre_iv = data['IV'].iloc[er_idx - 1] if 'IV' in data.columns else None
+                    post_iv = data['IV'].iloc[er_idx] if 'IV' in data.columns else None
+                    pre_iv = None if pd.isna(pre_iv) else float(pre_iv)
+                    post_iv = None if pd.isna(post_iv) else float(post_iv)
                     iv_change = ((post_iv / pre_iv) - 1) * 100 if (pre_iv and post_iv) else None
                     
                     # Calculate other metrics
                     pre_data = data.iloc[:er_idx]
                     post_data = data.iloc[er_idx:]
-                    pre_return = pre_data['Daily_Return'].sum() if not pre_data.empty else None
-                    post_return = post_data['Daily_Return'].sum() if not post_data.empty else None
+                    pre_return = pre_data['Daily_Return'].sum() if not pre_data.empty and 'Daily_Return' in data.columns else None
+                    post_return = post_data['Daily_Return'].sum() if not post_data.empty and 'Daily_Return' in data.columns else None
                     vol_change = ((post_data['Volume'].mean() / pre_data['Volume'].mean()) - 1) * 100
                     
                     # Get latest technical indicators
@@ -465,17 +720,15 @@ class ERAnalysisApp:
                     price_vs_ma50 = (latest['Close'] / latest['MA50'] - 1) * 100 if ('MA50' in data.columns and pd.notnull(latest['MA50'])) else None
                     
                     # Get MA signals
-                    ma_signals = self.analyzer.check_ma_signals(data)
+                    ma_signals = self.analyzer.check_ma_signals(data) if 'MA Cross' in shown else {}
                     ma_cross_text = "50MA > 200MA" if ma_signals.get('golden_cross', False) else "50MA < 200MA"
                     
                     # Create values dictionary for all possible columns
                     values_dict = {
-                        'Ticker': ticker,
-                        'Current Price': f"${current_price:.2f}" if current_price is not None else "N/A",
+                        **live_values,
                         'Pre-ER Price': f"${pre_price:.2f}" if pre_price is not None else "N/A",
                         'Post-ER Price': f"${post_price:.2f}" if post_price is not None else "N/A",
                         'Price Change': f"{price_change:+.2f}%" if price_change is not None else "N/A",
-                        'Current IV': f"{current_iv:.1%}" if current_iv is not None else "N/A",
                         'Pre-ER IV': f"{pre_iv:.1%}" if pre_iv is not None else "N/A",
                         'Post-ER IV': f"{post_iv:.1%}" if post_iv is not None else "N/A",
                         'IV Change': f"{iv_change:+.1f}%" if iv_change is not None else "N/A",
@@ -486,20 +739,27 @@ class ERAnalysisApp:
                         'Price vs MA200': f"{price_vs_ma200:+.1f}%" if price_vs_ma200 is not None else "N/A",
                         'Price vs MA50': f"{price_vs_ma50:+.1f}%" if price_vs_ma50 is not None else "N/A",
                         'MA Cross': ma_cross_text,
-                        'Correlation': corr_category
+                        'Correlation': corr_category,
+                        'Pre-ER Corr': pre_corr_category,
+                        'Post-ER Corr': post_corr_category
                     }
                     
-                    # Insert only visible columns
-                    tree.insert('', 'end', values=[values_dict[col] for col in visible_columns])
+                    rows.append(values_dict)
                 else:
-                    tree.insert('', 'end', values=(ticker, "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A"))
+                    rows.append(live_values)
                     
-        tree.grid(sticky="nsew")
+        # Columns a row has no value for show as N/A
+        table.set_data(pd.DataFrame(rows, columns=visible_columns))
+        table.grid(sticky="nsew")
         
     def display_charts(self, results: Dict[str, pd.DataFrame], er_date: datetime):
         """Display analysis charts"""
         for widget in self.charts_frame.winfo_children():
             widget.destroy()
+        
+        # Plotting is only loaded once there is something to plot
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
             
         # Create figure with 4 subplots
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
@@ -508,6 +768,8 @@ class ERAnalysisApp:
         
         for ticker, data in results.items():
             if data is not None:
+                data = self.analyzer.add_columns(ticker, data, self.CHART_NEEDS)
+                
                 # Returns plot
                 ax1.plot(data.index, data['Cumulative_Return'], label=ticker)
                 
@@ -541,6 +803,37 @@ class ERAnalysisApp:
         canvas.draw()
         canvas.get_tk_widget().grid(sticky="nsew")
 
+    def display_term_structure(self, results: Dict[str, pd.DataFrame], er_date: datetime):
+        """ATM IV and expected move by expiration around the earnings date, from surfaces already built"""
+        surfaces = {ticker: self.analyzer.surface_cache.cached(ticker) for ticker in results}
+        surfaces = {ticker: surface for ticker, surface in surfaces.items() if surface is not None}
+        if not surfaces:
+            return
+        
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 4))
+        er_days = (pd.Timestamp(er_date).normalize() - pd.Timestamp.today().normalize()).days
+        for ticker, surface in surfaces.items():
+            term = surface.term_structure()
+            ax1.plot(term['days'], term['atm_iv'] * 100, marker='o', label=ticker)
+            ax2.plot(term['days'], term['expected_move'] / surface.spot * 100, marker='o', label=ticker)
+        
+        for ax in [ax1, ax2]:
+            ax.axvline(x=er_days, color='r', linestyle='--')
+            ax.set_xlabel('Days to Expiration')
+            ax.legend()
+            ax.grid(True)
+        ax1.set_title('ATM IV Term Structure (%)')
+        ax2.set_title('Expected Move by Expiration (% of price)')
+        
+        plt.tight_layout()
+        
+        canvas = FigureCanvasTkAgg(fig, self.charts_frame)
+        canvas.draw()
+        canvas.get_tk_widget().grid(row=1, column=0, sticky="nsew")
+
     def export_chart(self):
         """Export the current chart as PNG"""
         if not hasattr(self, 'current_results') or not self.current_results:
@@ -552,6 +845,7 @@ class ERAnalysisApp:
             filename = f"earnings_analysis_{main_ticker}_{self.current_er_date.strftime('%Y%m%d')}.png"
             
             # Create a new figure for export (higher resolution)
+            import matplotlib.pyplot as plt
             fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10), dpi=300)
             
             for ticker, data in self.current_results.items():
@@ -581,41 +875,58 @@ class ERAnalysisApp:
             messagebox.showerror("Error", f"Failed to export chart: {str(e)}")
 
     def export_data(self):
-        """Export the analysis data as CSV"""
+        """Export the analysis data as CSV; IVs and correlations are gathered in the background"""
         if not hasattr(self, 'current_results') or not self.current_results:
             messagebox.showwarning("Warning", "No analysis results to export")
             return
             
-        try:
-            main_ticker = self.ticker_entry.get().upper()
-            filename = f"earnings_analysis_{main_ticker}_{self.current_er_date.strftime('%Y%m%d')}.csv"
-            
-            all_data = pd.DataFrame()
-            
-            for ticker, data in self.current_results.items():
-                if data is not None:
-                    data = data.copy()
-                    # Add all relevant columns
-                    data[f'{ticker}_Return'] = data['Daily_Return']
-                    data[f'{ticker}_Cumulative'] = data['Cumulative_Return']
-                    data[f'{ticker}_Volume'] = data['Volume']
-                    data[f'{ticker}_RSI'] = data['RSI']
-                    data[f'{ticker}_MA50'] = data['MA50']
-                    data[f'{ticker}_MA200'] = data['MA200']
-                    data[f'{ticker}_IV'] = data['IV']
-                    
-                    if all_data.empty:
-                        all_data = data[[f'{ticker}_Return', f'{ticker}_Cumulative', f'{ticker}_Volume',
-                                       f'{ticker}_RSI', f'{ticker}_MA50', f'{ticker}_MA200', f'{ticker}_IV']]
-                    else:
-                        all_data = all_data.join(data[[f'{ticker}_Return', f'{ticker}_Cumulative', f'{ticker}_Volume',
-                                                      f'{ticker}_RSI', f'{ticker}_MA50', f'{ticker}_MA200', f'{ticker}_IV']])
-            
-            all_data.to_csv(filename)
-            messagebox.showinfo("Success", f"Data exported as {filename}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export data: {str(e)}")
+        main_ticker = self.ticker_entry.get().upper()
+        filename = f"earnings_analysis_{main_ticker}_{self.current_er_date.strftime('%Y%m%d')}.csv"
+        if self.export_task is not None:
+            self.export_task.cancel()
+        self.export_task = self.runner.submit(
+            self.write_data, self.current_results, filename,
+            on_done=lambda written: messagebox.showinfo("Success", f"Data exported as {written}"),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to export data: {str(e)}"))
+
+    def write_data(self, task: Task, results: Dict[str, pd.DataFrame], filename: str) -> str:
+        """Background job: write each ticker's columns and the peers' rolling correlations to a CSV"""
+        all_data = pd.DataFrame()
+        
+        # 20- and 60-day rolling correlation of each peer with the main ticker, over the padded
+        # history so the windows are full on the first exported date; joined onto the window's dates
+        main_ticker = next(iter(results))
+        closes = self.history_closes(results)
+        rolling = {window: self.analyzer.rolling_correlations(main_ticker, closes, window)
+                   for window in (20, 60)}
+        
+        for ticker, data in results.items():
+            if data is not None:
+                # IV of the current session may be read from the live chain
+                data = self.analyzer.add_columns(ticker, data.copy(), self.EXPORT_NEEDS)
+                # Add all relevant columns
+                data[f'{ticker}_Return'] = data['Daily_Return']
+                data[f'{ticker}_Cumulative'] = data['Cumulative_Return']
+                data[f'{ticker}_Volume'] = data['Volume']
+                data[f'{ticker}_RSI'] = data['RSI']
+                data[f'{ticker}_MA50'] = data['MA50']
+                data[f'{ticker}_MA200'] = data['MA200']
+                data[f'{ticker}_IV'] = data['IV']
+                
+                if all_data.empty:
+                    all_data = data[[f'{ticker}_Return', f'{ticker}_Cumulative', f'{ticker}_Volume',
+                                   f'{ticker}_RSI', f'{ticker}_MA50', f'{ticker}_MA200', f'{ticker}_IV']]
+                else:
+                    all_data = all_data.join(data[[f'{ticker}_Return', f'{ticker}_Cumulative', f'{ticker}_Volume',
+                                                  f'{ticker}_RSI', f'{ticker}_MA50', f'{ticker}_MA200', f'{ticker}_IV']])
+        
+        for window, corr in rolling.items():
+            if corr is not None and not all_data.empty:
+                all_data = all_data.join(corr.add_suffix(f'_Corr{window}'))
+        
+        task.check()
+        all_data.to_csv(filename)
+        return filename
 
     def export_report(self):
         """Create a Word document report of the analysis"""
@@ -624,32 +935,65 @@ class ERAnalysisApp:
         # Add correlation analysis
         doc.add_heading('Correlation Analysis', level=1)
         main_ticker = list(self.current_results.keys())[0]
-        main_data = self.current_results[main_ticker]['Close'] if self.current_results[main_ticker] is not None else None
+        correlations = self.peer_correlations(self.current_results)
+        event_corr = self.event_correlations(self.current_results, self.current_er_date)
         
         for ticker, data in self.current_results.items():
             if ticker != main_ticker and data is not None:
-                correlation = self.analyzer.calculate_correlation(main_data, data['Close'])
+                correlation = correlations.get(ticker)
                 corr_category = self.analyzer.get_correlation_category(correlation)
                 doc.add_paragraph(f'{ticker} correlation with {main_ticker}: {corr_category}', style='List Bullet')
+                if ticker in event_corr.index:
+                    pre = self.analyzer.get_correlation_category(event_corr.loc[ticker, 'Pre'])
+                    post = self.analyzer.get_correlation_category(event_corr.loc[ticker, 'Post'])
+                    doc.add_paragraph(f'{ticker} before earnings: {pre}, after earnings: {post}', style='List Bullet')
         
         # ... rest of export_report code ...
 
     def run(self):
         self.root.mainloop()
+        self.runner.shutdown()
 
     def run_options_analysis(self, ticker):
-        try:
-            # Clear previous results
-            for widget in self.data_tab.winfo_children():
-                widget.destroy()
-            for widget in self.chart_tab.winfo_children():
-                widget.destroy()
+        """Show a ticker's option chains; expirations and chains are loaded in the background"""
+        # Clear previous results
+        for widget in self.data_tab.winfo_children():
+            widget.destroy()
+        for widget in self.chart_tab.winfo_children():
+            widget.destroy()
 
-            stock = yf.Ticker(ticker)
-            
-            # Get options expirations
-            expirations = stock.options
+        if self.task is not None:
+            self.task.cancel()
+        self.status_var.set(f"Loading {ticker} options...")
+        self.task = self.runner.submit(self.load_options, ticker,
+                                       on_done=lambda loaded: self.show_options(*loaded),
+                                       on_error=self.show_options_error)
+
+    def load_options(self, task: Task, ticker: str):
+        """Background job: a ticker's expirations and the chain of the nearest one, if it has any"""
+        snapshot = TickerSnapshot(ticker)
+        if not snapshot.expirations:
+            return snapshot, None
+        return snapshot, self.load_option_chain(task, snapshot, snapshot.expirations[0])
+
+    def load_option_chain(self, task: Task, snapshot: TickerSnapshot, expiration: str):
+        """Background job: one expiration's chain with IV solved from quotes and Greeks for every contract"""
+        chain = snapshot.solved_chain(expiration)
+        spot = snapshot.current_price
+        if chain is None or spot is None:
+            raise ValueError(f"No {expiration} options or quote for {snapshot.ticker}")
+        return add_chain_greeks(chain, spot, expiration), spot
+
+    def show_options_error(self, e: Exception):
+        self.status_var.set("Error in options analysis")
+        messagebox.showerror("Error", f"Error in options analysis: {str(e)}")
+
+    def show_options(self, snapshot: TickerSnapshot, first):
+        """Build the expiration selector and chain tables on the Tk thread"""
+        try:
+            expirations = snapshot.expirations
             if not expirations:
+                self.status_var.set("Ready")
                 messagebox.showwarning("Warning", "No options available for this stock")
                 return
 
@@ -674,117 +1018,93 @@ class ERAnalysisApp:
             chain_notebook.add(puts_frame, text='Puts')
 
             def update_options_chain(*args):
+                # Chains not cached yet are downloaded and solved in the background
+                expiration = exp_var.get()
+                if self.task is not None:
+                    self.task.cancel()
+                self.status_var.set(f"Loading {expiration} chain...")
+                self.task = self.runner.submit(self.load_option_chain, snapshot, expiration,
+                                               on_done=lambda loaded: show_options_chain(*loaded),
+                                               on_error=self.show_options_error)
+
+            def show_options_chain(chain, current_price):
+                self.status_var.set("Ready")
                 # Clear previous data
                 for frame in [calls_frame, puts_frame]:
                     for widget in frame.winfo_children():
                         widget.destroy()
 
-                try:
-                    # Get chain data
-                    chain = stock.option_chain(exp_var.get())
-                    current_price = stock.history(period='1d')['Close'].iloc[-1]
-
-                    # Setup trees for both calls and puts
-                    for option_type, frame, data in [
-                        ('Calls', calls_frame, chain.calls),
-                        ('Puts', puts_frame, chain.puts)
-                    ]:
-                        tree = ttk.Treeview(frame, columns=(
-                            'strike', 'lastPrice', 'bid', 'ask', 'volume', 
-                            'openInterest', 'impliedVolatility', 'inTheMoney'
-                        ))
-                        
-                        # Configure columns
-                        tree.column('#0', width=0, stretch=tk.NO)
-                        for col in tree['columns']:
-                            tree.column(col, anchor=tk.CENTER, width=100)
-                            tree.heading(col, text=col.title())
-
-                        # Add scrollbar
-                        scrollbar = ttk.Scrollbar(frame, orient="vertical", 
-                                                command=tree.yview)
-                        tree.configure(yscrollcommand=scrollbar.set)
-
-                        # Grid layout
-                        tree.grid(row=0, column=0, sticky="nsew")
-                        scrollbar.grid(row=0, column=1, sticky="ns")
-                        frame.grid_columnconfigure(0, weight=1)
-                        frame.grid_rowconfigure(0, weight=1)
-
-                        # Insert data
-                        for _, row in data.iterrows():
-                            try:
-                                values = [
-                                    f"{row['strike']:.2f}",
-                                    f"{row['lastPrice']:.2f}",
-                                    f"{row['bid']:.2f}",
-                                    f"{row['ask']:.2f}",
-                                    str(int(row['volume']) if pd.notnull(row['volume']) else 0),
-                                    str(int(row['openInterest']) if pd.notnull(row['openInterest']) else 0),
-                                    f"{row['impliedVolatility']*100:.1f}%",
-                                    "ITM" if row['inTheMoney'] else "OTM"
-                                ]
-                                
-                                # Highlight ITM options
-                                tags = ('itm',) if row['inTheMoney'] else ('otm',)
-                                tree.insert('', 'end', values=values, tags=tags)
-                            except Exception as e:
-                                print(f"Error adding row: {str(e)}")
-
-                        # Configure tags
-                        tree.tag_configure('itm', background='#e6ffe6')
-                        tree.tag_configure('otm', background='#ffe6e6')
-
-                    # Plot IV Smile
-                    self.plot_iv_smile(chain, current_price)
-
-                except Exception as e:
-                    messagebox.showerror("Error", f"Error updating options chain: {str(e)}")
-
-            def plot_iv_smile(self, chain, current_price):
-                try:
-                    fig, ax = plt.subplots(figsize=(10, 6))
-
-                    # Plot calls IV
-                    calls_data = chain.calls
-                    ax.scatter(calls_data['strike'], 
-                             calls_data['impliedVolatility'] * 100,
-                             label='Calls IV', color='green', alpha=0.6)
-
-                    # Plot puts IV
-                    puts_data = chain.puts
-                    ax.scatter(puts_data['strike'], 
-                             puts_data['impliedVolatility'] * 100,
-                             label='Puts IV', color='red', alpha=0.6)
-
-                    # Add current price line
-                    ax.axvline(x=current_price, color='blue', 
-                             linestyle='--', label='Current Price')
-
-                    ax.set_title('IV Smile')
-                    ax.set_xlabel('Strike Price')
-                    ax.set_ylabel('Implied Volatility (%)')
-                    ax.legend()
-                    ax.grid(True)
-
-                    # Add to chart tab
-                    for widget in self.chart_tab.winfo_children():
-                        widget.destroy()
-                    canvas = FigureCanvasTkAgg(fig, self.chart_tab)
-                    canvas.draw()
-                    canvas.get_tk_widget().pack(fill='both', expand=True)
+                # Setup tables for both calls and puts; only the rows in view are formatted
+                for option_type, frame, data in [
+                    ('Calls', calls_frame, chain.calls),
+                    ('Puts', puts_frame, chain.puts)
+                ]:
+                    table = VirtualTable(frame, columns=self.OPTION_COLUMNS, height=20)
+                    
+                    # Configure columns
+                    for col in self.OPTION_COLUMNS:
+                        table.tree.column(col, anchor=tk.CENTER, width=100)
+                        table.tree.heading(col, text=col.title())
+                    table.pack(fill='both', expand=True)
+
+                    # Highlight ITM options
+                    itm = data['inTheMoney'].fillna(False).astype(bool).to_numpy()
+                    data = data.assign(volume=data['volume'].fillna(0), openInterest=data['openInterest'].fillna(0),
+                                       inTheMoney=itm)
+                    table.set_data(data, formats=self.OPTION_FORMATS,
+                                   tags=['itm' if flag else 'otm' for flag in itm])
+                    table.tag_configure('itm', background='#e6ffe6')
+                    table.tag_configure('otm', background='#ffe6e6')
 
-                except Exception as e:
-                    print(f"Error plotting IV smile: {str(e)}")
+                # Plot IV Smile
+                self.plot_iv_smile(chain, current_price)
 
             # Bind update function to combobox
             exp_combo.bind('<<ComboboxSelected>>', update_options_chain)
             
-            # Initial load
-            update_options_chain()
+            # The nearest expiration was loaded with the expirations
+            show_options_chain(*first)
+
+        except Exception as e:
+            self.show_options_error(e)
+
+    def plot_iv_smile(self, chain, current_price):
+        try:
+            import matplotlib.pyplot as plt
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            fig, ax = plt.subplots(figsize=(10, 6))
+
+            # Plot calls IV
+            calls_data = chain.calls
+            ax.scatter(calls_data['strike'], 
+                     calls_data['impliedVolatility'] * 100,
+                     label='Calls IV', color='green', alpha=0.6)
+
+            # Plot puts IV
+            puts_data = chain.puts
+            ax.scatter(puts_data['strike'], 
+                     puts_data['impliedVolatility'] * 100,
+                     label='Puts IV', color='red', alpha=0.6)
+
+            # Add current price line
+            ax.axvline(x=current_price, color='blue', 
+                     linestyle='--', label='Current Price')
+
+            ax.set_title('IV Smile')
+            ax.set_xlabel('Strike Price')
+            ax.set_ylabel('Implied Volatility (%)')
+            ax.legend()
+            ax.grid(True)
+
+            # Add to chart tab
+            for widget in self.chart_tab.winfo_children():
+                widget.destroy()
+            canvas = FigureCanvasTkAgg(fig, self.chart_tab)
+            canvas.draw()
+            canvas.get_tk_widget().pack(fill='both', expand=True)
 
         except Exception as e:
-            messagebox.showerror("Error", f"Error in options analysis: {str(e)}")
+            print(f"Error plotting IV smile: {str(e)}")
 
 if __name__ == "__main__":
     app = ERAnalysisApp()
@@ -1,17 +1,23 @@
-import yfinance as yf
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-from docx import Document
-from docx.shared import Inches
+from collections import OrderedDict
+import threading
+from option_cache import get_default_chain_cache
+from implied_vol import add_chain_greeks, solve_chain
+from iv_surface import get_default_surface_cache
+from earnings_calendar import get_default_calendar
+from task_runner import TaskRunner
+from virtual_table import VirtualTable
+from indicators import compute_indicators
 import warnings
 warnings.filterwarnings('ignore')
 
 class OptionsAnalyzer:
+    # Chains with Greeks kept for switching back to an expiration; least recently used go first
+    GREEK_CHAIN_ENTRIES = 16
+
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Options Analysis")
@@ -26,6 +32,15 @@ class OptionsAnalyzer:
         self.chart_frame = ttk.Frame(self.root, padding="10")
         self.chart_frame.grid(row=2, column=0, sticky="nsew")
         
+        # Downloads run in the background so the window stays responsive
+        self.runner = TaskRunner(self.root)
+        self.task = None
+        self.export_task = None
+        # (ticker, expiration) -> (vendor chain, chain with Greeks computed from it); shared by
+        # the background jobs, so only touched under the lock
+        self.greek_chains = OrderedDict()
+        self.greek_chains_lock = threading.Lock()
+        
         self.create_widgets()
         
     def create_widgets(self):
@@ -38,19 +53,34 @@ class OptionsAnalyzer:
         self.analysis_type = ttk.Combobox(self.input_frame, values=[
             "Historical IV Analysis",
             "Options Chain Analysis",
+            "IV Surface Analysis",
             "Strategy Analysis"
         ], state='readonly')
         self.analysis_type.grid(row=1, column=1)
         self.analysis_type.set("Historical IV Analysis")
         
         ttk.Button(self.input_frame, text="Analyze", 
-                  command=self.run_analysis).grid(row=2, column=0, columnspan=2)
+                  command=self.run_analysis).grid(row=2, column=0)
+        ttk.Button(self.input_frame, text="Cancel", 
+                  command=self.cancel_analysis).grid(row=2, column=1)
         
         # Export buttons
         ttk.Button(self.input_frame, text="Export Data", 
                   command=self.export_data).grid(row=3, column=0)
         ttk.Button(self.input_frame, text="Export Report", 
                   command=self.export_report).grid(row=3, column=1)
+        
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(self.input_frame, textvariable=self.status_var).grid(row=4, column=0, columnspan=2)
+
+    def cancel_analysis(self):
+        if self.task is not None and not self.task.done:
+            self.task.cancel()
+            self.status_var.set("Cancelled")
+
+    def show_error(self, e):
+        self.status_var.set("Error")
+        messagebox.showerror("Error", str(e))
 
     def run_analysis(self):
         ticker = self.ticker_entry.get().strip().upper()
@@ -58,27 +88,84 @@ class OptionsAnalyzer:
             messagebox.showerror("Error", "Please enter a ticker symbol")
             return
             
+        analysis_type = self.analysis_type.get()
+        if self.task is not None:
+            self.task.cancel()
+        self.status_var.set(f"Loading {ticker}...")
+        self.task = self.runner.submit(self.load_data, ticker, analysis_type,
+                                       on_done=lambda loaded: self.show_analysis(ticker, analysis_type, *loaded),
+                                       on_error=self.show_error)
+
+    def load_data(self, task, ticker, analysis_type):
+        """Background job: price history, plus the option chains a chain view opens with"""
+        import yfinance as yf
+        stock = yf.Ticker(ticker)
+        
+        # Get historical data and calculate IV
+        hist_data = stock.history(period='1y')
+        # Annualized 20-day volatility of daily returns
+        computed = compute_indicators(hist_data['Close'].to_numpy(), ['Daily_Return', 'Historical_Vol'])
+        hist_data['Returns'] = computed['Daily_Return']
+        hist_data['Historical_IV'] = computed['Historical_Vol']
+        
+        if analysis_type == "Options Chain Analysis":
+            task.report(f"Loading {ticker} options...")
+            chain_cache = get_default_chain_cache()
+            expirations = chain_cache.get_expirations(ticker, stock)
+            if expirations:
+                self.load_chain(ticker, expirations[0], stock, hist_data['Close'].iloc[-1])
+        elif analysis_type == "IV Surface Analysis":
+            # Every expiration is fetched here; the views below read the surface from memory
+            task.report(f"Building {ticker} IV surface...")
+            get_default_surface_cache().get(ticker)
+            self.next_earnings(ticker)
+        return stock, hist_data
+
+    def next_earnings(self, ticker):
+        """First earnings date from today on, or None if none is known"""
         try:
-            stock = yf.Ticker(ticker)
-            
-            # Get historical data and calculate IV
-            hist_data = stock.history(period='1y')
-            hist_data['Returns'] = hist_data['Close'].pct_change()
-            hist_data['Historical_IV'] = (
-                hist_data['Returns'].rolling(window=20).std() * 
-                np.sqrt(252) * 100
-            )
+            today = pd.Timestamp.today().normalize()
+            upcoming = [d for d in get_default_calendar().get_dates(ticker) if d >= today]
+            return upcoming[0] if upcoming else None
+        except Exception as e:
+            print(f"Error fetching earnings dates for {ticker}: {e}")
+            return None
+
+    def load_chain(self, ticker, expiration, stock, spot):
+        """Option chain with IV solved from quotes and Greeks for every contract.
+
+        Computed once per chain download, so the chain view and the Excel
+        export share the same columns.
+        """
+        chain = get_default_chain_cache().get_chain(ticker, expiration, stock)
+        key = (ticker, expiration)
+        with self.greek_chains_lock:
+            cached = self.greek_chains.get(key)
+            if cached is not None and cached[0] is chain:
+                self.greek_chains.move_to_end(key)
+                return cached[1]
+        cached = (chain, add_chain_greeks(solve_chain(chain, spot, expiration), spot, expiration))
+        with self.greek_chains_lock:
+            self.greek_chains[key] = cached
+            self.greek_chains.move_to_end(key)
+            while len(self.greek_chains) > self.GREEK_CHAIN_ENTRIES:
+                self.greek_chains.popitem(last=False)
+        return cached[1]
+
+    def show_analysis(self, ticker, analysis_type, stock, hist_data):
+        try:
+            self.status_var.set("Ready")
             
             # Clear previous analysis
             for widget in self.analysis_frame.winfo_children():
                 widget.destroy()
             
-            analysis_type = self.analysis_type.get()
-            
             if analysis_type == "Historical IV Analysis":
                 self.show_historical_iv(hist_data, ticker)
             elif analysis_type == "Options Chain Analysis":
-                self.show_options_chain(stock, ticker)
+                self.show_options_chain(stock, ticker, hist_data['Close'].iloc[-1])
+            elif analysis_type == "IV Surface Analysis":
+                self.show_iv_surface(ticker)
             elif analysis_type == "Strategy Analysis":
                 self.show_strategy_analysis(stock, hist_data, ticker)
                 
@@ -107,9 +194,10 @@ class OptionsAnalyzer:
         # Plot IV
         self.plot_iv(hist_data, ticker)
 
-    def show_options_chain(self, stock, ticker):
+    def show_options_chain(self, stock, ticker, spot):
         # Get options expiration dates
-        expirations = stock.options
+        chain_cache = get_default_chain_cache()
+        expirations = chain_cache.get_expirations(ticker, stock)
         
         # Create expiration date dropdown
         ttk.Label(self.analysis_frame, 
@@ -122,38 +210,118 @@ class OptionsAnalyzer:
         exp_combo.set(expirations[0])
         
         def update_chain(*args):
-            chain = stock.option_chain(exp_var.get())
-            
-            # Display calls
-            calls_frame = ttk.LabelFrame(self.analysis_frame, text="Calls")
-            calls_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+            # Chains not cached yet are downloaded in the background
+            expiration = exp_var.get()
+            self.status_var.set(f"Loading {expiration} chain...")
+            self.task = self.runner.submit(lambda task: self.load_chain(ticker, expiration, stock, spot),
+                                           on_done=show_chain, on_error=self.show_error)
             
-            calls = chain.calls[['strike', 'lastPrice', 'impliedVolatility', 
-                               'volume', 'openInterest']]
-            calls['impliedVolatility'] = calls['impliedVolatility'] * 100
+        def show_chain(chain):
+            self.status_var.set("Ready")
             
-            tree = ttk.Treeview(calls_frame)
-            tree["columns"] = list(calls.columns)
-            tree["show"] = "headings"
-            
-            for column in calls.columns:
-                tree.heading(column, text=column)
-                tree.column(column, width=100)
-            
-            for idx, row in calls.iterrows():
-                tree.insert("", "end", values=list(row.round(2)))
-            
-            # Add scrollbar
-            scrollbar = ttk.Scrollbar(calls_frame, orient="vertical", 
-                                    command=tree.yview)
-            scrollbar.pack(side="right", fill="y")
-            tree.configure(yscrollcommand=scrollbar.set)
-            tree.pack(fill="both", expand=True)
+            # Display calls and puts side by side
+            for column_index, (title, options) in enumerate([("Calls", chain.calls), ("Puts", chain.puts)]):
+                options_frame = ttk.LabelFrame(self.analysis_frame, text=title)
+                options_frame.grid(row=1, column=column_index, sticky="nsew", padx=5, pady=5)
+                
+                columns = ['strike', 'lastPrice', 'impliedVolatility', 
+                           'volume', 'openInterest', 'delta', 'gamma', 'vega', 'theta']
+                table = VirtualTable(options_frame, columns=columns, height=20)
+                
+                for column in columns:
+                    table.tree.column(column, width=80)
+                
+                # Only the rows in view are formatted; Greeks need more than two decimals to be readable
+                table.set_data(options, formats={
+                    'strike': '{:.2f}', 'lastPrice': '{:.2f}', 'impliedVolatility': lambda v: f"{v * 100:.2f}",
+                    'volume': lambda v: str(int(v)), 'openInterest': lambda v: str(int(v)),
+                    'delta': '{:.3f}', 'gamma': '{:.4f}', 'vega': '{:.3f}', 'theta': '{:.3f}'})
+                table.pack(fill="both", expand=True)
             
         exp_combo.bind('<<ComboboxSelected>>', update_chain)
         update_chain()
 
+    def show_iv_surface(self, ticker):
+        surface = get_default_surface_cache().cached(ticker)
+        if surface is None:
+            messagebox.showwarning("Warning", "No options available for this stock")
+            return
+        earnings = self.next_earnings(ticker)
+        earnings_expiration = surface.expiration_after(earnings) if earnings is not None else None
+        
+        # Moves priced around the next earnings report
+        summary = ttk.LabelFrame(self.analysis_frame, text="Earnings")
+        summary.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        if earnings_expiration is not None:
+            move = surface.expected_move(earnings)
+            event_move = surface.event_move(earnings)
+            ttk.Label(summary, text=f"Next earnings: {earnings:%Y-%m-%d}").grid(row=0, column=0, sticky="w")
+            ttk.Label(summary, text=f"Expected move by {earnings_expiration}: "
+                                    f"+/-${move:.2f} ({move / surface.spot:.1%})").grid(row=1, column=0, sticky="w")
+            ttk.Label(summary, text="Earnings move alone: " +
+                      (f"+/-{event_move:.1%}" if event_move is not None else "N/A")).grid(row=2, column=0, sticky="w")
+        else:
+            ttk.Label(summary, text="No upcoming earnings within the listed expirations").grid(row=0, column=0)
+        
+        # Term structure, the expiration that covers earnings highlighted
+        term_frame = ttk.LabelFrame(self.analysis_frame, text="Term Structure")
+        term_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        term = surface.term_structure()
+        tree = ttk.Treeview(term_frame, columns=['expiration', 'days', 'atm_iv', 'expected_move'], show="headings")
+        for column in tree["columns"]:
+            tree.heading(column, text=column)
+            tree.column(column, width=100)
+        for expiration, row in term.iterrows():
+            tags = ('earnings',) if expiration == earnings_expiration else ()
+            tree.insert("", "end", tags=tags, values=[
+                expiration, f"{row['days']:.0f}",
+                f"{row['atm_iv'] * 100:.1f}%" if pd.notnull(row['atm_iv']) else "N/A",
+                f"+/-${row['expected_move']:.2f}" if pd.notnull(row['expected_move']) else "N/A"])
+        tree.tag_configure('earnings', background='#fff2cc')
+        scrollbar = ttk.Scrollbar(term_frame, orient="vertical", command=tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(fill="both", expand=True)
+        
+        self.plot_iv_surface(surface, ticker, earnings)
+
+    def plot_iv_surface(self, surface, ticker, earnings=None):
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        for widget in self.chart_frame.winfo_children():
+            widget.destroy()
+            
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+        term = surface.term_structure()
+        ax1.plot(term['days'], term['atm_iv'] * 100, marker='o')
+        if earnings is not None:
+            ax1.axvline(x=(earnings - pd.Timestamp.today().normalize()).days, color='r',
+                        linestyle='--', label='Earnings')
+            ax1.legend()
+        ax1.set_title(f'{ticker} ATM IV Term Structure')
+        ax1.set_xlabel('Days to Expiration')
+        ax1.set_ylabel('IV (%)')
+        ax1.grid(True)
+        
+        # Smile of each expiration on the common strike grid
+        grid = surface.frame()
+        for expiration, smile in grid.iterrows():
+            ax2.plot(grid.columns, smile * 100, label=expiration)
+        ax2.axvline(x=surface.spot, color='blue', linestyle='--')
+        ax2.set_title(f'{ticker} IV Surface by Expiration')
+        ax2.set_xlabel('Strike Price')
+        ax2.set_ylabel('IV (%)')
+        ax2.legend(fontsize='x-small', ncol=2)
+        ax2.grid(True)
+        
+        plt.tight_layout()
+        canvas = FigureCanvasTkAgg(fig, self.chart_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
     def plot_iv(self, hist_data, ticker):
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         # Clear previous chart
         for widget in self.chart_frame.winfo_children():
             widget.destroy()
@@ -181,27 +349,44 @@ class OptionsAnalyzer:
             messagebox.showerror("Error", "Please run analysis first")
             return
             
-        try:
-            stock = yf.Ticker(ticker)
-            hist_data = stock.history(period='1y')
-            
-            # Export to Excel
-            filename = f"{ticker}_options_analysis.xlsx"
-            with pd.ExcelWriter(filename) as writer:
-                hist_data.to_excel(writer, sheet_name='Historical Data')
-                
-                # Add options data if available
-                if stock.options:
-                    chain = stock.option_chain(stock.options[0])
-                    chain.calls.to_excel(writer, sheet_name='Calls')
-                    chain.puts.to_excel(writer, sheet_name='Puts')
-                    
-            messagebox.showinfo("Success", f"Data exported to {filename}")
+        # Downloads, IV solving and Greeks run in the background
+        if self.export_task is not None:
+            self.export_task.cancel()
+        self.status_var.set(f"Exporting {ticker}...")
+        self.export_task = self.runner.submit(self.write_data, ticker,
+                                              on_done=self.show_export, on_error=self.show_export_error)
+
+    def write_data(self, task, ticker):
+        """Background job: history and the nearest chain with Greeks written to an Excel file"""
+        import yfinance as yf
+        stock = yf.Ticker(ticker)
+        hist_data = stock.history(period='1y')
+        
+        # Export to Excel
+        filename = f"{ticker}_options_analysis.xlsx"
+        with pd.ExcelWriter(filename) as writer:
+            hist_data.to_excel(writer, sheet_name='Historical Data')
             
-        except Exception as e:
-            messagebox.showerror("Error", f"Export failed: {str(e)}")
+            # Add options data if available
+            chain_cache = get_default_chain_cache()
+            expirations = chain_cache.get_expirations(ticker, stock)
+            if expirations:
+                # Same Greeks columns as the chain view, reused if it already computed them
+                chain = self.load_chain(ticker, expirations[0], stock, hist_data['Close'].iloc[-1])
+                chain.calls.to_excel(writer, sheet_name='Calls')
+                chain.puts.to_excel(writer, sheet_name='Puts')
+        return filename
+
+    def show_export(self, filename):
+        self.status_var.set("Ready")
+        messagebox.showinfo("Success", f"Data exported to {filename}")
+
+    def show_export_error(self, e):
+        self.status_var.set("Error")
+        messagebox.showerror("Error", f"Export failed: {str(e)}")
 
     def export_report(self):
+        from docx import Document
         # Create Word document report
         doc = Document()
         doc.add_heading('Options Analysis Report', 0)
@@ -220,6 +405,7 @@ class OptionsAnalyzer:
 
     def run(self):
         self.root.mainloop()
+        self.runner.shutdown()
 
 if __name__ == "__main__":
     app = OptionsAnalyzer()
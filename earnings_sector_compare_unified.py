@@ -1,97 +1,60 @@
-import yfinance as yf
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-from docx import Document
-from docx.shared import Inches
-import os
 from typing import List, Dict, Optional
 import warnings
+from price_store import PriceStore, RangeCache, get_default_store
+from earnings_calendar import EarningsCalendar, get_default_calendar
+from iv_table import IVTable, get_default_iv_table
+from indicators import add_indicators
 warnings.filterwarnings('ignore')
 
 class UnifiedAnalyzer:
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, store: Optional[PriceStore] = None, calendar: Optional[EarningsCalendar] = None,
+                 iv_table: Optional[IVTable] = None):
+        self.cache = RangeCache()
+        self.store = store or get_default_store()
+        self.calendar = calendar or get_default_calendar()
+        self.iv_table = iv_table or get_default_iv_table()
         self.current_results = {}
         self.current_er_date = None
 
     def get_earnings_dates(self, ticker: str) -> List[datetime]:
         """Fetch historical earnings dates for a ticker"""
-        try:
-            stock = yf.Ticker(ticker)
-            earnings_history = stock.earnings_dates
-            
-            if earnings_history is None or earnings_history.empty:
-                return []
-                
-            dates = earnings_history.index
-            if dates.tz is not None:
-                dates = dates.tz_localize(None)
-            
-            return sorted(dates, reverse=True)[:8]
-            
-        except Exception as e:
-            print(f"Error fetching earnings dates for {ticker}: {e}")
-            return []
+        return self.calendar.get_earnings_dates(ticker, limit=8)
 
-    def get_stock_data(self, ticker: str, start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
-        """Get stock price data with caching"""
+    def get_stock_data(self, ticker: str, start_date: datetime, end_date: datetime,
+                       include_iv: bool = False) -> Optional[pd.DataFrame]:
+        """Get stock price data with caching; ``include_iv`` adds the recorded IV (%) of each date"""
         try:
             start_date = pd.to_datetime(start_date).tz_localize(None)
             extended_start = start_date - timedelta(days=400)
             end_date = pd.to_datetime(end_date).tz_localize(None)
             
-            cache_key = f"{ticker}_{start_date}_{end_date}"
-            if cache_key in self.cache:
-                return self.cache[cache_key]
+            # Serve any window that falls inside an already computed range
+            data = self.cache.get(ticker, extended_start, end_date)
+            if data is None:
+                load_start, load_end = self.cache.span(ticker, extended_start, end_date)
+                data = self.store.get_history(ticker, load_start, load_end)
+                if data is None or data.empty:
+                    return None
                 
-            stock = yf.Ticker(ticker)
-            data = stock.history(start=extended_start, end=end_date)
+                # Calculate all metrics: returns, RSI, moving averages and historical volatility
+                add_indicators(data, ['Daily_Return', 'RSI', 'MA50', 'MA200', 'Historical_Vol'])
+                self.cache.put(ticker, load_start, load_end, data)
             
-            if not data.empty:
-                if data.index.tz is not None:
-                    data.index = data.index.tz_localize(None)
-                
-                # Calculate all metrics
-                data['Daily_Return'] = data['Close'].pct_change()
-                data['Cumulative_Return'] = (1 + data['Daily_Return']).cumprod() - 1
-                
-                # RSI
-                delta = data['Close'].diff()
-                gain = delta.where(delta > 0, 0)
-                loss = -delta.where(delta < 0, 0)
-                avg_gain = gain.rolling(window=14).mean()
-                avg_loss = loss.rolling(window=14).mean()
-                rs = avg_gain / avg_loss
-                data['RSI'] = 100 - (100 / (1 + rs))
-                
-                # Moving Averages
-                data['MA50'] = data['Close'].rolling(window=50).mean()
-                data['MA200'] = data['Close'].rolling(window=200).mean()
-                
-                # Historical Volatility
-                data['Historical_Vol'] = data['Daily_Return'].rolling(window=20).std() * np.sqrt(252) * 100
-                
-                # Get IV if available
-                try:
-                    options = stock.options
-                    if options:
-                        nearest_option = stock.option_chain(options[0])
-                        data['IV'] = nearest_option.calls['impliedVolatility'].mean() * 100
-                    else:
-                        data['IV'] = None
-                except:
-                    data['IV'] = None
-                
-                data = data[data.index >= start_date]
-                self.cache[cache_key] = data
-                return data
-                
-            return None
+            # Trim the data back to the requested date range
+            window = data[(data.index >= start_date) & (data.index <= end_date)].copy()
+            if not window.empty:
+                # Returns accumulate from the first bar of the extended range
+                first_close = data.loc[data.index >= extended_start, 'Close'].iloc[0]
+                window['Cumulative_Return'] = window['Close'] / first_close - 1
+                if include_iv:
+                    # One value per recorded date rather than today's IV on every bar
+                    self.iv_table.current(ticker)
+                    window['IV'] = self.iv_table.for_index(ticker, window.index) * 100
+            return window
             
         except Exception as e:
             print(f"Error fetching data for {ticker}: {e}")
@@ -100,8 +63,9 @@ class UnifiedAnalyzer:
     def get_price_levels(self, ticker: str) -> Dict:
         """Get price levels including 52-week and all-time highs"""
         try:
-            stock = yf.Ticker(ticker)
-            hist_data = stock.history(period="max")
+            hist_data = self.store.get_full_history(ticker)
+            if hist_data is None:
+                return None
             
             current_price = hist_data['Close'][-1]
             all_time_high = hist_data['High'].max()
@@ -0,0 +1,39 @@
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+# Trading-day offsets around an event, 0 being the first session on or after it
+DEFAULT_OFFSETS = np.arange(-5, 6)
+
+
+def _event_index(event_dates: Sequence) -> pd.DatetimeIndex:
+    dates = pd.DatetimeIndex(pd.to_datetime(list(event_dates)))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return dates
+
+
+def event_positions(index: pd.DatetimeIndex, event_dates: Sequence,
+                    offsets: Sequence[int] = DEFAULT_OFFSETS) -> np.ndarray:
+    """Bar positions for each event and offset (events x offsets), -1 where out of range.
+
+    Offsets count trading sessions in ``index``, so weekends and holidays never
+    shift a window. ``index`` must be sorted.
+    """
+    anchors = index.searchsorted(_event_index(event_dates), side='left')
+    positions = anchors[:, None] + np.asarray(offsets, dtype=np.int64)[None, :]
+    valid = (positions >= 0) & (positions < len(index))
+    return np.where(valid, positions, -1)
+
+
+def event_windows(series: pd.Series, event_dates: Sequence,
+                  offsets: Sequence[int] = DEFAULT_OFFSETS) -> pd.DataFrame:
+    """Values of a sorted series around each event, one row per event and one column per offset"""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    positions = event_positions(series.index, event_dates, offsets)
+    values = series.to_numpy(dtype=float)
+    windows = np.full(positions.shape, np.nan)
+    found = positions >= 0
+    windows[found] = values[positions[found]]
+    return pd.DataFrame(windows, index=_event_index(event_dates), columns=offsets)
@@ -0,0 +1,210 @@
+from collections import namedtuple
+from datetime import timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from option_cache import MARKET_CLOSE, MARKET_TZ
+
+# Annual risk-free rate used to discount strikes, continuously compounded
+RISK_FREE_RATE = 0.04
+# Volatilities the solver searches between
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+# Time left on an expiring contract is never taken as less than an hour
+MIN_YEARS = 1.0 / (365 * 24)
+
+OptionChain = namedtuple('OptionChain', ['calls', 'puts'])
+
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+
+def norm_pdf(x):
+    x = np.asarray(x, dtype=float)
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def norm_cdf(x):
+    """Standard normal CDF to double precision (Hart's rational approximation), no SciPy needed"""
+    x = np.asarray(x, dtype=float)
+    a = np.abs(x)
+    e = np.exp(-0.5 * a * a)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        num = ((((((3.52624965998911e-02 * a + 0.700383064443688) * a + 6.37396220353165) * a
+                  + 33.912866078383) * a + 112.079291497871) * a + 221.213596169931) * a + 220.206867912376)
+        den = (((((((8.83883476483184e-02 * a + 1.75566716318264) * a + 16.064177579207) * a
+                   + 86.7807322029461) * a + 296.564248779674) * a + 637.333633378831) * a
+                + 793.826512519948) * a + 440.413735824752)
+        near = e * num / den
+        far = e / (a + 1.0 / (a + 2.0 / (a + 3.0 / (a + 4.0 / (a + 0.65))))) / _SQRT_2PI
+    tail = np.where(a < 7.07106781186547, near, np.where(a < 37.0, far, 0.0))
+    return np.where(x > 0, 1.0 - tail, tail)
+
+
+def _d1(spot, strike, years, rate, sigma, dividend):
+    root = sigma * np.sqrt(years)
+    return (np.log(spot / strike) + (rate - dividend + 0.5 * sigma * sigma) * years) / root, root
+
+
+def bs_price(spot, strike, years, rate, sigma, is_call, dividend=0.0):
+    """Black-Scholes price of European calls (is_call True) or puts, elementwise"""
+    d1, root = _d1(spot, strike, years, rate, sigma, dividend)
+    d2 = d1 - root
+    forward = spot * np.exp(-dividend * years)
+    discounted = strike * np.exp(-rate * years)
+    call = forward * norm_cdf(d1) - discounted * norm_cdf(d2)
+    return np.where(is_call, call, call - forward + discounted)
+
+
+def bs_vega(spot, strike, years, rate, sigma, dividend=0.0):
+    """Price sensitivity to volatility (per 1.00 of volatility), the same for calls and puts"""
+    d1, _ = _d1(spot, strike, years, rate, sigma, dividend)
+    return spot * np.exp(-dividend * years) * norm_pdf(d1) * np.sqrt(years)
+
+
+def bs_greeks(spot, strike, years, rate, sigma, is_call, dividend=0.0) -> Dict[str, np.ndarray]:
+    """Delta, gamma, vega (per volatility point) and theta (per calendar day), elementwise"""
+    d1, root = _d1(spot, strike, years, rate, sigma, dividend)
+    d2 = d1 - root
+    carry = np.exp(-dividend * years)
+    discounted = strike * np.exp(-rate * years)
+    density = norm_pdf(d1)
+    n1, n2 = norm_cdf(d1), norm_cdf(d2)
+    decay = -spot * carry * density * sigma / (2.0 * np.sqrt(years))
+    call_theta = decay - rate * discounted * n2 + dividend * spot * carry * n1
+    put_theta = decay + rate * discounted * (1.0 - n2) - dividend * spot * carry * (1.0 - n1)
+    return {
+        'delta': np.where(is_call, carry * n1, carry * (n1 - 1.0)),
+        'gamma': carry * density / (spot * root),
+        'vega': spot * carry * density * np.sqrt(years) / 100.0,
+        'theta': np.where(is_call, call_theta, put_theta) / 365.0,
+    }
+
+
+def implied_volatility(price, spot, strike, years, rate=RISK_FREE_RATE, is_call=True, dividend=0.0,
+                       tol: float = 1e-8, max_iter: int = 100) -> np.ndarray:
+    """Black-Scholes implied volatility of many options at once; NaN where no volatility fits.
+
+    Each option keeps a bracket [low, high] around its solution. A Newton
+    step is taken when it lands inside the bracket and bisection otherwise,
+    so deep in- or out-of-the-money contracts with tiny vega still converge.
+    Prices outside the no-arbitrage bounds have no solution.
+    """
+    price, spot, strike, years, rate, is_call, dividend = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (price, spot, strike, years, rate, is_call, dividend)))
+    shape = price.shape
+    price, spot, strike, years, rate, dividend = (v.ravel() for v in (price, spot, strike, years, rate, dividend))
+    is_call = is_call.ravel().astype(bool)
+
+    forward = spot * np.exp(-dividend * years)
+    discounted = strike * np.exp(-rate * years)
+    lower = np.maximum(np.where(is_call, forward - discounted, discounted - forward), 0.0)
+    upper = np.where(is_call, forward, discounted)
+    solvable = (np.isfinite(price) & (price > lower) & (price < upper)
+                & (spot > 0) & (strike > 0) & (years > 0))
+
+    sigma = np.full(price.shape, np.nan)
+    idx = np.flatnonzero(solvable)
+    if len(idx) == 0:
+        return sigma.reshape(shape)
+
+    low = np.full(len(idx), MIN_VOL)
+    high = np.full(len(idx), MAX_VOL)
+    # Brenner-Subrahmanyam guess from the time value, clipped into the bracket
+    time_value = price[idx] - lower[idx]
+    guess = np.sqrt(2.0 * np.pi / years[idx]) * time_value / spot[idx]
+    current = np.clip(guess, 0.05, 1.0)
+    active = np.arange(len(idx))
+    for _ in range(max_iter):
+        i = idx[active]
+        s = current[active]
+        model = bs_price(spot[i], strike[i], years[i], rate[i], s, is_call[i], dividend[i])
+        diff = model - price[i]
+        # Tolerance is relative to the time value, the only part volatility explains
+        done = np.abs(diff) < tol * time_value[active]
+        # Price rises with volatility, so the sign of the error moves one end of the bracket
+        high[active] = np.where(diff > 0, s, high[active])
+        low[active] = np.where(diff <= 0, s, low[active])
+        vega = bs_vega(spot[i], strike[i], years[i], rate[i], s, dividend[i])
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            step = s - diff / vega
+        bisect = ~((step > low[active]) & (step < high[active]))
+        current[active] = np.where(done, s, np.where(bisect, 0.5 * (low[active] + high[active]), step))
+        active = active[~done & (high[active] - low[active] > tol * s)]
+        if len(active) == 0:
+            break
+    # Solutions pinned at the edge of the search range are not real fits
+    edge = (current <= MIN_VOL * (1 + 1e-6)) | (current >= MAX_VOL * (1 - 1e-6))
+    sigma[idx] = np.where(edge, np.nan, current)
+    return sigma.reshape(shape)
+
+
+def years_to_expiry(expiration, as_of: Optional[pd.Timestamp] = None) -> float:
+    """Years from ``as_of`` (default now) to the close on an expiration date ('YYYY-MM-DD')"""
+    now = pd.Timestamp.now(tz=MARKET_TZ) if as_of is None else pd.Timestamp(as_of)
+    if now.tz is None:
+        now = now.tz_localize(MARKET_TZ)
+    expiry = pd.Timestamp(expiration).tz_localize(MARKET_TZ) + timedelta(hours=MARKET_CLOSE[0], minutes=MARKET_CLOSE[1])
+    return max((expiry - now).total_seconds() / (365.0 * 24 * 3600), MIN_YEARS)
+
+
+def mid_prices(options: pd.DataFrame) -> np.ndarray:
+    """Bid/ask midpoint of each contract, or the last trade where the quote is one-sided or crossed"""
+    bid = options['bid'].to_numpy(dtype=float) if 'bid' in options else np.full(len(options), np.nan)
+    ask = options['ask'].to_numpy(dtype=float) if 'ask' in options else np.full(len(options), np.nan)
+    last = options['lastPrice'].to_numpy(dtype=float) if 'lastPrice' in options else np.full(len(options), np.nan)
+    quoted = (bid > 0) & (ask >= bid)
+    return np.where(quoted, 0.5 * (bid + ask), np.where(last > 0, last, np.nan))
+
+
+def solve_options(options: pd.DataFrame, spot: float, expiration, is_call: bool,
+                  rate: float = RISK_FREE_RATE, as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Copy of a calls or puts table with ``impliedVolatility`` recomputed from mid prices.
+
+    The vendor's value is kept only for contracts whose price has no solution.
+    """
+    options = options.copy()
+    if options.empty or spot is None or not spot > 0:
+        return options
+    solved = implied_volatility(mid_prices(options), spot, options['strike'].to_numpy(dtype=float),
+                                years_to_expiry(expiration, as_of), rate, is_call)
+    if 'impliedVolatility' in options:
+        vendor = options['impliedVolatility'].to_numpy(dtype=float)
+        solved = np.where(np.isnan(solved) & (vendor > 0), vendor, solved)
+    options['impliedVolatility'] = solved
+    return options
+
+
+def solve_chain(chain, spot: float, expiration, rate: float = RISK_FREE_RATE,
+                as_of: Optional[pd.Timestamp] = None) -> Optional[OptionChain]:
+    """Option chain with calls and puts IV recomputed from their quotes, in two vectorized solves"""
+    if chain is None:
+        return None
+    return OptionChain(solve_options(chain.calls, spot, expiration, True, rate, as_of),
+                       solve_options(chain.puts, spot, expiration, False, rate, as_of))
+
+
+def add_greeks(options: pd.DataFrame, spot: float, expiration, is_call: bool,
+               rate: float = RISK_FREE_RATE, as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Copy of a calls or puts table with delta, gamma, vega and theta columns from its IV"""
+    options = options.copy()
+    if options.empty or spot is None or not spot > 0:
+        return options
+    sigma = options['impliedVolatility'].to_numpy(dtype=float)
+    sigma = np.where(sigma > 0, sigma, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        greeks = bs_greeks(spot, options['strike'].to_numpy(dtype=float), years_to_expiry(expiration, as_of),
+                           rate, sigma, is_call)
+    for name, values in greeks.items():
+        options[name] = values
+    return options
+
+
+def add_chain_greeks(chain, spot: float, expiration, rate: float = RISK_FREE_RATE,
+                     as_of: Optional[pd.Timestamp] = None) -> Optional[OptionChain]:
+    """Option chain with Greeks columns on calls and puts, one batched computation per side"""
+    if chain is None:
+        return None
+    return OptionChain(add_greeks(chain.calls, spot, expiration, True, rate, as_of),
+                       add_greeks(chain.puts, spot, expiration, False, rate, as_of))
@@ -0,0 +1,476 @@
+import copy
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from indicators import TRADING_DAYS, ema
+from price_store import get_default_store
+
+# Indicator states are kept next to the price files they were computed from
+STATE_SUBDIR = 'indicators'
+
+
+# Each tracker below takes one bar at a time and holds only what its window
+# needs, so appending a bar costs O(1) instead of recomputing the history.
+# Outputs match the vectorized functions in indicators.py.
+
+
+class _Tracker:
+    """Base for incremental indicators whose state can be saved as arrays"""
+
+    # Attributes making up the state; nested trackers are saved under a prefix
+    _fields: Tuple[str, ...] = ()
+
+    def state(self, prefix: str = '') -> Dict[str, np.ndarray]:
+        arrays = {}
+        for field in self._fields:
+            value = getattr(self, field)
+            if isinstance(value, _Tracker):
+                arrays.update(value.state(f"{prefix}{field}."))
+            else:
+                arrays[prefix + field] = np.asarray(value)
+        return arrays
+
+    def load(self, arrays: Mapping[str, np.ndarray], prefix: str = ''):
+        for field in self._fields:
+            value = getattr(self, field)
+            if isinstance(value, _Tracker):
+                value.load(arrays, f"{prefix}{field}.")
+            elif isinstance(value, np.ndarray):
+                setattr(self, field, np.array(arrays[prefix + field], dtype=value.dtype))
+            else:
+                setattr(self, field, type(value)(arrays[prefix + field][()]))
+        return self
+
+
+class _ValueTracker(_Tracker, ABC):
+    """Tracker fed one close per bar"""
+
+    @abstractmethod
+    def seed(self, values: np.ndarray):
+        """Take the state left after the given history"""
+
+    @abstractmethod
+    def update(self, value: float):
+        """Add one value and return the indicator's new value"""
+
+
+class _ReplayTracker(_ValueTracker):
+    """Tracker whose state is fully determined by the last few bars, seeded by replaying them"""
+
+    def seed(self, values: np.ndarray):
+        for value in np.asarray(values, dtype=float)[-self.memory():]:
+            self.update(value)
+        return self
+
+    @abstractmethod
+    def memory(self) -> int:
+        """Number of trailing bars that fully determine the state"""
+
+
+class _RollingWindow(_ReplayTracker):
+    """Last ``window`` values in a ring buffer with running sums of the values and their squares"""
+
+    _fields = ('values', 'pos', 'count', 'offset', 'total', 'squares', 'missing')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = np.full(window, np.nan)
+        self.pos = 0
+        self.count = 0
+        # Sums are kept relative to the first value so they stay small
+        self.offset = np.nan
+        self.total = 0.0
+        self.squares = 0.0
+        self.missing = 0
+
+    def memory(self) -> int:
+        return self.window
+
+    def push(self, value: float):
+        if np.isnan(self.offset) and not np.isnan(value):
+            self.offset = value
+        if self.count >= self.window:
+            old = self.values[self.pos]
+            if np.isnan(old):
+                self.missing -= 1
+            else:
+                self.total -= old - self.offset
+                self.squares -= (old - self.offset) ** 2
+        if np.isnan(value):
+            self.missing += 1
+        else:
+            self.total += value - self.offset
+            self.squares += (value - self.offset) ** 2
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % self.window
+        self.count += 1
+        if self.pos == 0:
+            # Exact sums once per lap keep rounding errors from building up
+            centered = self.values[~np.isnan(self.values)] - self.offset
+            self.total = float(centered.sum())
+            self.squares = float((centered * centered).sum())
+
+    def ready(self) -> bool:
+        return self.count >= self.window and self.missing == 0
+
+
+class StreamingSMA(_RollingWindow):
+    """Simple moving average, NaN until ``window`` valid values are held"""
+
+    def update(self, value: float) -> float:
+        self.push(value)
+        if not self.ready():
+            return np.nan
+        return self.offset + self.total / self.window
+
+
+class StreamingStd(_RollingWindow):
+    """Rolling sample standard deviation over ``window`` values"""
+
+    def __init__(self, window: int, ddof: int = 1):
+        super().__init__(window)
+        self.ddof = ddof
+
+    def update(self, value: float) -> float:
+        self.push(value)
+        if not self.ready() or self.window <= self.ddof:
+            return np.nan
+        variance = (self.squares - self.total * self.total / self.window) / (self.window - self.ddof)
+        return float(np.sqrt(max(variance, 0.0)))
+
+
+class StreamingEMA(_ValueTracker):
+    """Exponential moving average seeded with the first value; missing values are skipped"""
+
+    _fields = ('value',)
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1.0)
+        self.span = span
+        self.value = np.nan
+
+    def seed(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        averages = ema(values, self.span)
+        finite = averages[~np.isnan(averages)]
+        self.value = float(finite[-1]) if len(finite) else np.nan
+        return self
+
+    def update(self, value: float) -> float:
+        if np.isnan(value):
+            return self.value
+        if np.isnan(self.value):
+            self.value = float(value)
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class StreamingReturn(_ReplayTracker):
+    """Change from the previous close"""
+
+    _fields = ('previous',)
+
+    def __init__(self):
+        self.previous = np.nan
+
+    def memory(self) -> int:
+        return 1
+
+    def update(self, value: float) -> float:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = float(np.float64(value) / self.previous - 1.0)
+        self.previous = float(value)
+        return change
+
+
+class StreamingVolatility(_ReplayTracker):
+    """Annualized ``window``-day volatility of daily returns, in percent"""
+
+    _fields = ('returns', 'deviation')
+
+    def __init__(self, window: int = 20):
+        self.returns = StreamingReturn()
+        self.deviation = StreamingStd(window)
+
+    def memory(self) -> int:
+        return self.deviation.window + 1
+
+    def update(self, value: float) -> float:
+        return self.deviation.update(self.returns.update(value)) * np.sqrt(TRADING_DAYS) * 100
+
+
+class StreamingRSI(_ReplayTracker):
+    """Relative strength index from simple averages of gains and losses over ``window`` bars"""
+
+    _fields = ('previous', 'started', 'gains', 'losses')
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.previous = np.nan
+        self.started = False
+        self.gains = StreamingSMA(window)
+        self.losses = StreamingSMA(window)
+
+    def memory(self) -> int:
+        return self.window + 1
+
+    def update(self, value: float) -> float:
+        if not self.started:
+            # Bars before the first close are not part of the history
+            if np.isnan(value):
+                return np.nan
+            self.started = True
+        # An undefined move counts as flat
+        delta = value - self.previous
+        self.previous = float(value)
+        gain = self.gains.update(max(delta, 0.0) if not np.isnan(delta) else 0.0)
+        loss = self.losses.update(max(-delta, 0.0) if not np.isnan(delta) else 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float(100.0 - 100.0 / (1.0 + np.float64(gain) / loss))
+
+
+class StreamingMACD(_ValueTracker):
+    """MACD line, signal line and histogram"""
+
+    _fields = ('fast', 'slow', 'signal')
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+
+    def seed(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        self.fast.seed(values)
+        self.slow.seed(values)
+        self.signal.seed(ema(values, self.fast.span) - ema(values, self.slow.span))
+        return self
+
+    def update(self, value: float) -> Tuple[float, float, float]:
+        line = self.fast.update(value) - self.slow.update(value)
+        signal_line = self.signal.update(line)
+        return line, signal_line, line - signal_line
+
+
+class StreamingADL(_Tracker):
+    """Accumulation/distribution line; bars without a price range add nothing.
+
+    Fed whole bars (``seed_bars``/``update_bar``) rather than one close.
+    """
+
+    _fields = ('total',)
+
+    def __init__(self):
+        self.total = 0.0
+
+    @staticmethod
+    def flows(high, low, close, volume) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return ((close - low) - (high - close)) / (high - low) * volume
+
+    def seed_bars(self, high, low, close, volume):
+        self.total = float(np.nansum(self.flows(*(np.asarray(x, dtype=float) for x in (high, low, close, volume)))))
+        return self
+
+    def update_bar(self, high: float, low: float, close: float, volume: float) -> float:
+        flow = self.flows(np.float64(high), low, close, volume)
+        if np.isnan(flow):
+            return np.nan
+        self.total += float(flow)
+        return self.total
+
+
+def split_forming(data: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Bars of finished sessions, and today's bar which is still forming"""
+    today = pd.Timestamp.now(tz=data.index.tz).normalize() if len(data) else pd.Timestamp.today().normalize()
+    return data[data.index < today], data[data.index >= today]
+
+
+_NAMED = re.compile(r'^(MA|EMA|RSI)(\d*)$')
+_MACD_OUTPUTS = ('MACD', 'Signal_Line', 'MACD_Histogram')
+
+
+def _tracker_for(name: str) -> Tuple[str, _Tracker]:
+    """Key and tracker computing a named indicator (names as in indicators.compute_indicators, plus ADL)"""
+    match = _NAMED.match(name)
+    if name == 'Daily_Return':
+        return name, StreamingReturn()
+    if name == 'Historical_Vol':
+        return name, StreamingVolatility()
+    if name == 'ADL':
+        return name, StreamingADL()
+    if name in _MACD_OUTPUTS:
+        return 'MACD', StreamingMACD()
+    if match and match.group(1) == 'RSI':
+        window = int(match.group(2) or 14)
+        return f'RSI{window}', StreamingRSI(window)
+    if match and match.group(2):
+        window = int(match.group(2))
+        if match.group(1) == 'MA':
+            return name, StreamingSMA(window)
+        return name, StreamingEMA(window)
+    raise ValueError(f"Unknown indicator: {name}")
+
+
+class IndicatorState:
+    """Incremental state for a set of named indicators of one ticker.
+
+    ``seed`` takes the state from a loaded history and ``advance`` then adds
+    new bars one at a time, producing the same values the vectorized
+    indicators would give for the extended history.
+    """
+
+    def __init__(self, indicators: Iterable[str], column: str = 'Close'):
+        self.names = list(dict.fromkeys(indicators))
+        self.column = column
+        self.last_date: Optional[pd.Timestamp] = None
+        self.trackers: Dict[str, _Tracker] = {}
+        self._keys: Dict[str, str] = {}
+        for name in self.names:
+            key, tracker = _tracker_for(name)
+            self.trackers.setdefault(key, tracker)
+            self._keys[name] = key
+
+    def seed(self, data: pd.DataFrame):
+        """Take the state left after the bars in ``data``"""
+        values = data[self.column].to_numpy(dtype=float)
+        for tracker in self.trackers.values():
+            if isinstance(tracker, StreamingADL):
+                tracker.seed_bars(data['High'], data['Low'], data['Close'], data['Volume'])
+            else:
+                tracker.seed(values)
+        if not data.empty:
+            self.last_date = data.index[-1]
+        return self
+
+    def update(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """Add one bar and return each indicator's new value"""
+        outputs = {}
+        for key, tracker in self.trackers.items():
+            if isinstance(tracker, StreamingADL):
+                outputs[key] = tracker.update_bar(bar['High'], bar['Low'], bar['Close'], bar['Volume'])
+            else:
+                outputs[key] = tracker.update(float(bar[self.column]))
+        values = {}
+        for name in self.names:
+            value = outputs[self._keys[name]]
+            values[name] = value[_MACD_OUTPUTS.index(name)] if name in _MACD_OUTPUTS else value
+        return values
+
+    def advance(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """Add the bars dated after the last one seen and return their indicator rows"""
+        if self.last_date is not None:
+            bars = bars[bars.index > self.last_date]
+        rows = [self.update(bar) for _, bar in bars.iterrows()]
+        if not bars.empty:
+            self.last_date = bars.index[-1]
+        return pd.DataFrame(rows, index=bars.index, columns=self.names)
+
+    def append(self, data: pd.DataFrame, bars: pd.DataFrame) -> pd.DataFrame:
+        """``data`` with the ``bars`` after the last settled one and their indicator rows added.
+
+        Only finished sessions advance the state. Today's bar is computed on
+        a copy, and rows of ``data`` after the last settled bar (an earlier
+        look at today's bar) are replaced, so the final close of a session
+        takes the place of the partial one.
+        """
+        settled, forming = split_forming(bars)
+        known = data if self.last_date is None else data[data.index <= self.last_date]
+        parts = [self.advance(settled)]
+        if not forming.empty:
+            parts.append(copy.deepcopy(self).advance(forming))
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return data
+        rows = pd.concat(parts)
+        return pd.concat([known, bars.loc[rows.index].join(rows)])
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {'__names__': np.array(self.names, dtype=str),
+                  '__column__': np.array(self.column),
+                  '__last_date__': np.array(self.last_date.value if self.last_date is not None else -1)}
+        for key, tracker in self.trackers.items():
+            arrays.update(tracker.state(f"{key}."))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray]) -> 'IndicatorState':
+        state = cls([str(name) for name in arrays['__names__']], str(arrays['__column__'][()]))
+        last_date = int(arrays['__last_date__'][()])
+        state.last_date = pd.Timestamp(last_date) if last_date >= 0 else None
+        for key, tracker in state.trackers.items():
+            tracker.load(arrays, f"{key}.")
+        return state
+
+
+class IndicatorStateStore:
+    """Per-ticker indicator states saved as ``.npz`` files beside the price store.
+
+    A state is only handed back for the indicator set it was saved with, so
+    views tracking different indicators of a ticker never share one.
+    """
+
+    def __init__(self, state_dir=None):
+        self.state_dir = Path(state_dir or os.environ.get('ZMTECH_INDICATOR_STATE',
+                                                          get_default_store().store_dir / STATE_SUBDIR))
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str) -> Path:
+        return self.state_dir / f"{ticker.upper().replace('/', '_')}.npz"
+
+    def get(self, ticker: str, indicators: Iterable[str]) -> Optional[IndicatorState]:
+        """Saved state for a ticker if it tracks exactly these indicators, otherwise None"""
+        path = self._path(ticker)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                state = IndicatorState.from_arrays(arrays)
+        except Exception as e:
+            print(f"Error reading indicator state for {ticker}: {e}")
+            return None
+        return state if state.names == list(dict.fromkeys(indicators)) else None
+
+    def seeded(self, ticker: str, indicators: Iterable[str], data: pd.DataFrame) -> IndicatorState:
+        """State after the finished sessions of ``data``: the saved one if it ends on the same
+        session, otherwise seeded from ``data`` and saved"""
+        settled = split_forming(data)[0]
+        state = self.get(ticker, indicators)
+        if state is not None and not settled.empty and state.last_date == settled.index[-1]:
+            return state
+        state = IndicatorState(indicators).seed(settled)
+        self.put(ticker, state)
+        return state
+
+    def put(self, ticker: str, state: IndicatorState):
+        """Save a ticker's state, replacing the previous one"""
+        path = self._path(ticker)
+        tmp_path = path.with_name(path.stem + '.tmp.npz')
+        try:
+            with self._lock:
+                np.savez(tmp_path, **state.to_arrays())
+                os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error saving indicator state for {ticker}: {e}")
+
+
+_default_state_store = None
+_default_state_store_lock = threading.Lock()
+
+
+def get_default_state_store() -> IndicatorStateStore:
+    """Return the process-wide indicator state store, beside the default price store"""
+    global _default_state_store
+    with _default_state_store_lock:
+        if _default_state_store is None:
+            _default_state_store = IndicatorStateStore()
+        return _default_state_store
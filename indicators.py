@@ -0,0 +1,297 @@
+import re
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Trading days per year, used to annualize volatility
+TRADING_DAYS = 252
+# Largest power of the EMA decay factor a block may divide by before float64 loses range
+_MAX_EMA_SCALE = 1e150
+# Panel cells processed per pass; small enough that the temporaries stay in CPU cache
+_PANEL_BLOCK_CELLS = 1 << 16
+
+
+# Every function below works along axis 0, so a 2-D (time x tickers) panel is
+# processed column-wise in the same calls as a single series.
+
+
+def _window_sums(values: np.ndarray, window: int):
+    """Sums of each trailing window, and a mask of the windows missing a value (None if none are)"""
+    missing = np.isnan(values)
+    has_missing = missing.any()
+    sums = np.cumsum(np.where(missing, 0.0, values) if has_missing else values, axis=0)
+    window_sums = sums[window - 1:].copy()
+    window_sums[1:] -= sums[:-window]
+    if not has_missing:
+        return window_sums, None
+    counts = np.cumsum(missing, axis=0)
+    gaps = counts[window - 1:].copy()
+    gaps[1:] -= counts[:-window]
+    return window_sums, gaps > 0
+
+
+def _first_valid(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row of the first finite value of each column and that value (0 for empty columns)"""
+    finite = np.isfinite(values)
+    rows = finite.argmax(axis=0)
+    firsts = np.take_along_axis(values, np.expand_dims(rows, 0), axis=0)[0]
+    return rows, np.where(finite.any(axis=0), firsts, 0.0)
+
+
+def _leading(values: np.ndarray) -> np.ndarray:
+    """Mask of the rows before each column's first finite value"""
+    starts = _first_valid(values)[0]
+    return np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1)) < starts
+
+
+def _offset(values: np.ndarray) -> np.ndarray:
+    """A typical value per column to subtract before running sums, which keeps them small"""
+    return _first_valid(values)[1]
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average, NaN until ``window`` valid values are available (like rolling().mean())"""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if window <= 0 or len(values) < window:
+        return out
+    offset = _offset(values)
+    means, gaps = _window_sums(values - offset, window)
+    means /= window
+    means += offset
+    if gaps is not None:
+        means[gaps] = np.nan
+    out[window - 1:] = means
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """Rolling sample standard deviation (like rolling().std())"""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if window <= ddof or len(values) < window:
+        return out
+    centered = values - _offset(values)
+    sums, gaps = _window_sums(centered, window)
+    squares, _ = _window_sums(centered * centered, window)
+    squares -= sums * sums / window
+    squares /= window - ddof
+    deviations = np.sqrt(np.maximum(squares, 0.0, out=squares), out=squares)
+    if gaps is not None:
+        deviations[gaps] = np.nan
+    out[window - 1:] = deviations
+    return out
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average seeded with the first value (like ewm(span, adjust=False).mean())"""
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return values.copy()
+    firsts = _first_valid(values)[1]
+    leading = _leading(values)
+    if np.isnan(values[~leading]).any():
+        # Gaps inside the series change the decay between observations
+        return pd.DataFrame(values).ewm(span=span, adjust=False).mean().to_numpy().reshape(values.shape)
+
+    # Holding the first value through the leading gap leaves the average unchanged
+    x = np.where(leading, firsts, values)
+    y = np.empty_like(x)
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    # y[k] = decay**(k+1) * carry + alpha * sum_j decay**(k-j) * x[j], solved in closed
+    # form one block at a time so the powers of decay stay within float64 range
+    block = max(1, min(len(x), int(np.log(_MAX_EMA_SCALE) / -np.log(decay)) if decay > 0 else len(x)))
+    powers = (decay ** np.arange(block + 1)).reshape((-1,) + (1,) * (x.ndim - 1))
+    carry = x[0]
+    for lo in range(0, len(x), block):
+        chunk = x[lo:lo + block]
+        n = len(chunk)
+        if decay > 0:
+            scaled = np.cumsum(chunk / powers[:n], axis=0) * powers[:n]
+        else:
+            scaled = chunk
+        y[lo:lo + n] = powers[1:n + 1] * carry + alpha * scaled
+        carry = y[lo + n - 1]
+    y[leading] = np.nan
+    return y
+
+
+def rsi(values: np.ndarray, window: int = 14) -> np.ndarray:
+    """Relative strength index from simple averages of gains and losses over ``window`` bars"""
+    values = np.asarray(values, dtype=float)
+    delta = np.empty_like(values)
+    delta[:1] = np.nan
+    np.subtract(values[1:], values[:-1], out=delta[1:])
+    # fmax ignores NaN, so undefined moves count as flat; rows before a
+    # column's first value are not part of its history at all
+    leading = _leading(values)
+    gains = sma(np.where(leading, np.nan, np.fmax(delta, 0.0)), window)
+    losses = sma(np.where(leading, np.nan, np.fmax(-delta, 0.0)), window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 - 100.0 / (1.0 + gains / losses)
+
+
+def macd(values: np.ndarray, fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram"""
+    line = ema(values, fast) - ema(values, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def pct_change(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(values[1:], values[:-1], out=out[1:])
+    out[1:] -= 1.0
+    return out
+
+
+_NAMED = re.compile(r'^(MA|EMA|RSI)(\d*)$')
+
+
+def compute_indicators(close, indicators: Iterable[str]) -> Dict[str, np.ndarray]:
+    """Compute the named indicators of a close series, sharing intermediate results.
+
+    Names follow the column names used across the app: ``Daily_Return``,
+    ``MA<n>``, ``EMA<n>``, ``RSI`` (14 bars) or ``RSI<n>``, ``MACD``,
+    ``Signal_Line``, ``MACD_Histogram`` and ``Historical_Vol`` (annualized
+    20-day volatility in percent).
+    """
+    values = np.asarray(close, dtype=float)
+    results: Dict[str, np.ndarray] = {}
+    cache: Dict[Tuple, np.ndarray] = {}
+
+    def cached(key, compute):
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
+    for name in indicators:
+        match = _NAMED.match(name)
+        if name == 'Daily_Return':
+            results[name] = cached(('return',), lambda: pct_change(values))
+        elif name == 'Historical_Vol':
+            returns = cached(('return',), lambda: pct_change(values))
+            results[name] = rolling_std(returns, 20) * np.sqrt(TRADING_DAYS) * 100
+        elif name in ('MACD', 'Signal_Line', 'MACD_Histogram'):
+            line, signal_line, histogram = cached(('macd',), lambda: macd(values))
+            results[name] = {'MACD': line, 'Signal_Line': signal_line, 'MACD_Histogram': histogram}[name]
+        elif match and match.group(1) == 'RSI':
+            window = int(match.group(2) or 14)
+            results[name] = cached(('rsi', window), lambda: rsi(values, window))
+        elif match and match.group(2):
+            window = int(match.group(2))
+            if match.group(1) == 'MA':
+                results[name] = cached(('sma', window), lambda: sma(values, window))
+            else:
+                results[name] = cached(('ema', window), lambda: ema(values, window))
+        else:
+            raise ValueError(f"Unknown indicator: {name}")
+    return results
+
+
+def add_indicators(data: pd.DataFrame, indicators: Iterable[str], column: str = 'Close') -> pd.DataFrame:
+    """Add indicator columns computed from ``data[column]`` in place and return the frame"""
+    for name, values in compute_indicators(data[column].to_numpy(), indicators).items():
+        data[name] = values
+    return data
+
+
+def _stack(frames: Dict[str, pd.DataFrame], column: str) -> np.ndarray:
+    """Each ticker's own bars as one column of a matrix, aligned at the last row.
+
+    Rows are bar counts, not dates: a ticker's history ends on the last row
+    and shorter histories are padded with NaN in front, which every indicator
+    treats as "before the first value". Windows therefore only ever span a
+    ticker's own sessions, exactly as for a single series.
+    """
+    length = max(len(data) for data in frames.values())
+    # Column-major, so each ticker's history is contiguous for the running sums
+    matrix = np.full((length, len(frames)), np.nan, order='F')
+    for j, data in enumerate(frames.values()):
+        matrix[length - len(data):, j] = data[column].to_numpy(dtype=float)
+    return matrix
+
+
+def _calendar(frames: Dict[str, pd.DataFrame]):
+    """Union of the tickers' dates and each ticker's rows in it"""
+    calendar = np.unique(np.concatenate([data.index.values.astype('datetime64[ns]') for data in frames.values()]))
+    rows = {ticker: np.searchsorted(calendar, data.index.values.astype('datetime64[ns]'))
+            for ticker, data in frames.items()}
+    return pd.DatetimeIndex(calendar), rows
+
+
+def _compute_panel(matrix: np.ndarray, indicators: Iterable[str]) -> Dict[str, np.ndarray]:
+    """compute_indicators over a dates x tickers matrix, a cache-sized group of tickers at a time"""
+    indicators = list(indicators)
+    step = max(1, _PANEL_BLOCK_CELLS // max(1, len(matrix)))
+    results: Dict[str, np.ndarray] = {}
+    for lo in range(0, matrix.shape[1], step):
+        computed = compute_indicators(matrix[:, lo:lo + step], indicators)
+        for name, values in computed.items():
+            if name not in results:
+                results[name] = np.empty(matrix.shape, order='F')
+            results[name][:, lo:lo + step] = values
+    return results
+
+
+def align_panel(frames: Dict[str, pd.DataFrame], column: str = 'Close') -> pd.DataFrame:
+    """Line up one column of several tickers on the union of their dates (dates x tickers).
+
+    Dates a ticker has no bar for are NaN.
+    """
+    calendar, rows = _calendar(frames)
+    aligned = np.full((len(calendar), len(frames)), np.nan)
+    for j, (ticker, data) in enumerate(frames.items()):
+        aligned[rows[ticker], j] = data[column].to_numpy(dtype=float)
+    return pd.DataFrame(aligned, index=calendar, columns=list(frames))
+
+
+def panel_indicators(frames: Dict[str, pd.DataFrame], indicators: Iterable[str],
+                     column: str = 'Close') -> Dict[str, pd.DataFrame]:
+    """Compute indicators for all tickers at once, one dates x tickers frame per indicator.
+
+    Each ticker's values are computed on its own bars; dates it has no bar
+    for are NaN.
+    """
+    if not frames:
+        return {}
+    calendar, rows = _calendar(frames)
+    computed = _compute_panel(_stack(frames, column), indicators)
+    result = {}
+    for name, values in computed.items():
+        aligned = np.full((len(calendar), len(frames)), np.nan)
+        for j, (ticker, data) in enumerate(frames.items()):
+            aligned[rows[ticker], j] = values[len(values) - len(data):, j]
+        result[name] = pd.DataFrame(aligned, index=calendar, columns=list(frames))
+    return result
+
+
+def add_panel_indicators(frames: Dict[str, pd.DataFrame], indicators: Iterable[str],
+                         column: str = 'Close') -> Dict[str, pd.DataFrame]:
+    """Return each ticker's frame with indicator columns added, computed in one panel pass.
+
+    Every ticker's windows cover only its own bars, so the values match
+    ``add_indicators`` on that ticker alone whatever else is in the panel.
+    Tickers whose frame is None or empty are left out of the result.
+    """
+    frames = {ticker: data for ticker, data in frames.items() if data is not None and not data.empty}
+    if not frames:
+        return frames
+    matrix = _stack(frames, column)
+    computed = _compute_panel(matrix, indicators)
+    names = list(computed)
+
+    result = {}
+    for j, (ticker, data) in enumerate(frames.items()):
+        if data.columns.isin(names).any():
+            data = data.drop(columns=names, errors='ignore')
+        block = np.column_stack([computed[name][len(matrix) - len(data):, j] for name in names])
+        added = pd.DataFrame(block, index=data.index, columns=names)
+        # One concat per ticker; inserting columns one by one is far slower
+        result[ticker] = pd.concat([data, added], axis=1)
+    return result
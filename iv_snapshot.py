@@ -0,0 +1,49 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from iv_table import FIELDS, IVTable, get_default_iv_table
+
+
+def snapshot_tickers(tickers: List[str], table: Optional[IVTable] = None,
+                     max_workers: int = 8) -> Dict[str, Dict[str, float]]:
+    """Record today's IV snapshot for each ticker, downloading chains in parallel"""
+    table = table or get_default_iv_table()
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as executor:
+        futures = {executor.submit(table.snapshot, ticker): ticker for ticker in tickers}
+        for done, future in enumerate(as_completed(futures), 1):
+            ticker = futures[future]
+            try:
+                results[ticker] = future.result()
+                summary = ', '.join(f"{field} {value:.3f}" for field, value in results[ticker].items() if not np.isnan(value))
+            except Exception as e:
+                summary = f"error: {e}"
+            print(f"[{done}/{len(tickers)}] {ticker}: {summary or 'no option data'}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record today's ATM IV, term structure and skew per ticker")
+    parser.add_argument('tickers', nargs='*', help="Tickers to snapshot")
+    parser.add_argument('--universe', help="File of tickers, in the format sector_scan reads")
+    parser.add_argument('--workers', type=int, default=8, help="Parallel chain downloads")
+    args = parser.parse_args(argv)
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.universe:
+        from sector_scan import load_universe
+        tickers += load_universe(args.universe)[0]
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        parser.error("no tickers given")
+
+    results = snapshot_tickers(tickers, max_workers=args.workers)
+    recorded = sum(1 for values in results.values() if not np.isnan(values['atm_iv']))
+    print(f"\nRecorded {recorded} of {len(tickers)} tickers ({', '.join(FIELDS)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from implied_vol import years_to_expiry
+from iv_table import MIN_EXPIRY_DAYS, _day, chain_atm_iv
+from option_cache import OptionChainCache, get_default_chain_cache, session_start
+from ticker_snapshot import TickerSnapshot
+
+# Strikes of the grid as a fraction of spot
+DEFAULT_MONEYNESS = np.linspace(0.7, 1.3, 25)
+
+
+def _smile(chain, spot: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Strikes and IVs of one expiration, sorted by strike.
+
+    Out-of-the-money contracts are used (puts below spot, calls at and
+    above it) since their quotes are the liquid ones; if fewer than two of
+    them have an IV, every contract with one is used instead.
+    """
+    points = []
+    for options, is_call in ((chain.calls, True), (chain.puts, False)):
+        if options.empty:
+            continue
+        strikes = options['strike'].to_numpy(dtype=float)
+        ivs = options['impliedVolatility'].to_numpy(dtype=float)
+        valid = np.isfinite(ivs) & (ivs > 0)
+        otm = strikes >= spot if is_call else strikes < spot
+        points.append((strikes, ivs, valid, otm))
+    if not points:
+        return np.array([]), np.array([])
+    strikes = np.concatenate([p[0] for p in points])
+    ivs = np.concatenate([p[1] for p in points])
+    valid = np.concatenate([p[2] for p in points])
+    otm = np.concatenate([p[3] for p in points])
+    keep = valid & otm if (valid & otm).sum() >= 2 else valid
+    order = np.argsort(strikes[keep], kind='stable')
+    return strikes[keep][order], ivs[keep][order]
+
+
+class IVSurface:
+    """Implied volatility of one ticker on a strike x expiration grid, from every expiration's chain.
+
+    Each row is one expiration's smile interpolated onto strikes at fixed
+    fractions of spot (NaN outside the strikes quoted); between expirations
+    IV is interpolated linearly in total variance. The ATM IV of each
+    expiration is measured the same way as the daily IV table.
+    """
+
+    def __init__(self, ticker: str, spot: float, as_of: pd.Timestamp, expirations, years: np.ndarray,
+                 strikes: np.ndarray, ivs: np.ndarray, atm: np.ndarray):
+        self.ticker = ticker
+        self.spot = spot
+        self.as_of = as_of
+        self.expirations = tuple(expirations)
+        self.years = years
+        self.strikes = strikes
+        self.ivs = ivs
+        self.atm = atm
+
+    def frame(self) -> pd.DataFrame:
+        """IV grid (expirations x strikes)"""
+        return pd.DataFrame(self.ivs, index=list(self.expirations), columns=self.strikes)
+
+    def smile(self, expiration: str) -> pd.Series:
+        """IV by strike of one expiration on the grid"""
+        return self.frame().loc[expiration]
+
+    def iv(self, strike: float, years: float) -> Optional[float]:
+        """IV at any strike and time to expiry inside the grid, or None outside it"""
+        row_ivs = np.full(len(self.expirations), np.nan)
+        for i, row in enumerate(self.ivs):
+            valid = ~np.isnan(row)
+            if valid.sum() >= 2 and self.strikes[valid][0] <= strike <= self.strikes[valid][-1]:
+                row_ivs[i] = np.interp(strike, self.strikes[valid], row[valid])
+        valid = ~np.isnan(row_ivs)
+        if not valid.any():
+            return None
+        t, v = self.years[valid], row_ivs[valid]
+        if years <= t[0]:
+            return float(v[0])
+        if years > t[-1]:
+            return None
+        return float(np.sqrt(np.interp(years, t, v * v * t) / years))
+
+    def term_structure(self) -> pd.DataFrame:
+        """ATM IV per expiration with the one-standard-deviation move it prices by then"""
+        return pd.DataFrame({
+            'days': np.round(self.years * 365, 1),
+            'atm_iv': self.atm,
+            'expected_move': self.spot * self.atm * np.sqrt(self.years),
+        }, index=list(self.expirations))
+
+    def expiration_after(self, date) -> Optional[str]:
+        """Nearest expiration strictly after a date, or None if there is none"""
+        day = _day(date)
+        for expiration, atm in zip(self.expirations, self.atm):
+            if _day(expiration) > day and not np.isnan(atm):
+                return expiration
+        return None
+
+    def expected_move(self, date) -> Optional[float]:
+        """One-standard-deviation price move priced through the first expiration after a date"""
+        expiration = self.expiration_after(date)
+        if expiration is None:
+            return None
+        i = self.expirations.index(expiration)
+        return float(self.spot * self.atm[i] * np.sqrt(self.years[i]))
+
+    def event_move(self, date) -> Optional[float]:
+        """Move priced for an event on a date alone, as a fraction of spot.
+
+        The total variance of the last expiration before the event is taken
+        out of the first one after it, leaving what the market expects the
+        event itself to add. None without an expiration on both sides.
+        """
+        after = self.expiration_after(date)
+        if after is None:
+            return None
+        day = _day(date)
+        before = [i for i, expiration in enumerate(self.expirations)
+                  if _day(expiration) < day and not np.isnan(self.atm[i])]
+        if not before:
+            return None
+        i, j = before[-1], self.expirations.index(after)
+        variance = self.atm[j] ** 2 * self.years[j] - self.atm[i] ** 2 * self.years[i]
+        return float(np.sqrt(variance)) if variance > 0 else None
+
+
+def build_surface(snapshot: TickerSnapshot, as_of: Optional[pd.Timestamp] = None,
+                  moneyness=DEFAULT_MONEYNESS, max_workers: int = 8) -> Optional[IVSurface]:
+    """IV surface from every expiration of a ticker, its chains downloaded in parallel.
+
+    None when the ticker has no listed options or no quote.
+    """
+    expirations = [expiration for expiration in snapshot.expirations
+                   if years_to_expiry(expiration, as_of) * 365 >= MIN_EXPIRY_DAYS]
+    if not expirations:
+        return None
+    # Fetched once up front; every chain is solved against it
+    spot = snapshot.current_price
+    if spot is None:
+        return None
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(expirations)))) as executor:
+        chains = list(executor.map(snapshot.solved_chain, expirations))
+
+    strikes = spot * np.asarray(moneyness, dtype=float)
+    rows, atm, years, kept = [], [], [], []
+    for expiration, chain in zip(expirations, chains):
+        if chain is None:
+            continue
+        chain_strikes, chain_ivs = _smile(chain, spot)
+        if len(chain_strikes) < 2:
+            continue
+        rows.append(np.interp(strikes, chain_strikes, chain_ivs, left=np.nan, right=np.nan))
+        value = chain_atm_iv(chain, spot)
+        atm.append(np.nan if value is None else value)
+        years.append(years_to_expiry(expiration, as_of))
+        kept.append(expiration)
+    if not kept:
+        return None
+    return IVSurface(getattr(snapshot, 'ticker', None), float(spot),
+                     pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of),
+                     kept, np.array(years), strikes, np.array(rows), np.array(atm))
+
+
+class SurfaceCache:
+    """IV surfaces keyed by ticker, each built at most once per trading session.
+
+    A surface built during the session is reused until the close, and one
+    built after the close until the next open, so views of the same ticker
+    read from memory instead of downloading every chain again. Failed builds
+    are not kept, so the next ``get`` tries again, and the least recently
+    used surfaces are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, chain_cache: Optional[OptionChainCache] = None, max_workers: int = 8,
+                 max_entries: int = 32):
+        self.chain_cache = chain_cache or get_default_chain_cache()
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self._surfaces: 'OrderedDict[str, Tuple[pd.Timestamp, IVSurface]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ticker: str, snapshot: Optional[TickerSnapshot] = None) -> Optional[IVSurface]:
+        """Surface of a ticker for the current session, built on first use"""
+        ticker = ticker.upper()
+        session = session_start()
+        with self._lock:
+            entry = self._surfaces.get(ticker)
+            if entry is not None and entry[0] == session:
+                self._surfaces.move_to_end(ticker)
+                return entry[1]
+        try:
+            surface = build_surface(snapshot or TickerSnapshot(ticker, self.chain_cache),
+                                    max_workers=self.max_workers)
+        except Exception as e:
+            print(f"Error building IV surface for {ticker}: {e}")
+            return None
+        if surface is not None:
+            with self._lock:
+                self._surfaces[ticker] = (session, surface)
+                self._surfaces.move_to_end(ticker)
+                while len(self._surfaces) > self.max_entries:
+                    self._surfaces.popitem(last=False)
+        return surface
+
+    def cached(self, ticker: str) -> Optional[IVSurface]:
+        """Surface of a ticker already built this session, without building one"""
+        with self._lock:
+            entry = self._surfaces.get(ticker.upper())
+        return entry[1] if entry is not None and entry[0] == session_start() else None
+
+    def clear(self, ticker: Optional[str] = None):
+        """Forget one ticker's surface, or all of them"""
+        with self._lock:
+            if ticker is None:
+                self._surfaces.clear()
+            else:
+                self._surfaces.pop(ticker.upper(), None)
+
+
+_default_surface_cache = None
+_default_surface_cache_lock = threading.Lock()
+
+
+def get_default_surface_cache() -> SurfaceCache:
+    """Return the process-wide surface cache shared by all analyzers"""
+    global _default_surface_cache
+    with _default_surface_cache_lock:
+        if _default_surface_cache is None:
+            _default_surface_cache = SurfaceCache()
+        return _default_surface_cache
@@ -0,0 +1,283 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from implied_vol import add_greeks, years_to_expiry
+from option_cache import OptionChainCache, get_default_chain_cache, session_start
+from ticker_snapshot import TickerSnapshot
+
+DEFAULT_IV_DIR = Path('zmtech_finance/data/iv')
+# Constant-maturity points of the term structure, in calendar days
+TERM_DAYS = (30, 60, 90, 180)
+# Everything recorded per ticker per day
+FIELDS = ('atm_iv',) + tuple(f'iv_{days}d' for days in TERM_DAYS) + ('skew_25d',)
+# One fixed-size binary record per snapshot; files only ever grow by whole records
+RECORD = np.dtype([('date', '<i8')] + [(field, '<f8') for field in FIELDS])
+# Expirations closer than this are left out; their IV is dominated by the last hours of trading
+MIN_EXPIRY_DAYS = 1
+
+
+def _day(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    if ts.tz is not None:
+        ts = ts.tz_localize(None)
+    return ts.normalize()
+
+
+def session_date() -> pd.Timestamp:
+    """Market date of the quotes in effect now; before the open that is the previous session"""
+    return _day(session_start())
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame(columns=list(FIELDS), index=pd.DatetimeIndex([]), dtype=float)
+
+
+def chain_atm_iv(chain, spot: float) -> Optional[float]:
+    """IV at the money: calls and puts each interpolated to the spot strike, then averaged"""
+    if chain is None or spot is None:
+        return None
+    values = []
+    for options in (chain.calls, chain.puts):
+        if options.empty:
+            continue
+        strikes = options['strike'].to_numpy(dtype=float)
+        ivs = options['impliedVolatility'].to_numpy(dtype=float)
+        valid = np.isfinite(ivs) & (ivs > 0)
+        if not valid.any():
+            continue
+        order = np.argsort(strikes[valid])
+        values.append(float(np.interp(spot, strikes[valid][order], ivs[valid][order])))
+    return float(np.mean(values)) if values else None
+
+
+def chain_skew(chain, spot: float, expiration, delta: float = 0.25) -> Optional[float]:
+    """IV of the ``delta`` put less the IV of the ``delta`` call; positive when downside is bid"""
+    if chain is None or spot is None:
+        return None
+    calls = add_greeks(chain.calls, spot, expiration, True)
+    puts = add_greeks(chain.puts, spot, expiration, False)
+    if 'delta' not in calls or 'delta' not in puts:
+        return None
+    calls = calls[calls['delta'].notna()]
+    puts = puts[puts['delta'].notna()]
+    if calls.empty or puts.empty:
+        return None
+    call_iv = calls['impliedVolatility'].iloc[(calls['delta'] - delta).abs().argmin()]
+    put_iv = puts['impliedVolatility'].iloc[(puts['delta'] + delta).abs().argmin()]
+    return float(put_iv - call_iv)
+
+
+def nearest_expiration(snapshot: TickerSnapshot, as_of=None) -> Optional[str]:
+    """First expiration at least MIN_EXPIRY_DAYS out, or None"""
+    for expiration in snapshot.expirations:
+        if years_to_expiry(expiration, as_of) * 365 >= MIN_EXPIRY_DAYS:
+            return expiration
+    return None
+
+
+def measure_atm_iv(snapshot: TickerSnapshot, as_of=None) -> float:
+    """ATM IV of the nearest expiration alone, one chain download; NaN if unavailable"""
+    expiration = nearest_expiration(snapshot, as_of)
+    if expiration is None:
+        return np.nan
+    spot = snapshot.current_price
+    iv = chain_atm_iv(snapshot.solved_chain(expiration), spot) if spot is not None else None
+    return np.nan if iv is None else iv
+
+
+def measure_iv(snapshot: TickerSnapshot, as_of=None) -> Dict[str, float]:
+    """ATM IV of the nearest expiration, the constant-maturity term structure and the 25-delta skew.
+
+    Term points are interpolated linearly in total variance between the
+    expirations around them and are NaN beyond the last expiration fetched.
+    """
+    values = dict.fromkeys(FIELDS, np.nan)
+    # Tickers without listed options need no quote
+    if not snapshot.expirations:
+        return values
+    spot = snapshot.current_price
+    if spot is None:
+        return values
+    years, ivs, expirations = [], [], []
+    for expiration in snapshot.expirations:
+        t = years_to_expiry(expiration, as_of)
+        if t * 365 < MIN_EXPIRY_DAYS:
+            continue
+        iv = chain_atm_iv(snapshot.solved_chain(expiration), spot)
+        if iv is not None:
+            years.append(t)
+            ivs.append(iv)
+            expirations.append(expiration)
+        # One expiration past the longest term point is enough to interpolate it
+        if t * 365 >= TERM_DAYS[-1]:
+            break
+    if not ivs:
+        return values
+
+    years, ivs = np.array(years), np.array(ivs)
+    values['atm_iv'] = ivs[0]
+    variance = ivs * ivs * years
+    for days in TERM_DAYS:
+        target = days / 365
+        if target <= years[0]:
+            values[f'iv_{days}d'] = ivs[0]
+        elif target <= years[-1]:
+            values[f'iv_{days}d'] = float(np.sqrt(np.interp(target, years, variance) / target))
+
+    nearest_month = expirations[int(np.abs(years - TERM_DAYS[0] / 365).argmin())]
+    skew = chain_skew(snapshot.solved_chain(nearest_month), spot, nearest_month)
+    if skew is not None:
+        values['skew_25d'] = skew
+    return values
+
+
+class IVTable:
+    """Daily implied volatility snapshots per ticker, kept on disk between sessions.
+
+    Each ticker is one append-only file of fixed-size records (date, ATM IV,
+    term structure, skew). A snapshot is taken at most once per ticker per
+    day, and reading a past date is a lookup instead of a chain download.
+    When a date was recorded twice the later record wins.
+
+    Dates are market session dates. ``current`` records the ATM IV of the
+    nearest expiration only; the full term structure and skew are recorded
+    by ``snapshot``, which iv_snapshot.py runs once a day.
+    """
+
+    def __init__(self, table_dir=None, chain_cache: Optional[OptionChainCache] = None):
+        self.table_dir = Path(table_dir or os.environ.get('ZMTECH_IV_TABLE', DEFAULT_IV_DIR))
+        self.table_dir.mkdir(parents=True, exist_ok=True)
+        self.chain_cache = chain_cache or get_default_chain_cache()
+        self._frames: Dict[str, pd.DataFrame] = {}
+        # Ticker -> session date it was found to have no listed options
+        self._no_options: Dict[str, pd.Timestamp] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str) -> Path:
+        return self.table_dir / f"{ticker.replace('/', '_')}.iv"
+
+    def _read(self, ticker: str) -> pd.DataFrame:
+        if ticker in self._frames:
+            return self._frames[ticker]
+        frame = _empty_frame()
+        path = self._path(ticker)
+        if path.exists():
+            try:
+                data = path.read_bytes()
+                # A record cut short by an interrupted write is ignored
+                records = np.frombuffer(data[:len(data) - len(data) % RECORD.itemsize], dtype=RECORD)
+                frame = pd.DataFrame({field: records[field] for field in FIELDS},
+                                     index=pd.DatetimeIndex(records['date'].view('datetime64[ns]')))
+                frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+            except Exception as e:
+                print(f"Error reading stored IV for {ticker}: {e}")
+        self._frames[ticker] = frame
+        return frame
+
+    def append(self, ticker: str, date, values: Mapping[str, float]):
+        """Store a snapshot of a ticker on a date; fields left out are recorded as missing"""
+        ticker = ticker.upper()
+        day = _day(date)
+        record = np.zeros(1, dtype=RECORD)
+        record['date'] = day.value
+        for field in FIELDS:
+            value = values.get(field)
+            record[field] = np.nan if value is None else value
+        with self._lock:
+            frame = self._read(ticker)
+            path = self._path(ticker)
+            with open(path, 'ab') as f:
+                # A record cut short by an interrupted write is dropped so records stay aligned
+                f.truncate(f.tell() - f.tell() % RECORD.itemsize)
+                f.write(record.tobytes())
+            row = pd.DataFrame({field: record[field] for field in FIELDS}, index=pd.DatetimeIndex([day]))
+            frame = pd.concat([frame[frame.index != day], row]) if len(frame) else row
+            self._frames[ticker] = frame.sort_index()
+
+    def record(self, ticker: str, date, value: float):
+        """Store the ATM IV of a ticker on a date, replacing any earlier value for it"""
+        self.append(ticker, date, {'atm_iv': value})
+
+    def get(self, ticker: str, date, field: str = 'atm_iv') -> Optional[float]:
+        """Recorded value of a ticker on a date, or None"""
+        with self._lock:
+            frame = self._read(ticker.upper())
+            day = _day(date)
+            value = frame.at[day, field] if day in frame.index else None
+        return None if value is None or pd.isna(value) else float(value)
+
+    def frame(self, ticker: str) -> pd.DataFrame:
+        """All recorded snapshots of a ticker (dates x fields), oldest first"""
+        with self._lock:
+            return self._read(ticker.upper()).copy()
+
+    def series(self, ticker: str, field: str = 'atm_iv') -> pd.Series:
+        """Recorded values of one field for a ticker, oldest first"""
+        return self.frame(ticker)[field]
+
+    def for_index(self, ticker: str, index: pd.DatetimeIndex, field: str = 'atm_iv') -> pd.Series:
+        """Recorded values lined up with a price index, NaN on days nothing was recorded"""
+        dates = pd.DatetimeIndex(index)
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        values = self.series(ticker, field).reindex(dates.normalize())
+        return pd.Series(values.to_numpy(), index=index)
+
+    def _has_no_options(self, ticker: str, session: pd.Timestamp) -> bool:
+        with self._lock:
+            return self._no_options.get(ticker.upper()) == session
+
+    def _remember_no_options(self, ticker: str, session: pd.Timestamp):
+        with self._lock:
+            self._no_options[ticker.upper()] = session
+
+    def snapshot(self, ticker: str, snapshot: Optional[TickerSnapshot] = None) -> Dict[str, float]:
+        """Measure and store the session's full snapshot of a ticker (every expiration out to 180 days)"""
+        session = session_date()
+        snapshot = snapshot or TickerSnapshot(ticker, self.chain_cache)
+        values = measure_iv(snapshot)
+        if not np.isnan(values['atm_iv']):
+            self.append(ticker, session, values)
+        elif not snapshot.expirations:
+            self._remember_no_options(ticker, session)
+        return values
+
+    def current(self, ticker: str, snapshot: Optional[TickerSnapshot] = None) -> Optional[float]:
+        """The session's ATM IV, measured from the nearest chain only if not yet recorded.
+
+        A ticker without listed options is not looked up again until the
+        next session.
+        """
+        session = session_date()
+        value = self.get(ticker, session)
+        if value is not None or self._has_no_options(ticker, session):
+            return value
+        try:
+            snapshot = snapshot or TickerSnapshot(ticker, self.chain_cache)
+            value = measure_atm_iv(snapshot)
+            if not np.isnan(value):
+                self.append(ticker, session, {'atm_iv': value})
+            elif not snapshot.expirations:
+                self._remember_no_options(ticker, session)
+        except Exception as e:
+            print(f"Error fetching IV for {ticker}: {e}")
+            return None
+        return None if np.isnan(value) else float(value)
+
+
+_default_iv_table = None
+_default_iv_table_lock = threading.Lock()
+
+
+def get_default_iv_table() -> IVTable:
+    """Return the process-wide IV table shared by all analyzers"""
+    global _default_iv_table
+    with _default_iv_table_lock:
+        if _default_iv_table is None:
+            _default_iv_table = IVTable()
+        return _default_iv_table
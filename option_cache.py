@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional, Tuple
+
+import pandas as pd
+
+MARKET_TZ = 'America/New_York'
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
+
+def _now() -> pd.Timestamp:
+    return pd.Timestamp.now(tz=MARKET_TZ)
+
+
+def is_market_open(now: Optional[pd.Timestamp] = None) -> bool:
+    """Whether US equity options are trading (regular session, holidays ignored)"""
+    now = now if now is not None else _now()
+    if now.weekday() >= 5:
+        return False
+    minutes = now.hour * 60 + now.minute
+    return MARKET_OPEN[0] * 60 + MARKET_OPEN[1] <= minutes < MARKET_CLOSE[0] * 60 + MARKET_CLOSE[1]
+
+
+def last_close(now: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+    """Most recent regular-session close at or before now"""
+    now = now if now is not None else _now()
+    close = now.normalize() + timedelta(hours=MARKET_CLOSE[0], minutes=MARKET_CLOSE[1])
+    if close > now:
+        close -= timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= timedelta(days=1)
+    return close
+
+
+def session_start(now: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+    """Start of the quotes in effect now: today's open during the session, else the last close"""
+    now = now if now is not None else _now()
+    if is_market_open(now):
+        return now.normalize() + timedelta(hours=MARKET_OPEN[0], minutes=MARKET_OPEN[1])
+    return last_close(now)
+
+
+class OptionChainCache:
+    """Shared option chains keyed by (ticker, expiration).
+
+    During the regular session a chain is reused for ``market_ttl``; outside
+    it a chain stays valid until the next open since quotes do not move.
+    Expirations that have passed are dropped and the least recently used
+    chains, and tickers' expiration lists, are evicted beyond ``max_entries``.
+    Chains are shared between callers and must not be modified in place.
+    """
+
+    def __init__(self, max_entries: int = 64, market_ttl: timedelta = timedelta(minutes=5)):
+        self.max_entries = max_entries
+        self.market_ttl = market_ttl
+        self._chains: 'OrderedDict[Tuple[str, str], Tuple[pd.Timestamp, object]]' = OrderedDict()
+        self._expirations: 'OrderedDict[str, Tuple[pd.Timestamp, Tuple[str, ...]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, fetched_at: pd.Timestamp, now: pd.Timestamp) -> bool:
+        if is_market_open(now):
+            return now - fetched_at < self.market_ttl
+        return fetched_at >= last_close(now)
+
+    def _evict(self, now: pd.Timestamp):
+        """Drop expired expirations, then trim to the LRU size limit"""
+        today = now.strftime('%Y-%m-%d')
+        for key in [key for key in self._chains if key[1] < today]:
+            del self._chains[key]
+        while len(self._chains) > self.max_entries:
+            self._chains.popitem(last=False)
+
+    def get_expirations(self, ticker: str, stock=None) -> Tuple[str, ...]:
+        """Available expiration dates ('YYYY-MM-DD') for a ticker"""
+        ticker = ticker.upper()
+        now = _now()
+        with self._lock:
+            entry = self._expirations.get(ticker)
+            if entry is not None and self._is_fresh(entry[0], now):
+                self._expirations.move_to_end(ticker)
+                return entry[1]
+
+        if stock is None:
+            import yfinance as yf
+            stock = yf.Ticker(ticker)
+        expirations = tuple(stock.options or ())
+        with self._lock:
+            self._expirations[ticker] = (now, expirations)
+            self._expirations.move_to_end(ticker)
+            while len(self._expirations) > self.max_entries:
+                self._expirations.popitem(last=False)
+        return expirations
+
+    def get_chain(self, ticker: str, expiration: str, stock=None):
+        """Option chain (calls/puts) for one expiration, fetched only when stale.
+
+        The chain is the cached object itself: callers that change its
+        frames must ``.copy()`` them first.
+        """
+        ticker = ticker.upper()
+        key = (ticker, expiration)
+        now = _now()
+        with self._lock:
+            self._evict(now)
+            entry = self._chains.get(key)
+            if entry is not None and self._is_fresh(entry[0], now):
+                self._chains.move_to_end(key)
+                return entry[1]
+
+        if stock is None:
+            import yfinance as yf
+            stock = yf.Ticker(ticker)
+        chain = stock.option_chain(expiration)
+        with self._lock:
+            self._chains[key] = (now, chain)
+            self._chains.move_to_end(key)
+            self._evict(now)
+        return chain
+
+    def clear(self, ticker: Optional[str] = None):
+        """Forget cached data for one ticker, or everything"""
+        with self._lock:
+            if ticker is None:
+                self._chains.clear()
+                self._expirations.clear()
+                return
+            ticker = ticker.upper()
+            for key in [key for key in self._chains if key[0] == ticker]:
+                del self._chains[key]
+            self._expirations.pop(ticker, None)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_chain_cache() -> OptionChainCache:
+    """Return the process-wide option chain cache shared by all views"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = OptionChainCache()
+        return _default_cache
@@ -0,0 +1,371 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_DIR = Path('zmtech_finance/data/prices')
+# Span start recorded once a ticker's full history (period="max") is stored
+FULL_HISTORY_START = pd.Timestamp('1900-01-01')
+
+
+def _to_naive(value) -> pd.Timestamp:
+    """Convert a date-like value to a timezone-naive midnight timestamp"""
+    ts = pd.Timestamp(value)
+    if ts.tz is not None:
+        ts = ts.tz_localize(None)
+    return ts.normalize()
+
+
+def _last_settled() -> pd.Timestamp:
+    """Last date whose bar is final; today's bar is still forming"""
+    return _to_naive(datetime.now()) - timedelta(days=1)
+
+
+def download_many(tickers: List[str], start: datetime, end: datetime) -> Dict[str, pd.DataFrame]:
+    """Download daily bars for several tickers in one grouped request, split per ticker"""
+    import yfinance as yf
+    panel = yf.download(list(tickers), start=start, end=end + timedelta(days=1), group_by='ticker',
+                        actions=True, auto_adjust=True, progress=False, threads=True)
+    if panel is None or panel.empty:
+        return {}
+    if panel.index.tz is not None:
+        panel.index = panel.index.tz_localize(None)
+
+    frames = {}
+    for ticker in tickers:
+        if isinstance(panel.columns, pd.MultiIndex):
+            if ticker not in panel.columns.get_level_values(0):
+                continue
+            data = panel[ticker]
+        else:
+            data = panel
+        data = data.dropna(how='all')
+        if not data.empty:
+            data.columns.name = None
+            frames[ticker] = data
+    return frames
+
+
+def fetch_history(ticker: str, start: Optional[datetime], end: datetime) -> pd.DataFrame:
+    """Download daily bars from start through end (inclusive), or the full history if start is None"""
+    import yfinance as yf
+    stock = yf.Ticker(ticker)
+    if start is None:
+        data = stock.history(period='max')
+    else:
+        data = stock.history(start=start, end=end + timedelta(days=1))
+    if data is not None and not data.empty and data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    return data
+
+
+Interval = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+def _merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Sort inclusive date intervals and join the ones that touch or overlap"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _cover(intervals: List[Interval], start: pd.Timestamp, end: pd.Timestamp) -> List[Interval]:
+    """Add [start, end] to the covered intervals, never past the last settled bar"""
+    end = min(end, _last_settled())
+    if start > end:
+        return intervals
+    return _merge_intervals(intervals + [(start, end)])
+
+
+def _uncovered(intervals: List[Interval], start: pd.Timestamp, end: pd.Timestamp) -> List[Interval]:
+    """Return the parts of [start, end] that no interval covers"""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in intervals:
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - timedelta(days=1)))
+        cursor = covered_end + timedelta(days=1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class PriceStore:
+    """Per-ticker columnar price history kept on disk between sessions.
+
+    Each ticker lives in one ``.npz`` file holding the bar dates, one array per
+    OHLCV column and the list of date intervals that have already been
+    downloaded. Requests are sliced out of what is held and only the gaps
+    between held intervals are fetched from Yahoo Finance.
+    """
+
+    def __init__(self, store_dir=None, fetcher=fetch_history, batch_fetcher=download_many):
+        self.store_dir = Path(store_dir or os.environ.get('ZMTECH_PRICE_STORE', DEFAULT_STORE_DIR))
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.fetcher = fetcher
+        self.batch_fetcher = batch_fetcher
+        self._frames: Dict[str, Tuple[pd.DataFrame, List[Interval]]] = {}
+        # One lock per ticker so parallel loads of different tickers never wait on each other
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _path(self, ticker: str) -> Path:
+        return self.store_dir / f"{ticker.upper().replace('/', '_')}.npz"
+
+    def _read(self, ticker: str):
+        """Load a ticker's frame and covered intervals, or None if nothing is stored"""
+        if ticker in self._frames:
+            return self._frames[ticker]
+
+        path = self._path(ticker)
+        if not path.exists():
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                index = pd.DatetimeIndex(arrays['__index__'].view('datetime64[ns]'))
+                columns = [str(c) for c in arrays['__columns__']]
+                data = pd.DataFrame({col: arrays[col] for col in columns}, index=index)
+                coverage = [(pd.Timestamp(s), pd.Timestamp(e))
+                            for s, e in arrays['__coverage__'].reshape(-1, 2).view('datetime64[ns]')]
+        except Exception as e:
+            print(f"Error reading stored prices for {ticker}: {e}")
+            return None
+
+        self._frames[ticker] = (data, coverage)
+        return self._frames[ticker]
+
+    def _write(self, ticker: str, data: pd.DataFrame, coverage: List[Interval]):
+        """Persist a ticker's frame atomically and refresh the in-memory copy"""
+        columns = [col for col in data.columns if data[col].dtype.kind in 'biuf']
+        arrays = {col: data[col].to_numpy() for col in columns}
+        arrays['__index__'] = data.index.values.astype('datetime64[ns]').view('int64')
+        arrays['__columns__'] = np.array(columns, dtype=str)
+        arrays['__coverage__'] = np.array([[s.value, e.value] for s, e in coverage], dtype='int64')
+
+        path = self._path(ticker)
+        tmp_path = path.with_name(path.stem + '.tmp.npz')
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        self._frames[ticker] = (data[columns], coverage)
+
+    def _merge(self, data: Optional[pd.DataFrame], fetched: pd.DataFrame) -> pd.DataFrame:
+        """Merge newly downloaded bars into a stored frame, preferring the new bars"""
+        if data is None:
+            return fetched.sort_index()
+        merged = pd.concat([data, fetched])
+        return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+    def _has_corporate_action(self, bars: pd.DataFrame) -> bool:
+        actions = [col for col in ('Dividends', 'Stock Splits') if col in bars.columns]
+        return bool(actions) and bool((bars[actions].fillna(0) != 0).any().any())
+
+    def _fill(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp,
+              full_history: bool = False) -> Optional[pd.DataFrame]:
+        """Download whatever part of [start, end] is not stored yet and persist it"""
+        stored = self._read(ticker)
+        data, coverage = stored if stored is not None else (None, [])
+
+        if full_history and not (coverage and coverage[0][0] <= FULL_HISTORY_START):
+            fetched = self.fetcher(ticker, None, end)
+            if fetched is None or fetched.empty:
+                return data
+            data = self._merge(data, fetched)
+            self._write(ticker, data, _cover(coverage, FULL_HISTORY_START, end))
+            return self._frames[ticker][0]
+
+        gaps = self._gaps(data, coverage, start, end)
+        if not gaps:
+            return data
+
+        for gap_start, gap_end in gaps:
+            fetch_start, fetch_end = self._fetch_window(data, coverage, [(gap_start, gap_end)], end)
+            appending = fetch_start < gap_start
+            fetched = self.fetcher(ticker, fetch_start, fetch_end)
+            if fetched is not None and not fetched.empty:
+                if appending and self._has_corporate_action(fetched[fetched.index > fetch_start]):
+                    # Yahoo back-adjusts earlier prices on dividends and splits, so an
+                    # appended tail would no longer line up with the stored history
+                    held_start = coverage[0][0] if coverage else gap_start
+                    reloaded = self.fetcher(ticker, None if held_start <= FULL_HISTORY_START else held_start, fetch_end)
+                    if reloaded is not None and not reloaded.empty:
+                        data = None
+                        coverage = [(held_start, gap_end)]
+                        fetched = reloaded
+                data = self._merge(data, fetched)
+            coverage = _cover(coverage, gap_start, gap_end)
+
+        if data is None:
+            return None
+        self._write(ticker, data, coverage)
+        return self._frames[ticker][0]
+
+    def _gaps(self, data: Optional[pd.DataFrame], coverage: List[Interval],
+              start: pd.Timestamp, end: pd.Timestamp) -> List[Interval]:
+        """Date ranges inside [start, end] that still have to be downloaded"""
+        # Today's bar is still forming, so coverage only ever extends to yesterday
+        gaps = _uncovered(coverage, start, min(end, _last_settled()))
+        if not gaps and data is None:
+            gaps = [(start, end)]
+        return gaps
+
+    def _fetch_window(self, data: Optional[pd.DataFrame], coverage: List[Interval],
+                      gaps: List[Interval], end: pd.Timestamp) -> Interval:
+        """Range one download has to request to fill ``gaps`` (from _gaps) of a ticker"""
+        gap_start, gap_end = gaps[0][0], gaps[-1][1]
+        # The gap running up to the settled end also picks up today's bar
+        fetch_end = end if gap_end >= min(end, _last_settled()) else gap_end
+        appending = (data is not None and not data.empty and bool(coverage) and
+                     coverage[-1][1] + timedelta(days=1) == gap_start)
+        # Re-request the last stored bar too, it may have been a partial session
+        return (data.index.max() if appending else gap_start), fetch_end
+
+    def _absorb(self, ticker: str, fetched: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp):
+        """Merge bars downloaded elsewhere for [start, end] into the stored history"""
+        stored = self._read(ticker)
+        data, coverage = stored if stored is not None else (None, [])
+        if data is not None and not data.empty:
+            new_bars = fetched[fetched.index > data.index.max()]
+            if self._has_corporate_action(new_bars) and data.index.min() < start:
+                # Earlier stored prices predate the re-adjustment, drop them
+                data, coverage = None, []
+        self._write(ticker, self._merge(data, fetched), _cover(coverage, start, end))
+
+    def get_history(self, ticker: str, start: datetime, end: datetime) -> Optional[pd.DataFrame]:
+        """Return daily bars from start through end, downloading only uncovered gaps"""
+        ticker = ticker.upper()
+        start = _to_naive(start)
+        end = _to_naive(end)
+
+        with self._lock(ticker):
+            data = self._fill(ticker, start, end)
+        if data is None:
+            return None
+        return data[(data.index >= start) & (data.index <= end)].copy()
+
+    def get_history_many(self, tickers: List[str], start: datetime,
+                         end: datetime) -> Dict[str, Optional[pd.DataFrame]]:
+        """Return daily bars for several tickers, downloading the missing ones in grouped requests.
+
+        Each ticker only asks for the range its stored history lacks; tickers
+        lacking the same range (typically the bars since the last refresh) are
+        downloaded together. Tickers no grouped request filled map to None, for
+        the caller to load with get_history at whatever parallelism it allows.
+        """
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        start = _to_naive(start)
+        end = _to_naive(end)
+
+        windows: Dict[Interval, List[str]] = {}
+        for ticker in tickers:
+            with self._lock(ticker):
+                stored = self._read(ticker)
+                data, coverage = stored if stored is not None else (None, [])
+                gaps = self._gaps(data, coverage, start, end)
+                if gaps:
+                    windows.setdefault(self._fetch_window(data, coverage, gaps, end), []).append(ticker)
+
+        for (fetch_start, fetch_end), missing in windows.items():
+            if len(missing) < 2:
+                continue
+            try:
+                fetched = self.batch_fetcher(missing, fetch_start, fetch_end)
+            except Exception as e:
+                print(f"Error downloading {', '.join(missing)}: {e}")
+                fetched = {}
+            for ticker, data in fetched.items():
+                with self._lock(ticker):
+                    self._absorb(ticker, data, fetch_start, fetch_end)
+
+        return {ticker: self._held(ticker, start, end) for ticker in tickers}
+
+    def _held(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """Stored bars from start through end, or None if part of the range is not stored"""
+        with self._lock(ticker):
+            stored = self._read(ticker)
+            data, coverage = stored if stored is not None else (None, [])
+            if data is None or self._gaps(data, coverage, start, end):
+                return None
+        return data[(data.index >= start) & (data.index <= end)].copy()
+
+    def get_full_history(self, ticker: str) -> Optional[pd.DataFrame]:
+        """Return the full available history, downloading it in full only once"""
+        ticker = ticker.upper()
+        today = _to_naive(datetime.now())
+        with self._lock(ticker):
+            data = self._fill(ticker, FULL_HISTORY_START, today, full_history=True)
+            if data is None:
+                return None
+            # Bring an already stored full history up to date
+            data = self._fill(ticker, FULL_HISTORY_START, today)
+        return data.copy() if data is not None else None
+
+    def refresh(self, ticker: str) -> Optional[pd.DataFrame]:
+        """Append the bars missing since the last stored one, e.g. for a daily refresh"""
+        ticker = ticker.upper()
+        with self._lock(ticker):
+            stored = self._read(ticker)
+            if stored is None:
+                return None
+            _, coverage = stored
+            data = self._fill(ticker, coverage[-1][0], _to_naive(datetime.now()))
+        return data.copy() if data is not None else None
+
+    def stored_tickers(self) -> List[str]:
+        """List the tickers that have history on disk"""
+        return sorted(path.stem for path in self.store_dir.glob('*.npz') if not path.stem.endswith('.tmp'))
+
+
+class RangeCache:
+    """In-memory per-ticker frames that serve any sub-range of the range they hold"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[pd.Timestamp, pd.Timestamp, pd.DataFrame]] = {}
+
+    def get(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """Return the held frame for a ticker if it spans [start, end]"""
+        entry = self._entries.get(ticker)
+        if entry is not None and entry[0] <= start and entry[1] >= end:
+            return entry[2]
+        return None
+
+    def span(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> Interval:
+        """Range to load so that the held frame grows into a superset of [start, end]"""
+        entry = self._entries.get(ticker)
+        if entry is None:
+            return start, end
+        return min(start, entry[0]), max(end, entry[1])
+
+    def put(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp, data: pd.DataFrame):
+        self._entries[ticker] = (start, end, data)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store() -> PriceStore:
+    """Return the process-wide price store shared by all analyzers"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PriceStore()
+        return _default_store
@@ -0,0 +1,124 @@
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from az import summarize_reactions, ticker_earnings_reactions
+from price_store import get_default_store
+
+# History covering the last 10 quarters plus the year the MA200 needs
+HISTORY_DAYS = 4 * 365
+
+
+def load_universe(path) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Read a universe file into its tickers and ticker pairs.
+
+    One entry per line, separated by commas or spaces; '#' starts a comment.
+    A line with two tickers is a pair, any other line lists single tickers.
+    """
+    tickers: List[str] = []
+    pairs: List[Tuple[str, str]] = []
+    with open(path) as f:
+        for line in f:
+            symbols = [s.upper() for s in re.split(r'[,\s]+', line.split('#', 1)[0].strip()) if s]
+            if len(symbols) == 2:
+                pairs.append((symbols[0], symbols[1]))
+            tickers.extend(symbols)
+    return list(dict.fromkeys(tickers)), pairs
+
+
+def scan_ticker(ticker: str, days_before: int, days_after: int) -> Tuple[str, Optional[pd.DataFrame], Optional[str]]:
+    """Event study for one ticker in a worker process: (ticker, rows, error)"""
+    try:
+        results = ticker_earnings_reactions(ticker, days_before, days_after)
+    except Exception as e:
+        return ticker, None, str(e)
+    if results is None or results.empty:
+        return ticker, None, "No earnings or price data"
+    return ticker, results, None
+
+
+def scan_universe(tickers: List[str], days_before: int = 5, days_after: int = 5,
+                  max_workers: Optional[int] = None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """Run the event study for every ticker across a process pool; returns (results, errors)"""
+    # One grouped download up front, so the workers read prices from the store
+    end = datetime.now()
+    get_default_store().get_history_many(tickers, end - timedelta(days=HISTORY_DAYS), end)
+
+    results: Dict[str, pd.DataFrame] = {}
+    errors: Dict[str, str] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(scan_ticker, t, days_before, days_after) for t in tickers]
+        for done, future in enumerate(as_completed(futures), 1):
+            ticker, rows, error = future.result()
+            if error is None:
+                results[ticker] = rows
+            else:
+                errors[ticker] = error
+            print(f"[{done}/{len(tickers)}] {ticker}: {error or f'{len(rows)} events'}")
+    return {t: results[t] for t in tickers if t in results}, errors
+
+
+def write_results(results: Dict[str, pd.DataFrame], errors: Dict[str, str],
+                  pairs: List[Tuple[str, str]], output_dir) -> Dict[str, Path]:
+    """Write the consolidated event rows, per-ticker summary, pair comparison and failures"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    files = {}
+
+    if results:
+        files['events'] = output_dir / 'earnings_reactions.csv'
+        pd.concat(results.values(), ignore_index=True).to_csv(files['events'], index=False)
+
+        summary = pd.DataFrame({t: summarize_reactions(rows) for t, rows in results.items()}).T
+        summary.index.name = 'Ticker'
+        files['summary'] = output_dir / 'summary.csv'
+        summary.to_csv(files['summary'])
+
+        compared = [(a, b) for a, b in pairs if a in results and b in results]
+        if compared:
+            files['pairs'] = output_dir / 'pairs.csv'
+            pd.DataFrame([{
+                'Ticker 1': a,
+                'Ticker 2': b,
+                'Average Change % 1': summary.loc[a, 'Average Change %'],
+                'Average Change % 2': summary.loc[b, 'Average Change %'],
+                'Difference': summary.loc[a, 'Average Change %'] - summary.loc[b, 'Average Change %'],
+            } for a, b in compared]).to_csv(files['pairs'], index=False)
+
+    if errors:
+        files['failures'] = output_dir / 'failures.csv'
+        pd.Series(errors, name='Error').rename_axis('Ticker').to_csv(files['failures'])
+    return files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Earnings reaction scan over a universe of tickers")
+    parser.add_argument('universe', help="File with one ticker, or two tickers forming a pair, per line")
+    parser.add_argument('--days-before', type=int, default=5)
+    parser.add_argument('--days-after', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--output-dir', default=f"earnings_scan_{datetime.now().strftime('%Y%m%d')}")
+    args = parser.parse_args(argv)
+
+    tickers, pairs = load_universe(args.universe)
+    if not tickers:
+        print(f"No tickers found in {args.universe}")
+        return
+
+    print(f"Scanning {len(tickers)} tickers with {args.workers} workers")
+    results, errors = scan_universe(tickers, args.days_before, args.days_after, args.workers)
+    files = write_results(results, errors, pairs, args.output_dir)
+
+    print(f"\nScan completed: {len(results)} tickers analyzed, {len(errors)} failed")
+    for name, path in files.items():
+        print(f"{name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
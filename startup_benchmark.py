@@ -0,0 +1,132 @@
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Entry point name -> (module, window class)
+ENTRY_POINTS = {
+    'zmtech_main': ('zmtech_main', 'ZMTechApp'),
+    'earnings_sector_compare': ('earnings_sector_compare', 'ERAnalysisApp'),
+    'earnings': ('earnings', 'UnifiedAnalyzerGUI'),
+}
+DEFAULT_HISTORY = Path('startup_history.csv')
+FIELDS = ['timestamp', 'entry_point', 'metric', 'seconds']
+
+# Run in a fresh interpreter so nothing is already imported or cached
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+module = __import__(sys.argv[1])
+print('import', time.perf_counter() - start)
+import tkinter as tk
+try:
+    app = getattr(module, sys.argv[2])()
+except tk.TclError:
+    # No display to open a window on
+    sys.exit(0)
+app.root.update()
+print('first_window', time.perf_counter() - start)
+app.root.destroy()
+"""
+
+
+def measure(module: str, window_class: str) -> Dict[str, float]:
+    """Cold-start timings of one entry point: import, and first window when a display is available"""
+    result = subprocess.run([sys.executable, '-c', _PROBE, module, window_class],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe failed")
+    timings = {}
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0] in ('import', 'first_window'):
+            timings[parts[0]] = float(parts[1])
+    return timings
+
+
+def best_of(module: str, window_class: str, runs: int) -> Dict[str, float]:
+    """Fastest timing per metric over several cold starts, which filters out noise"""
+    best: Dict[str, float] = {}
+    for _ in range(runs):
+        for metric, seconds in measure(module, window_class).items():
+            best[metric] = min(seconds, best.get(metric, seconds))
+    return best
+
+
+def load_history(path) -> List[dict]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def append_history(path, rows: List[dict]):
+    path = Path(path)
+    new_file = not path.exists()
+    with open(path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def check_regression(seconds: float, previous: List[float], tolerance: float,
+                     budget: Optional[float] = None) -> Optional[str]:
+    """Reason a timing counts as a regression, or None if it does not"""
+    if budget is not None and seconds > budget:
+        return f"over budget of {budget:.2f}s"
+    if previous:
+        baseline = statistics.median(previous)
+        if seconds > baseline * (1 + tolerance):
+            return f"{(seconds / baseline - 1) * 100:.0f}% slower than the median of {baseline:.2f}s"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the desktop entry points")
+    parser.add_argument('entry_points', nargs='*', help=f"Any of {', '.join(ENTRY_POINTS)} (default: all)")
+    parser.add_argument('--runs', type=int, default=3, help="Cold starts per entry point; the fastest is kept")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="CSV file the timings are appended to")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed slowdown against the median of earlier runs (0.2 = 20%%)")
+    parser.add_argument('--budget', type=float, help="Fail any timing above this many seconds")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.entry_points if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry points: {', '.join(unknown)}")
+
+    history = load_history(args.history)
+    timestamp = datetime.now().isoformat(timespec='seconds')
+    rows, regressions = [], []
+    for name in args.entry_points or ENTRY_POINTS:
+        try:
+            timings = best_of(*ENTRY_POINTS[name], args.runs)
+        except Exception as e:
+            print(f"{name}: error: {e}")
+            regressions.append(name)
+            continue
+        if 'first_window' not in timings:
+            print(f"{name}: no display available, measuring import time only")
+        for metric, seconds in timings.items():
+            previous = [float(row['seconds']) for row in history
+                        if row['entry_point'] == name and row['metric'] == metric]
+            reason = check_regression(seconds, previous, args.tolerance, args.budget)
+            print(f"{name} {metric}: {seconds:.3f}s" + (f"  REGRESSION: {reason}" if reason else ""))
+            if reason:
+                regressions.append(f"{name} {metric}")
+            rows.append({'timestamp': timestamp, 'entry_point': name, 'metric': metric, 'seconds': f"{seconds:.4f}"})
+
+    append_history(args.history, rows)
+    if regressions:
+        print(f"\nStartup regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
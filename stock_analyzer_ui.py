@@ -1,14 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import yfinance as yf
+import copy
 import os
 from pathlib import Path
-from StockAnalyzer import analyze_stock
+from task_runner import TaskRunner
+from indicators import add_indicators
+from indicator_state import get_default_state_store
 
 class StockAnalyzerUI:
+    INDICATORS = ['EMA9', 'EMA13', 'EMA20', 'EMA50', 'EMA100', 'EMA200', 'RSI',
+                  'MACD', 'Signal_Line', 'MACD_Histogram']
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Stock Technical Analysis Tool")
@@ -22,6 +25,12 @@ class StockAnalyzerUI:
         # Create default directories
         self.config['save_dir'].mkdir(exist_ok=True)
         
+        # Downloads run in the background so the window stays responsive
+        self.runner = TaskRunner(self.root)
+        self.task = None
+        # Running indicator state of the shown data, for refreshing without a full recompute
+        self.indicator_state = None
+        
         self.setup_ui()
 
     def setup_ui(self):
@@ -75,6 +84,11 @@ class StockAnalyzerUI:
         ttk.Button(button_frame, text="Clear", command=self.clear_output).grid(row=0, column=1, padx=5)
         ttk.Button(button_frame, text="Save Plot", command=self.save_plot).grid(row=0, column=2, padx=5)
         ttk.Button(button_frame, text="Set Save Location", command=self.set_save_location).grid(row=0, column=3, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=self.cancel_analysis).grid(row=0, column=4, padx=5)
+        ttk.Button(button_frame, text="Refresh", command=self.refresh_analysis).grid(row=0, column=5, padx=5)
+        
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(input_frame, textvariable=self.status_var).grid(row=3, column=0, columnspan=4, sticky="w")
 
     def create_output_frame(self):
         """Create output section"""
@@ -106,6 +120,7 @@ class StockAnalyzerUI:
 
     def save_plot(self):
         """Save the current plot"""
+        import matplotlib.pyplot as plt
         try:
             ticker = self.ticker_entry.get().upper()
             if not ticker:
@@ -159,25 +174,14 @@ class StockAnalyzerUI:
 
     def calculate_technical_indicators(self):
         """Calculate technical indicators"""
-        # Calculate EMAs
-        self.data['EMA9'] = self.data['Close'].ewm(span=9, adjust=False).mean()
-        self.data['EMA13'] = self.data['Close'].ewm(span=13, adjust=False).mean()
-        self.data['EMA20'] = self.data['Close'].ewm(span=20, adjust=False).mean()
-        self.data['EMA50'] = self.data['Close'].ewm(span=50, adjust=False).mean()
-        self.data['EMA100'] = self.data['Close'].ewm(span=100, adjust=False).mean()
-        self.data['EMA200'] = self.data['Close'].ewm(span=200, adjust=False).mean()
-        
-        # Calculate RSI
-        delta = self.data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        self.data['RSI'] = 100 - (100 / (1 + rs))
+        # Calculate EMAs and RSI
+        add_indicators(self.data, ['EMA9', 'EMA13', 'EMA20', 'EMA50', 'EMA100', 'EMA200', 'RSI'])
         
         # ... rest of existing indicators ...
 
     def plot_technical_analysis(self, save_path=None):
         """Create technical analysis plot"""
+        import matplotlib.pyplot as plt
         # Create figure and subplots
         fig = plt.figure(figsize=(15, 12))
         gs = fig.add_gridspec(4, 1, height_ratios=[3, 1, 1, 1])
@@ -268,31 +272,66 @@ class StockAnalyzerUI:
                 widget.destroy()
             self.summary_text.delete(1.0, tk.END)
             
+            # Get stock data in the background
+            if self.task is not None:
+                self.task.cancel()
+            self.status_var.set(f"Loading {ticker}...")
+            self.task = self.runner.submit(self.load_data, ticker, self.start_date.get(), self.end_date.get(),
+                                           on_done=lambda loaded: self.show_analysis(ticker, *loaded),
+                                           on_error=self.show_error)
+            
+        except Exception as e:
+            self.show_error(e)
+
+    def load_data(self, task, ticker, start_date, end_date):
+        """Background job: price history with the EMAs and RSI the chart plots"""
+        import yfinance as yf
+        stock = yf.Ticker(ticker)
+        data = stock.history(start=start_date, end=end_date)
+        
+        # Calculate EMAs, RSI and MACD
+        add_indicators(data, self.INDICATORS)
+        # Today's bar is still forming, so the state starts from the last finished session;
+        # the one saved by an earlier run is reloaded if it ends there too
+        return data, get_default_state_store().seeded(ticker, self.INDICATORS, data)
+
+    def refresh_analysis(self):
+        """Add the bars published since the shown data was loaded"""
+        if self.indicator_state is None or getattr(self, 'data', None) is None or self.data.empty:
+            messagebox.showerror("Error", "Please run analysis first")
+            return
+        ticker = self.ticker_entry.get().upper()
+        if self.task is not None:
+            self.task.cancel()
+        self.status_var.set(f"Refreshing {ticker}...")
+        self.task = self.runner.submit(self.load_new_bars, ticker, self.data, self.indicator_state,
+                                       on_done=lambda loaded: self.show_analysis(ticker, *loaded),
+                                       on_error=self.show_error)
+
+    def load_new_bars(self, task, ticker, data, state):
+        """Background job: append new bars, advancing a copy of the indicator state one bar at a time"""
+        import yfinance as yf
+        last_date = state.last_date or data.index[-1]
+        bars = yf.Ticker(ticker).history(start=last_date.strftime('%Y-%m-%d'))
+        state = copy.deepcopy(state)
+        # Only finished sessions advance the state; a partial bar for today is replaced on the next refresh
+        data = state.append(data, bars)
+        get_default_state_store().put(ticker, state)
+        return data, state
+
+    def show_analysis(self, ticker, data, indicator_state=None):
+        """Plot and summarize data loaded by load_data"""
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        try:
+            self.data = data
+            self.indicator_state = indicator_state
+            self.status_var.set("Ready")
+            
             # Configure plot style
             plt.style.use('classic')
             plt.rcParams['figure.figsize'] = [15, 12]
             
-            # Get stock data
-            stock = yf.Ticker(ticker)
-            self.data = stock.history(start=self.start_date.get(), end=self.end_date.get())
-            
-            # Calculate EMAs
-            self.data['EMA9'] = self.data['Close'].ewm(span=9, adjust=False).mean()
-            self.data['EMA13'] = self.data['Close'].ewm(span=13, adjust=False).mean()
-            self.data['EMA20'] = self.data['Close'].ewm(span=20, adjust=False).mean()
-            self.data['EMA50'] = self.data['Close'].ewm(span=50, adjust=False).mean()
-            self.data['EMA100'] = self.data['Close'].ewm(span=100, adjust=False).mean()
-            self.data['EMA200'] = self.data['Close'].ewm(span=200, adjust=False).mean()
-            
-            # Calculate RSI
-            delta = self.data['Close'].diff()
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-            avg_gain = gain.rolling(window=14).mean()
-            avg_loss = loss.rolling(window=14).mean()
-            rs = avg_gain / avg_loss
-            self.data['RSI'] = 100 - (100 / (1 + rs))
-            
             # Create figure and subplots
             fig = plt.figure()
             gs = fig.add_gridspec(4, 1, height_ratios=[3, 1, 1, 1], hspace=0.3)
@@ -331,11 +370,9 @@ class StockAnalyzerUI:
             ax3.legend()
             
             # MACD plot
-            exp1 = self.data['Close'].ewm(span=12, adjust=False).mean()
-            exp2 = self.data['Close'].ewm(span=26, adjust=False).mean()
-            macd = exp1 - exp2
-            signal = macd.ewm(span=9, adjust=False).mean()
-            hist = macd - signal
+            macd = self.data['MACD']
+            signal = self.data['Signal_Line']
+            hist = self.data['MACD_Histogram']
             
             ax4 = fig.add_subplot(gs[3])
             ax4.plot(self.data.index, macd, label='MACD', linewidth=1)
@@ -375,9 +412,18 @@ class StockAnalyzerUI:
             self.summary_text.insert(tk.END, f"\nRSI Status: {rsi_status}\n")
             
         except Exception as e:
-            messagebox.showerror("Error", str(e))
-            import traceback
-            print(traceback.format_exc())  # Print detailed error for debugging
+            self.show_error(e)
+
+    def show_error(self, e):
+        self.status_var.set("Error")
+        messagebox.showerror("Error", str(e))
+        import traceback
+        traceback.print_exception(e)  # Print detailed error for debugging
+
+    def cancel_analysis(self):
+        if self.task is not None and not self.task.done:
+            self.task.cancel()
+            self.status_var.set("Cancelled")
 
     def clear_output(self):
         """Clear the output section"""
@@ -388,6 +434,7 @@ class StockAnalyzerUI:
     def run(self):
         """Run the application"""
         self.root.mainloop()
+        self.runner.shutdown()
 
 def main():
     app = StockAnalyzerUI()
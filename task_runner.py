@@ -0,0 +1,123 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class TaskCancelled(Exception):
+    """Raised inside a job once its task has been cancelled"""
+
+
+class Task:
+    """Handle a background job uses to report progress and notice cancellation"""
+
+    def __init__(self, runner: 'TaskRunner', on_progress: Optional[Callable] = None):
+        self._runner = runner
+        self._on_progress = on_progress
+        self._cancelled = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def cancel(self):
+        """Ask the job to stop; its pending callbacks are dropped"""
+        self._cancelled.set()
+
+    def check(self):
+        """Stop the job here if it has been cancelled"""
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def report(self, message: str, fraction: Optional[float] = None):
+        """Send a progress update to the Tk thread, stopping the job if cancelled"""
+        self.check()
+        if self._on_progress is not None:
+            self._runner._post(self, self._on_progress, message, fraction)
+
+
+class TaskRunner:
+    """Runs jobs off the Tk thread and delivers their callbacks back on it.
+
+    Workers never touch widgets. Progress, results and errors are queued and
+    drained from the Tk event loop with ``root.after``, so the window keeps
+    repainting while data loads, and callbacks of a cancelled task are dropped.
+    """
+
+    def __init__(self, root, max_workers: int = 2, poll_ms: int = 50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._queue = queue.Queue()
+        self._tasks = []
+        self._polling = False
+
+    def submit(self, job: Callable, *args, on_done: Optional[Callable] = None,
+               on_error: Optional[Callable] = None, on_progress: Optional[Callable] = None,
+               on_cancel: Optional[Callable] = None) -> Task:
+        """Run job(task, *args) in the background; must be called from the Tk thread"""
+        task = Task(self, on_progress)
+
+        def run():
+            try:
+                result = job(task, *args)
+                task.check()
+            except TaskCancelled:
+                if on_cancel is not None:
+                    self._post(None, on_cancel)
+                return
+            except Exception as e:
+                if on_error is not None:
+                    self._post(task, on_error, e)
+                else:
+                    print(f"Background task failed: {e}")
+                    traceback.print_exc()
+                return
+            if on_done is not None:
+                self._post(task, on_done, result)
+
+        task.future = self._executor.submit(run)
+        self._tasks.append(task)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return task
+
+    def cancel_all(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel everything and stop accepting jobs, e.g. when the window closes"""
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _post(self, task: Optional[Task], callback: Callable, *args):
+        self._queue.put((task, callback, args))
+
+    def _poll(self):
+        """Run queued callbacks on the Tk thread and keep polling while jobs are active"""
+        while True:
+            try:
+                task, callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None and task.cancelled:
+                continue
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in task callback: {e}")
+                traceback.print_exc()
+
+        self._tasks = [task for task in self._tasks if not task.done]
+        if self._tasks or not self._queue.empty():
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
@@ -0,0 +1,87 @@
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from implied_vol import solve_chain
+from option_cache import OptionChainCache, get_default_chain_cache
+
+
+class TickerSnapshot:
+    """Quote, option expirations and option chains for one ticker, fetched at most once.
+
+    A snapshot is created per analysis run and shared by every column that
+    needs live data, so a summary row costs one quote request, one
+    expirations request and one request per distinct option chain.
+    """
+
+    def __init__(self, ticker: str, chain_cache: Optional[OptionChainCache] = None):
+        import yfinance as yf
+        self.ticker = ticker
+        self.stock = yf.Ticker(ticker)
+        self.chain_cache = chain_cache or get_default_chain_cache()
+        self._current_price = None
+        self._price_loaded = False
+        self._expirations: Optional[Tuple[str, ...]] = None
+        self._chains: Dict[str, object] = {}
+        self._solved: Dict[str, object] = {}
+
+    @property
+    def current_price(self) -> Optional[float]:
+        """Latest close, or None if it could not be fetched"""
+        if not self._price_loaded:
+            self._price_loaded = True
+            try:
+                current = self.stock.history(period='1d')
+                if not current.empty:
+                    self._current_price = current['Close'].iloc[-1]
+            except Exception as e:
+                print(f"Error fetching current price for {self.ticker}: {e}")
+        return self._current_price
+
+    @property
+    def expirations(self) -> Tuple[str, ...]:
+        """Available option expiration dates ('YYYY-MM-DD')"""
+        if self._expirations is None:
+            try:
+                self._expirations = self.chain_cache.get_expirations(self.ticker, self.stock)
+            except Exception as e:
+                print(f"Error fetching option expirations for {self.ticker}: {e}")
+                self._expirations = ()
+        return self._expirations
+
+    def option_chain(self, expiration: str):
+        """Option chain (calls/puts) for one expiration, or None if unavailable"""
+        if expiration not in self._chains:
+            try:
+                self._chains[expiration] = self.chain_cache.get_chain(self.ticker, expiration, self.stock)
+            except Exception as e:
+                print(f"Error fetching {expiration} options for {self.ticker}: {e}")
+                self._chains[expiration] = None
+        return self._chains[expiration]
+
+    def solved_chain(self, expiration: str):
+        """Option chain with IV recomputed from bid/ask mid prices, or None if unavailable"""
+        if expiration not in self._solved:
+            chain = self.option_chain(expiration)
+            price = self.current_price
+            # Without a quote to solve against, the vendor's IV is the best there is
+            self._solved[expiration] = solve_chain(chain, price, expiration) if price is not None else chain
+        return self._solved[expiration]
+
+    def expiration_after(self, date) -> Optional[str]:
+        """Nearest expiration strictly after a date, or None if there is none"""
+        target = pd.Timestamp(date)
+        if target.tz is not None:
+            target = target.tz_localize(None)
+        later = [exp for exp in self.expirations if pd.Timestamp(exp) > target]
+        return min(later) if later else None
+
+    def prefetch(self, dates=()):
+        """Load the quote and the chains for the nearest expiration and the ones after each date"""
+        self.current_price
+        if self.expirations:
+            self.option_chain(self.expirations[0])
+        for date in dates:
+            expiration = self.expiration_after(date)
+            if expiration is not None:
+                self.option_chain(expiration)
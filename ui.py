@@ -1,16 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import subprocess
 import os
 from datetime import datetime
-import sys
-from pathlib import Path
+import pandas as pd
+from az import analyze_earnings_impact, summarize_reactions
+from task_runner import TaskRunner
 
 class StockAnalyzerUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Stock Earnings Analysis")
         
+        # Analyses run on a background thread of this process
+        self.runner = TaskRunner(self.root)
+        
         # Set window size and position
         window_width = 600
         window_height = 400
@@ -88,56 +91,56 @@ class StockAnalyzerUI:
         return True
     
     def run_analysis(self):
-        """Run the analysis script"""
+        """Run the analysis in this process, off the Tk thread"""
         if not self.validate_inputs():
             return
         
+        ticker1 = self.ticker1.get().upper()
+        ticker2 = self.ticker2.get().upper()
+        days_before = int(self.days_before.get())
+        days_after = int(self.days_after.get())
+        output_dir = f"earnings_analysis_{ticker1}_{ticker2}_{datetime.now().strftime('%Y%m%d')}"
+        
         self.analyze_button.state(['disabled'])
         self.status_var.set("Analyzing...")
         self.output_text.delete(1.0, tk.END)
-        self.root.update()
         
-        try:
-            # Get the path to az.py
-            script_path = Path(__file__).parent / "az.py"
-            
-            # Run the analysis script
-            process = subprocess.Popen(
-                [sys.executable, str(script_path), 
-                 self.ticker1.get().upper(), 
-                 self.ticker2.get().upper()],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Get output
-            output, error = process.communicate()
-            
-            # Display output
-            if output:
-                self.output_text.insert(tk.END, output)
-            if error:
-                self.output_text.insert(tk.END, "\nErrors:\n" + error)
-            
-            self.status_var.set("Analysis complete")
-            
-            # Open output directory if analysis was successful
-            output_dir = f"earnings_analysis_{self.ticker1.get().upper()}_{self.ticker2.get().upper()}_{datetime.now().strftime('%Y%m%d')}"
-            if os.path.exists(output_dir):
-                os.startfile(output_dir)
-            
-        except Exception as e:
-            self.status_var.set("Error occurred")
-            messagebox.showerror("Error", str(e))
-        
-        finally:
-            self.analyze_button.state(['!disabled'])
+        # Imports, price store and caches stay warm between clicks
+        self.runner.submit(
+            lambda task: analyze_earnings_impact(ticker1, ticker2, days_before=days_before,
+                                                 days_after=days_after, output_dir=output_dir),
+            on_done=lambda results: self.show_results(ticker1, ticker2, output_dir, results),
+            on_error=self.show_error
+        )
+    
+    def show_results(self, ticker1, ticker2, output_dir, results):
+        """Display the per-company summary of a finished analysis"""
+        self.analyze_button.state(['!disabled'])
+        if results is None or results.empty:
+            self.status_var.set("No results")
+            self.output_text.insert(tk.END, f"No earnings analysis could be produced for {ticker1} and {ticker2}\n")
+            return
+        
+        summary = pd.DataFrame({company: summarize_reactions(rows) for company, rows in results.groupby('company')})
+        self.output_text.insert(tk.END, f"Analysis completed for {ticker1} and {ticker2}\n\n")
+        self.output_text.insert(tk.END, summary.to_string() + "\n")
+        self.output_text.insert(tk.END, f"\nResults exported to directory: {output_dir}\n")
+        self.status_var.set("Analysis complete")
+        
+        # Open output directory if analysis was successful
+        if os.path.exists(output_dir):
+            os.startfile(output_dir)
+    
+    def show_error(self, e):
+        self.analyze_button.state(['!disabled'])
+        self.status_var.set("Error occurred")
+        messagebox.showerror("Error", str(e))
 
 def main():
     root = tk.Tk()
     app = StockAnalyzerUI(root)
     root.mainloop()
+    app.runner.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,198 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, List, Optional, Sequence, Set, Union
+
+import pandas as pd
+
+# A column format is a format string ('{:.2f}') or a function of the raw value
+Format = Union[str, Callable[[object], str]]
+# Fallback when the theme does not report a row height
+DEFAULT_ROW_HEIGHT = 20
+
+
+def _is_missing(value) -> bool:
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+class TableModel:
+    """Rows of a table kept as one array per column and formatted only when shown.
+
+    ``formats`` maps a column to a format string or function; other columns
+    are shown with ``str``. Missing values show as ``missing`` without
+    reaching the formatter. ``tags`` holds the Treeview tags of each row:
+    one tag name or a tuple of them per row.
+    """
+
+    def __init__(self, data: pd.DataFrame, formats: Optional[Dict[str, Format]] = None,
+                 tags: Optional[Sequence] = None, missing: str = "N/A"):
+        formats = formats or {}
+        self.columns = list(data.columns)
+        self._values = [data[column].to_numpy() for column in self.columns]
+        self._formatters = [self._formatter(formats.get(column)) for column in self.columns]
+        self._tags = None if tags is None else list(tags)
+        self.missing = missing
+        self._length = len(data)
+
+    @staticmethod
+    def _formatter(spec: Optional[Format]) -> Callable[[object], str]:
+        if spec is None:
+            return str
+        if isinstance(spec, str):
+            return spec.format
+        return spec
+
+    def __len__(self) -> int:
+        return self._length
+
+    def row(self, index: int) -> List[str]:
+        """Display strings of one row"""
+        values = []
+        for column, formatter in zip(self._values, self._formatters):
+            value = column[index]
+            values.append(self.missing if _is_missing(value) else formatter(value))
+        return values
+
+    def tags(self, index: int) -> tuple:
+        if self._tags is None or self._tags[index] is None:
+            return ()
+        tags = self._tags[index]
+        return (tags,) if isinstance(tags, str) else tuple(tags)
+
+
+def scroll_offset(offset: int, total: int, visible: int, *args) -> int:
+    """First row shown after a scrollbar command ('moveto', fraction) or ('scroll', n, 'units'|'pages')"""
+    if args and args[0] == 'moveto':
+        offset = int(round(float(args[1]) * total))
+    elif args and args[0] == 'scroll':
+        step = visible if args[2] == 'pages' else 1
+        offset += int(args[1]) * step
+    return max(0, min(offset, total - visible))
+
+
+class VirtualTable(ttk.Frame):
+    """Treeview that only holds the rows on screen, for tables of any length.
+
+    The Treeview keeps one item per visible line; scrolling writes the
+    formatted values of the rows now in view into those items instead of
+    inserting every row up front, so showing or scrolling thousands of
+    rows costs the same as a screenful. Headings and column widths are
+    set on ``tree`` as usual. The selection is kept as rows of the model,
+    so it stays on the same rows while they scroll out of view and back.
+    """
+
+    def __init__(self, master, columns: Sequence[str], height: int = 10, **kwargs):
+        super().__init__(master, **kwargs)
+        self.tree = ttk.Treeview(self, columns=list(columns), show='headings', height=height)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.model = TableModel(pd.DataFrame(columns=list(columns)))
+        self.offset = 0
+        self.visible = height
+        self._items: List[str] = []
+        self._selected: Set[int] = set()
+
+        for column in columns:
+            self.tree.heading(column, text=column)
+        self.tree.bind('<Configure>', self._on_resize)
+        # Windows and macOS report the wheel as <MouseWheel>, X11 as buttons 4 and 5
+        self.tree.bind('<MouseWheel>', lambda event: self._wheel(-1 if event.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda event: self._wheel(-1))
+        self.tree.bind('<Button-5>', lambda event: self._wheel(1))
+        self.tree.bind('<Prior>', lambda event: self._key('scroll', -1, 'pages'))
+        self.tree.bind('<Next>', lambda event: self._key('scroll', 1, 'pages'))
+        self.tree.bind('<Home>', lambda event: self._key('moveto', 0))
+        self.tree.bind('<End>', lambda event: self._key('moveto', 1))
+        # Arrow keys move within the items; at the first or last one they scroll
+        self.tree.bind('<Up>', lambda event: self._step(-1))
+        self.tree.bind('<Down>', lambda event: self._step(1))
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+
+    def set_data(self, data: pd.DataFrame, formats: Optional[Dict[str, Format]] = None,
+                 tags: Optional[Sequence] = None, missing: str = "N/A"):
+        """Show a new table (its columns in the order of the tree's), scrolled to the top"""
+        self.model = TableModel(data[list(self.tree['columns'])], formats, tags, missing)
+        self.offset = 0
+        self._selected = set()
+        self.refresh()
+
+    def selected_rows(self) -> List[int]:
+        """Model indices of the selected rows, whether or not they are in view"""
+        return sorted(self._selected)
+
+    def tag_configure(self, tag: str, **options):
+        self.tree.tag_configure(tag, **options)
+
+    def _row_height(self) -> int:
+        try:
+            return int(ttk.Style().lookup('Treeview', 'rowheight') or DEFAULT_ROW_HEIGHT)
+        except (tk.TclError, ValueError):
+            return DEFAULT_ROW_HEIGHT
+
+    def _on_resize(self, event):
+        # One row's worth of the height goes to the headings
+        visible = max(1, event.height // self._row_height() - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.offset = scroll_offset(self.offset, len(self.model), visible)
+            self.refresh()
+
+    def _wheel(self, units: int):
+        self.yview('scroll', units * 3, 'units')
+        return 'break'
+
+    def _key(self, *args):
+        self.yview(*args)
+        return 'break'
+
+    def _step(self, units: int):
+        edge = 0 if units < 0 else len(self._items) - 1
+        focus = self.tree.focus()
+        if not self._items or focus != self._items[edge]:
+            return None
+        offset = self.offset
+        self.yview('scroll', units, 'units')
+        if self.offset != offset:
+            # The row scrolled in at the edge becomes the selection, as it would inside the view
+            self._selected = {self.offset + edge}
+            self.tree.selection_set(self._items[edge])
+        return 'break'
+
+    def _on_select(self, event):
+        # Rows out of view keep their selection; the ones in view follow the tree
+        shown = range(self.offset, self.offset + len(self._items))
+        selected = {self.offset + self._items.index(item) for item in self.tree.selection() if item in self._items}
+        self._selected = {index for index in self._selected if index not in shown} | selected
+
+    def yview(self, *args):
+        """Scrollbar command: move the window of rows shown"""
+        offset = scroll_offset(self.offset, len(self.model), self.visible, *args)
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def refresh(self):
+        """Write the rows now in view into the tree's items, adding or removing items as the view resizes"""
+        count = max(0, min(self.visible, len(self.model) - self.offset))
+        while len(self._items) < count:
+            self._items.append(self.tree.insert('', 'end'))
+        while len(self._items) > count:
+            self.tree.delete(self._items.pop())
+        # Items are reused for other rows, so the selection is set again from the rows it belongs to
+        selected = []
+        for item, index in zip(self._items, range(self.offset, self.offset + count)):
+            self.tree.item(item, values=self.model.row(index), tags=self.model.tags(index))
+            if index in self._selected:
+                selected.append(item)
+        self.tree.selection_set(selected)
+        total = len(self.model)
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
@@ -1,19 +1,14 @@
-from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, messagebox
-import yfinance as yf
-import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime
-import sys
 
-# Import your existing analysis code
-from az import analyze_earnings_impact
+from task_runner import TaskRunner
 
 class ZMTechApp:
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("ZMTech Finance - Stock Analysis")
+        self.runner = TaskRunner(self.root)
+        self.task = None
         self.setup_ui()
         
     def setup_ui(self):
@@ -80,6 +75,8 @@ class ZMTechApp:
                   command=self.run_analysis).grid(row=0, column=0, padx=5)
         ttk.Button(button_frame, text="Clear", 
                   command=self.clear_output).grid(row=0, column=1, padx=5)
+        ttk.Button(button_frame, text="Cancel", 
+                  command=self.cancel_analysis).grid(row=0, column=2, padx=5)
         
     def create_output_frame(self):
         """Create output section"""
@@ -112,9 +109,6 @@ class ZMTechApp:
     def run_analysis(self):
         """Run the stock analysis"""
         try:
-            self.status_var.set("Running analysis...")
-            self.root.update()
-            
             # Get input values
             ticker1 = self.ticker1.get().upper()
             ticker2 = self.ticker2.get().upper()
@@ -124,28 +118,47 @@ class ZMTechApp:
             if not ticker1 or not ticker2:
                 raise ValueError("Please enter both stock tickers")
             
-            # Run analysis using your existing function
-            results = analyze_earnings_impact(
-                ticker1, 
-                ticker2,
-                days_before=days_before,
-                days_after=days_after
+            # Run analysis using your existing function, off the Tk thread
+            if self.task is not None:
+                self.task.cancel()
+            self.status_var.set("Running analysis...")
+            self.task = self.runner.submit(
+                self.load_analysis, ticker1, ticker2, days_before, days_after,
+                on_done=lambda results: self.show_results(ticker1, ticker2, results),
+                on_error=self.show_error
             )
             
-            # Display results
-            self.output_text.delete(1.0, tk.END)
-            self.output_text.insert(tk.END, f"Analysis completed for {ticker1} and {ticker2}\n\n")
-            self.output_text.insert(tk.END, "Analysis Results:\n")
-            self.output_text.insert(tk.END, str(results))
-            
-            self.status_var.set("Analysis complete")
-            
         except ValueError as ve:
             self.status_var.set("Input error")
             messagebox.showerror("Input Error", str(ve))
         except Exception as e:
-            self.status_var.set("Error in analysis")
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            self.show_error(e)
+            
+    def load_analysis(self, task, ticker1, ticker2, days_before, days_after):
+        """Background job: the earnings analysis, with its imports loaded on first use"""
+        # az pulls in yfinance and matplotlib, so it is imported here rather
+        # than before the window is shown
+        from az import analyze_earnings_impact
+        return analyze_earnings_impact(ticker1, ticker2, days_before=days_before, days_after=days_after)
+        
+    def show_results(self, ticker1, ticker2, results):
+        """Display the results of a finished analysis"""
+        self.output_text.delete(1.0, tk.END)
+        self.output_text.insert(tk.END, f"Analysis completed for {ticker1} and {ticker2}\n\n")
+        self.output_text.insert(tk.END, "Analysis Results:\n")
+        self.output_text.insert(tk.END, str(results))
+        
+        self.status_var.set("Analysis complete")
+        
+    def show_error(self, e):
+        self.status_var.set("Error in analysis")
+        messagebox.showerror("Error", f"An error occurred: {str(e)}")
+        
+    def cancel_analysis(self):
+        """Discard the result of the running analysis"""
+        if self.task is not None and not self.task.done:
+            self.task.cancel()
+            self.status_var.set("Analysis cancelled")
             
     def clear_output(self):
         """Clear the output text"""
@@ -155,6 +168,7 @@ class ZMTechApp:
     def run(self):
         """Run the application"""
         self.root.mainloop()
+        self.runner.shutdown()
 
 def main():
     app = ZMTechApp()